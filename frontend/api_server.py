@@ -0,0 +1,502 @@
+"""
+HTTP API server for the chat agent.
+
+This module exposes ChatAgent as an ASGI application for API traffic, next to the Streamlit UI.
+Every request names its session, and conversation state lives in the session store, so the
+server can run with several worker processes behind one port (set SESSION_STORE_PATH so that
+the workers share sessions).
+
+Endpoints:
+- POST /v1/chat            {"session_id": "...", "query": "..."} -> response dict
+- POST /v1/chat/stream     Same body, Server-Sent Events with one event per pipeline stage
+- POST /v1/batch           {"queries": [...]} -> independent stateless responses, at most API_MAX_BATCH queries
+- GET  /healthz            Liveness check
+- GET  /readyz             Readiness check, 503 until the warm-up has finished
+- GET  /metrics            Prometheus text format metrics
+
+Admission control bounds the number of turns running at once (API_MAX_CONCURRENCY) and the
+number of requests waiting for a slot (API_MAX_QUEUE). Requests beyond that get 503 right away
+instead of piling up, and every request has a deadline (API_REQUEST_TIMEOUT seconds) after
+which it gets 504. The time left when a turn starts, minus a small margin, is the agent's turn
+deadline, so slow stages fall back to cheaper alternatives and the turn returns a degraded
+answer instead of timing out. Queries over the input limit get 413 when INPUT_GUARD_MODE=reject,
+and so do batches of more than API_MAX_BATCH queries (default 64).
+
+On startup every worker warms up in the background (API_WARMUP=0 to skip): it builds all chains,
+loads the local caches, opens pooled connections to the LLM API and, with API_WARMUP_TURN=1,
+answers a synthetic query. /readyz only returns 200 once the warm-up has finished.
+
+Sessions inactive for SESSION_TTL seconds (default 3600, 0 keeps them forever) are deleted from
+the session store every SESSION_CLEANUP_INTERVAL seconds (default 60).
+
+Run with:
+    uvicorn api_server:app --workers 4 --port 8000
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from chat_agent import ChatAgent, chain_flight, fallback_stats, speculation_stats, warm_up
+from personal_bot.session_store import get_session_store
+from personal_bot.utils.input_guard import get_input_guard, InputTooLong
+from personal_bot.utils.entity_normalizer import get_entity_normalizer
+from personal_bot.utils.warmup import get_readiness
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Seconds of the request deadline kept back from the turn deadline to finish the turn and write the response
+DEADLINE_MARGIN = 0.5
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted because the wait queue is full."""
+
+
+class AdmissionController:
+    """
+    Bounds the number of requests running at once and the number waiting for a slot.
+
+    A slot is held until the work on the worker thread has actually finished, even if the
+    client has already been answered with a timeout, so the bound reflects real load.
+    """
+
+    def __init__(self, max_concurrency, max_queue):
+        """
+        Args:
+            max_concurrency (int): Maximum number of requests running at once
+            max_queue (int): Maximum number of requests waiting for a slot
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.running = 0
+        self.waiting = 0
+        self._semaphore = None
+
+    async def acquire(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise Overloaded(f"{self.running} requests running and {self.waiting} waiting")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+
+    def release(self):
+        self.running -= 1
+        self._semaphore.release()
+
+
+class Metrics:
+    """
+    Request counters and latency histograms rendered in the Prometheus text format.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests = Counter()
+        self.latency_counts = {}
+        self.latency_sums = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, status, seconds):
+        with self._lock:
+            self.requests[(endpoint, status)] += 1
+            counts = self.latency_counts.setdefault(endpoint, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self.latency_sums[endpoint] += seconds
+
+    def render(self, admission, sessions_expired=0):
+        lines = [
+            "# HELP chat_api_requests_total Requests handled, by endpoint and status code.",
+            "# TYPE chat_api_requests_total counter",
+        ]
+        with self._lock:
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'chat_api_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+            lines += [
+                "# HELP chat_api_request_seconds Request latency, by endpoint.",
+                "# TYPE chat_api_request_seconds histogram",
+            ]
+            for endpoint, counts in sorted(self.latency_counts.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'chat_api_request_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'chat_api_request_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {counts[-1]}')
+                lines.append(f'chat_api_request_seconds_sum{{endpoint="{endpoint}"}} {self.latency_sums[endpoint]:.6f}')
+                lines.append(f'chat_api_request_seconds_count{{endpoint="{endpoint}"}} {counts[-1]}')
+        lines += [
+            "# HELP chat_api_inflight_requests Requests currently running.",
+            "# TYPE chat_api_inflight_requests gauge",
+            f"chat_api_inflight_requests {admission.running}",
+            "# HELP chat_api_queued_requests Requests waiting for a slot.",
+            "# TYPE chat_api_queued_requests gauge",
+            f"chat_api_queued_requests {admission.waiting}",
+            "# HELP chat_sessions_expired_total Inactive sessions deleted from the session store by this worker.",
+            "# TYPE chat_sessions_expired_total counter",
+            f"chat_sessions_expired_total {sessions_expired}",
+            "# HELP chat_chain_calls_total Chain calls by single-flight outcome, coalesced calls shared another call's LLM round trip.",
+            "# TYPE chat_chain_calls_total counter",
+        ]
+        for outcome in ("leaders", "coalesced", "errors"):
+            lines.append(f'chat_chain_calls_total{{outcome="{outcome}"}} {chain_flight.stats[outcome]}')
+        lines += [
+            "# HELP chat_degraded_responses_total Responses that used at least one fallback.",
+            "# TYPE chat_degraded_responses_total counter",
+            f"chat_degraded_responses_total {fallback_stats['degraded_responses']}",
+            "# HELP chat_fallbacks_total Fallbacks to a cheaper alternative, by fallback.",
+            "# TYPE chat_fallbacks_total counter",
+        ]
+        for fallback, count in sorted(fallback_stats.items()):
+            if fallback != "degraded_responses":
+                lines.append(f'chat_fallbacks_total{{fallback="{fallback}"}} {count}')
+        input_stats = get_input_guard().stats
+        lines += [
+            "# HELP chat_input_guard_total User queries checked, truncated and rejected by the input guard.",
+            "# TYPE chat_input_guard_total counter",
+        ]
+        for action in ("queries", "truncated", "rejected"):
+            lines.append(f'chat_input_guard_total{{action="{action}"}} {input_stats[action]}')
+        lines += [
+            "# HELP chat_chain_inputs_truncated_total Chain calls whose inputs were shortened to fit the chain's input budget.",
+            "# TYPE chat_chain_inputs_truncated_total counter",
+        ]
+        for key, count in sorted(input_stats.items()):
+            if key.startswith("chain_truncated:"):
+                lines.append(f'chat_chain_inputs_truncated_total{{chain="{key.split(":", 1)[1]}"}} {count}')
+        lines += [
+            "# HELP chat_speculation_turns_total Turns that ran classification and extraction speculatively.",
+            "# TYPE chat_speculation_turns_total counter",
+            f"chat_speculation_turns_total {speculation_stats['turns']}",
+            "# HELP chat_speculation_total Speculative calls committed (hit) or discarded (miss), by stage.",
+            "# TYPE chat_speculation_total counter",
+        ]
+        for stage in ("classification", "extraction"):
+            for result in ("hit", "miss"):
+                lines.append(f'chat_speculation_total{{stage="{stage}",result="{result}"}} {speculation_stats[f"{stage}_{result}"]}')
+        lines += [
+            "# HELP chat_speculation_discarded_total Discarded speculative calls, cancelled before they ran or wasted.",
+            "# TYPE chat_speculation_discarded_total counter",
+            f'chat_speculation_discarded_total{{outcome="cancelled"}} {speculation_stats["cancelled"]}',
+            f'chat_speculation_discarded_total{{outcome="wasted"}} {speculation_stats["wasted"]}',
+            "# HELP chat_speculation_wasted_tokens_total Tokens used by discarded speculative calls.",
+            "# TYPE chat_speculation_wasted_tokens_total counter",
+            f"chat_speculation_wasted_tokens_total {speculation_stats['wasted_tokens']}",
+            "# HELP chat_speculation_saved_seconds_total Latency saved by committed speculative calls.",
+            "# TYPE chat_speculation_saved_seconds_total counter",
+            f"chat_speculation_saved_seconds_total {speculation_stats['saved_ms'] / 1000:.3f}",
+        ]
+        lines += [
+            "# HELP chat_entities_normalized_total Extracted entity values normalized locally, by kind and result.",
+            "# TYPE chat_entities_normalized_total counter",
+        ]
+        for key, count in sorted(get_entity_normalizer().stats.items()):
+            kind, result = key.split(":", 1)
+            lines.append(f'chat_entities_normalized_total{{kind="{kind}",result="{result}"}} {count}')
+        readiness = get_readiness()
+        lines += [
+            "# HELP chat_ready Whether the worker has finished its warm-up.",
+            "# TYPE chat_ready gauge",
+            f"chat_ready {int(readiness.ready)}",
+            "# HELP chat_warmup_step_seconds Time taken by each warm-up step.",
+            "# TYPE chat_warmup_step_seconds gauge",
+        ]
+        for step, seconds in readiness.steps.items():
+            lines.append(f'chat_warmup_step_seconds{{step="{step}"}} {seconds}')
+        if readiness.warmup_seconds is not None:
+            lines += [
+                "# HELP chat_warmup_seconds Total warm-up time of the worker.",
+                "# TYPE chat_warmup_seconds gauge",
+                f"chat_warmup_seconds {readiness.warmup_seconds}",
+            ]
+        if readiness.first_turn_seconds is not None:
+            lines += [
+                "# HELP chat_first_turn_seconds Latency of the first real turn handled by the worker.",
+                "# TYPE chat_first_turn_seconds gauge",
+                f"chat_first_turn_seconds {readiness.first_turn_seconds}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ChatAPI:
+    """
+    Minimal ASGI application serving ChatAgent.
+
+    Agent turns use blocking LLM clients, so they run on a bounded thread pool while the event
+    loop only parses requests, enforces deadlines and writes responses.
+    """
+
+    def __init__(self, max_concurrency=8, max_queue=32, request_timeout=30.0, batch_concurrency=4, max_batch=64, warm_up=True, warmup_turn=False, session_ttl=3600.0, cleanup_interval=60.0):
+        """
+        Args:
+            max_concurrency (int): Maximum number of agent turns running at once
+            max_queue (int): Maximum number of requests waiting for a slot before 503 is returned
+            request_timeout (float): Deadline in seconds for a single request
+            batch_concurrency (int): Concurrency used inside a /v1/batch request
+            max_batch (int): Maximum number of queries in a /v1/batch request, 413 beyond that
+            warm_up (bool): Warm the worker up on startup, /readyz is green right away otherwise
+            warmup_turn (bool): Include a synthetic turn in the warm-up
+            session_ttl (float): Seconds of inactivity after which a session is deleted, never if 0
+            cleanup_interval (float): Seconds between two runs of the session cleanup
+        """
+        self.admission = AdmissionController(max_concurrency, max_queue)
+        self.request_timeout = request_timeout
+        self.batch_concurrency = batch_concurrency
+        self.max_batch = max_batch
+        self.warm_up = warm_up
+        self.warmup_turn = warmup_turn
+        self.session_ttl = session_ttl
+        self.cleanup_interval = cleanup_interval
+        self.sessions_expired = 0
+        self._cleanup_task = None
+        self.metrics = Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="chat-api")
+        self.routes = {
+            ("POST", "/v1/chat"): self.chat,
+            ("POST", "/v1/chat/stream"): self.chat_stream,
+            ("POST", "/v1/batch"): self.batch,
+            ("GET", "/healthz"): self.healthz,
+            ("GET", "/readyz"): self.readyz,
+            ("GET", "/metrics"): self.metrics_endpoint,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        start = time.perf_counter()
+        path = scope["path"]
+        handler = self.routes.get((scope["method"], path))
+        status = 500
+        try:
+            if handler is None:
+                raise HTTPError(404 if path not in {route_path for _, route_path in self.routes} else 405, "Not found")
+            status = await handler(scope, receive, send)
+        except HTTPError as e:
+            status = e.status
+            await send_json(send, status, {"error": e.message})
+        except Exception as e:
+            logger.exception(f"Unhandled error on {path}: {e}")
+            await send_json(send, 500, {"error": "Internal server error"})
+        finally:
+            if handler is not None and path != "/metrics":
+                self.metrics.observe(path, status, time.perf_counter() - start)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.warm_up:
+                    # Runs off the event loop, so /healthz answers while the worker warms up
+                    threading.Thread(target=warm_up, kwargs={"synthetic_turn": self.warmup_turn}, name="warm-up", daemon=True).start()
+                if self.session_ttl:
+                    self._cleanup_task = asyncio.ensure_future(self.cleanup_sessions())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._cleanup_task is not None:
+                    self._cleanup_task.cancel()
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def cleanup_sessions(self):
+        """
+        Delete sessions inactive for `session_ttl` seconds every `cleanup_interval` seconds, for as long as the worker runs.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                # Off the event loop and off the turn pool, a SQLite cleanup can take a while
+                deleted = await loop.run_in_executor(None, get_session_store().cleanup, self.session_ttl)
+            except Exception as e:
+                logger.exception(f"Session cleanup failed: {e}")
+                continue
+            self.sessions_expired += deleted
+            if deleted:
+                logger.info(f"Deleted {deleted} sessions inactive for more than {self.session_ttl} seconds")
+
+    async def run_admitted(self, func, *args, pass_timeout=False):
+        """
+        Run `func` on the worker pool once admitted, waiting at most `request_timeout` seconds.
+
+        Args:
+            func (callable): The blocking work, e.g. `ChatAgent.get_response`
+            pass_timeout (bool): Pass the time left until the deadline, minus DEADLINE_MARGIN, to
+                `func` as its `timeout` keyword argument
+
+        Raises:
+            HTTPError: 503 if the wait queue is full, 504 if the deadline passes
+        """
+        deadline = time.monotonic() + self.request_timeout
+        try:
+            await asyncio.wait_for(self.admission.acquire(), timeout=self.request_timeout)
+        except Overloaded as e:
+            raise HTTPError(503, f"Server overloaded: {e}")
+        except asyncio.TimeoutError:
+            raise HTTPError(504, "Request deadline exceeded while queued")
+
+        kwargs = {"timeout": max(0.0, deadline - time.monotonic() - DEADLINE_MARGIN)} if pass_timeout else {}
+        future = self.executor.submit(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self.admission.release))
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise HTTPError(504, "Request deadline exceeded")
+        except InputTooLong as e:
+            raise HTTPError(413, str(e))
+
+    async def chat(self, scope, receive, send):
+        session_id, query = parse_chat_request(await read_json(receive))
+        agent = ChatAgent(session_id=session_id)
+        response = await self.run_admitted(agent.get_response, query, pass_timeout=True)
+        await send_json(send, 200, {"session_id": session_id, "response": response})
+        return 200
+
+    async def chat_stream(self, scope, receive, send):
+        session_id, query = parse_chat_request(await read_json(receive))
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        agent = ChatAgent(
+            session_id=session_id,
+            on_stage=lambda stage, data: loop.call_soon_threadsafe(events.put_nowait, (stage, data)),
+        )
+        task = asyncio.ensure_future(self.run_admitted(agent.get_response, query, pass_timeout=True))
+        task.add_done_callback(lambda _: events.put_nowait(None))
+
+        headers = [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send_event(send, "session", {"session_id": session_id})
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            await send_event(send, *event)
+
+        status = 200
+        try:
+            await send_event(send, "response", task.result())
+        except HTTPError as e:
+            status = e.status
+            await send_event(send, "error", {"status": e.status, "error": e.message})
+        except Exception as e:
+            # The response has started, the error has to go out as an event instead of a new response
+            logger.exception(f"Unhandled error on {scope['path']}: {e}")
+            status = 500
+            await send_event(send, "error", {"status": 500, "error": "Internal server error"})
+        await send({"type": "http.response.body", "body": b"event: done\ndata: {}\n\n"})
+        return status
+
+    async def batch(self, scope, receive, send):
+        body = await read_json(receive)
+        queries = body.get("queries")
+        if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+            raise HTTPError(400, "'queries' must be a list of strings")
+        if len(queries) > self.max_batch:
+            raise HTTPError(413, f"Batch of {len(queries)} queries is over the limit of {self.max_batch}")
+        agent = ChatAgent()
+        responses = await self.run_admitted(agent.get_responses, queries, self.batch_concurrency, pass_timeout=True)
+        await send_json(send, 200, {"responses": responses})
+        return 200
+
+    async def healthz(self, scope, receive, send):
+        await send_json(send, 200, {"status": "ok", "running": self.admission.running, "queued": self.admission.waiting})
+        return 200
+
+    async def readyz(self, scope, receive, send):
+        readiness = get_readiness()
+        ready = readiness.ready or (not self.warm_up and readiness.state == "starting")
+        status = 200 if ready else 503
+        await send_json(send, status, {"ready": ready, **readiness.to_dict()})
+        return status
+
+    async def metrics_endpoint(self, scope, receive, send):
+        body = self.metrics.render(self.admission, self.sessions_expired).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain; version=0.0.4")]})
+        await send({"type": "http.response.body", "body": body})
+        return 200
+
+
+def parse_chat_request(body):
+    query = body.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise HTTPError(400, "'query' must be a non-empty string")
+    session_id = body.get("session_id") or uuid.uuid4().hex
+    return str(session_id), query
+
+
+async def read_json(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    try:
+        body = json.loads(b"".join(chunks) or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Request body is not valid JSON")
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Request body must be a JSON object")
+    return body
+
+
+async def send_json(send, status, payload):
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+async def send_event(send, event, data):
+    message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    await send({"type": "http.response.body", "body": message.encode(), "more_body": True})
+
+
+app = ChatAPI(
+    max_concurrency=int(os.getenv("API_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("API_MAX_QUEUE", "32")),
+    request_timeout=float(os.getenv("API_REQUEST_TIMEOUT", "30")),
+    max_batch=int(os.getenv("API_MAX_BATCH", "64")),
+    warm_up=os.getenv("API_WARMUP", "1") != "0",
+    warmup_turn=os.getenv("API_WARMUP_TURN", "0") == "1",
+    session_ttl=float(os.getenv("SESSION_TTL", "3600")),
+    cleanup_interval=float(os.getenv("SESSION_CLEANUP_INTERVAL", "60")),
+)
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Serve the chat agent over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to bind (default: 8000)')
+    parser.add_argument('--workers', type=int, default=1,
+                      help='Number of worker processes, set SESSION_STORE_PATH when using more than one (default: 1)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run("api_server:app", host=args.host, port=args.port, workers=args.workers)
@@ -0,0 +1,154 @@
+"""
+Batch runner for offline classification and entity extraction of historical user messages.
+
+Reads a JSONL file with one message per line, runs every message as an independent stateless
+turn through ChatAgent.iter_responses and streams the results to a JSONL output file as they
+complete. The output file doubles as the checkpoint: when the runner is restarted with the
+same output file, messages that already have a result are skipped. Lines that are not valid
+JSON or miss the message field get an error record instead of stopping the run.
+"""
+
+import json
+import os
+import argparse
+from chat_agent import ChatAgent
+
+
+def read_messages(input_path, field, id_field):
+    """
+    Yields (index, message_id, text, error) for every line of a JSONL file.
+
+    A line can be a JSON object holding the text under `field` or a plain JSON string. For a line
+    that is neither, text is None and error says why.
+    """
+    with open(input_path, 'r') as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield index, index, None, f"Invalid JSON: {e}"
+                continue
+            if isinstance(record, str):
+                yield index, index, record, None
+            elif not isinstance(record, dict):
+                yield index, index, None, f"Expected a JSON object or string, got {type(record).__name__}"
+            elif not isinstance(record.get(field), str):
+                yield index, record.get(id_field, index), None, f"Missing text field {field!r}"
+            else:
+                yield index, record.get(id_field, index), record[field], None
+
+
+def read_checkpoint(output_path):
+    """Returns the input line indices that already have a result in the output file."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r') as f:
+        for line in f:
+            try:
+                completed.add(json.loads(line)['index'])
+            except (ValueError, KeyError):
+                # A partially written last line from an interrupted run is retried
+                continue
+    return completed
+
+
+def run_batch(input_path, output_path, field, id_field, concurrency, batch_size, preserve_order, restart):
+    chat_agent = ChatAgent()
+
+    if restart and os.path.exists(output_path):
+        os.remove(output_path)
+    completed = read_checkpoint(output_path)
+    if completed:
+        print(f"Resuming from checkpoint, {len(completed)} messages already processed")
+
+    # Messages are read lazily, only those of the chunks in flight are held by position until written
+    in_flight = {}
+    # Error records of unreadable lines, written by the main loop
+    invalid = []
+
+    def pending_texts():
+        pending = (message for message in read_messages(input_path, field, id_field) if message[0] not in completed)
+        position = 0
+        for index, message_id, text, error in pending:
+            if error is not None:
+                invalid.append({'index': index, 'id': message_id, 'input': None, 'error': error})
+                continue
+            in_flight[position] = (index, message_id, text)
+            position += 1
+            yield text
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    processed = skipped = 0
+    with open(output_path, 'a+') as f:
+        # Terminate a partially written last line so the next record starts on its own line
+        if f.tell() > 0:
+            f.seek(f.tell() - 1)
+            if f.read(1) != '\n':
+                f.write('\n')
+        responses = chat_agent.iter_responses(
+            pending_texts(),
+            concurrency=concurrency,
+            batch_size=batch_size,
+            preserve_order=preserve_order,
+        )
+
+        def write_invalid():
+            nonlocal skipped
+            while invalid:
+                record = invalid.pop(0)
+                print(f"Skipping line {record['index']}: {record['error']}")
+                f.write(json.dumps(record) + '\n')
+                skipped += 1
+            f.flush()
+
+        for position, response in responses:
+            write_invalid()
+            index, message_id, text = in_flight.pop(position)
+            f.write(json.dumps({'index': index, 'id': message_id, 'input': text, 'output': response}) + '\n')
+            f.flush()
+            processed += 1
+            if processed % batch_size == 0:
+                os.fsync(f.fileno())
+                print(f"Processed {processed} messages")
+        write_invalid()
+
+    print(f"Batch results for {processed} messages have been saved to {output_path}"
+          + (f", {skipped} unreadable lines were skipped" if skipped else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classify and extract entities for a JSONL file of user messages')
+    parser.add_argument('--input', '-i', required=True,
+                      help='Path to the input JSONL file')
+    parser.add_argument('--output', '-o',
+                      default='../test_results/batch_results.jsonl',
+                      help='Path to the output JSONL file, also used as checkpoint (default: ../test_results/batch_results.jsonl)')
+    parser.add_argument('--field', '-f',
+                      default='input',
+                      help='Key holding the message text in each JSON line (default: input)')
+    parser.add_argument('--id-field',
+                      default='id',
+                      help='Key holding the message id in each JSON line (default: id)')
+    parser.add_argument('--concurrency', '-c', type=int, default=4,
+                      help='Number of chunks processed at the same time (default: 4)')
+    parser.add_argument('--batch-size', '-b', type=int, default=8,
+                      help='Number of messages per chunk and per LLM batch (default: 8)')
+    parser.add_argument('--unordered', action='store_true',
+                      help='Write results in completion order instead of input order')
+    parser.add_argument('--restart', action='store_true',
+                      help='Ignore the checkpoint and start from the first message')
+
+    args = parser.parse_args()
+
+    run_batch(args.input, args.output, args.field, args.id_field, args.concurrency,
+              args.batch_size, not args.unordered, args.restart)
+
+if __name__ == "__main__":
+    main()
@@ -5,22 +5,197 @@ It uses various chains for intent classification, entity extraction, and follow-
 """
 
 
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
-import streamlit as st
+import os
 import re
+import copy
 import json
 import logging
+import itertools
+import importlib
+import threading
+import uuid
+import time
 import sys
+from datetime import datetime
+from functools import partial
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
 sys.path.append("../")
 
-from personal_bot.chains.intent_classifier_chain import intent_classifier_chain
-from personal_bot.chains.contextual_chain import contextual_query_chain
-from personal_bot.chains.extract_key_entities_chain import extract_key_entities_chain
-from personal_bot.chains.followup_questions_chain import followup_questions_chain
-from personal_bot.chains.other_chain import other_chain
-from personal_bot.get_memory import BotMemory
-from personal_bot.utils.intent_utils import DiningIntent, TravelIntent, GiftingIntent, CabIntent
+from personal_bot.utils.intent_utils import INTENT_REGISTRY, incomplete_intents
+from personal_bot.utils.context_gate import ContextGate
+from personal_bot.utils.fast_path import get_fast_path
+from personal_bot.utils.web_search import get_web_search_service, WebSearchTimeout
+from personal_bot.utils.query_builder import QueryBuilder
+from personal_bot.session_store import get_session_store
+from personal_bot.utils.single_flight import SingleFlight, make_key
+from personal_bot.token_ledger import TurnUsage, get_token_ledger
+from personal_bot.interaction_log import get_interaction_logger
+from personal_bot.utils.deadline import Deadline, LatencyEstimator
+from personal_bot.utils.keyword_intent import classify_intent_keywords, split_intents_keywords
+from personal_bot.utils.speculation import Speculation
+from personal_bot.utils.entity_normalizer import get_entity_normalizer
+from personal_bot.utils.warmup import get_readiness
+from personal_bot.utils.input_guard import get_input_guard, InputTooLong
+from personal_bot.utils.conversation_summary import SummaryUpdater, build_context, truncate_to_tokens, CONTEXT_MAX_TOKENS, SUMMARY_MAX_TOKENS
+
+# Chains are imported and built on first use, the chain modules pull in langchain and the Groq client
+CHAIN_FACTORIES = {
+    "contextual_query_chain": ("personal_bot.chains.contextual_chain", "contextual_query_chain"),
+    "intent_classifier_chain": ("personal_bot.chains.intent_classifier_chain", "intent_classifier_chain"),
+    "extract_key_entities_chain": ("personal_bot.chains.extract_key_entities_chain", "extract_key_entities_chain"),
+    "follow_up_questions_chain": ("personal_bot.chains.followup_questions_chain", "followup_questions_chain"),
+    "other_chain": ("personal_bot.chains.other_chain", "other_chain"),
+    "summary_chain": ("personal_bot.chains.summary_chain", "summary_chain"),
+}
+
+_chains = {}
+_chains_lock = threading.Lock()
+
+# Concurrent identical chain calls from all sessions in the process share one LLM round trip
+chain_flight = SingleFlight("chains")
+
+# Chain calls with a deadline run here, so the caller can stop waiting when the deadline passes
+_chain_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="chain")
+
+# Expected stage latencies in seconds, updated from observed calls, used to decide whether a stage fits in a turn's deadline
+stage_latency = LatencyEstimator(
+    defaults={
+        "contextual_query_chain": 1.0,
+        "intent_classifier_chain": 0.8,
+        "extract_key_entities_chain": 1.0,
+        "follow_up_questions_chain": 1.5,
+        "other_chain": 0.8,
+        "web_search": 1.0,
+    },
+)
+
+# Rolling conversation summaries are updated here, after the response has been returned
+summary_updater = SummaryUpdater(max_workers=2)
+
+# Speculative classification and extraction calls run here, next to the contextual rewrite
+_speculation_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="speculation")
+
+# Hits, misses and latency saved by speculative execution, across all agents in the process
+speculation_stats = Counter()
+
+# How often each fallback fired and how many responses were degraded, across all agents in the process
+fallback_stats = Counter()
+
+
+def get_chain(name, model_name=None):
+    """
+    Returns the chain with the given name, building it on first use.
+
+    Built chains are shared by all ChatAgent instances in the process, they only hold the
+    prompt, the LLM client and the shared BotMemory.
+
+    Args:
+        name (str): One of the keys of CHAIN_FACTORIES
+        model_name (str): Run the chain's prompt on this model instead of the chain's own model
+
+    Returns:
+        LLMChain: The chain
+    """
+    cache_key = name if model_name is None else f"{name}@{model_name}"
+    chain = _chains.get(cache_key)
+    if chain is None:
+        base_chain = get_chain(name) if model_name is not None else None
+        with _chains_lock:
+            chain = _chains.get(cache_key)
+            if chain is None:
+                if base_chain is not None:
+                    from langchain.chains import LLMChain
+                    from personal_bot.get_llm import get_llm
+
+                    llm = get_llm(model_name, temperature=base_chain.llm.temperature, max_tokens=base_chain.llm.max_tokens)
+                    chain = LLMChain(llm=llm, prompt=base_chain.prompt, memory=base_chain.memory)
+                else:
+                    module_name, factory_name = CHAIN_FACTORIES[name]
+                    factory = getattr(importlib.import_module(module_name), factory_name)
+                    chain = factory()
+                _chains[cache_key] = chain
+    return chain
+
+
+def run_chain(name, inputs, model_name=None, callbacks=None, timeout=None):
+    """
+    Run a chain, coalescing concurrent calls with the same rendered prompt.
+
+    Calls are identical when they use the same chain, model, sampling parameters and rendered
+    prompt. Only the first of them reaches the LLM, the others wait for and share its output
+    (or its exception). With LLM_RECORDING set, outputs are recorded or replayed (see llm_recording).
+
+    Args:
+        name (str): One of the keys of CHAIN_FACTORIES
+        inputs (dict): The chain inputs
+        model_name (str): Run the chain on this model instead of the chain's own model
+        callbacks (list): LangChain callbacks, only the call that reaches the LLM reports to them
+        timeout (float): Seconds to wait for the output, no limit if not given. The LLM call itself
+            is not cancelled when the timeout passes, other callers waiting for it still get its output
+
+    Returns:
+        str: Raw text returned by the LLM
+
+    Raises:
+        concurrent.futures.TimeoutError: If the output did not arrive within `timeout`
+    """
+    chain = get_chain(name, model_name)
+    llm = chain.llm
+    key = make_key(
+        name,
+        getattr(llm, "model_name", None),
+        getattr(llm, "temperature", None),
+        getattr(llm, "max_tokens", None),
+        chain.prompt.format(**inputs),
+    )
+    recording = None
+    if os.getenv("LLM_RECORDING"):
+        # llm_recording defines a LangChain chat model, it is only imported when recording or replaying
+        from personal_bot.llm_recording import get_llm_recording
+        recording = get_llm_recording()
+    run = partial(recording.run, name, chain) if recording is not None else chain.run
+    if timeout is None:
+        return chain_flight.do(key, run, inputs, callbacks=callbacks)
+    future, _ = chain_flight.submit(key, _chain_executor, run, inputs, callbacks=callbacks)
+    return future.result(timeout=timeout)
+
+
+def describe_response(ai_response):
+    """
+    Short text form of an assistant response for the conversation summary.
+    """
+    if not isinstance(ai_response, dict):
+        return str(ai_response)
+    if isinstance(ai_response.get("response"), str):
+        return ai_response["response"]
+    parts = [f"{intent['intent_category']} request" for intent in ai_response.get("intents") or [ai_response]]
+    entities = ai_response.get("key_entities") or {}
+    parts += [f"{key}: {value}" for key, value in entities.items() if value not in (None, "", [], "Not Specified")]
+    if ai_response.get("web_search_query"):
+        parts.append(f"searched the web for {ai_response['web_search_query']}")
+    parts += [f"asked: {question}" for question in (ai_response.get("follow_up_questions") or [])[:2]]
+    return ", ".join(parts)
+
+
+def parse_json_response(chain_response):
+    """
+    Parse the JSON object out of a raw chain response.
+
+    Args:
+        chain_response (str): Raw text returned by the LLM
+
+    Returns:
+        dict: The parsed JSON object
+
+    Raises:
+        ValueError: If the response does not contain valid JSON
+    """
+    match = re.search(r"\{.*\}", chain_response, re.DOTALL)
+    if match:
+        chain_response = match.group(0)
+    return json.loads(chain_response)
+
 
 class ChatAgent:
     """
@@ -35,25 +210,219 @@ class ChatAgent:
     - Managing conversation memory
     """
     
-    def __init__(self):
+    def __init__(self, spell_correction=False, search_query_confidence=0.6, session_id=None, session_store=None, on_stage=None, fast_path=True, turn_timeout=None, conversation_summary=True, context_max_tokens=CONTEXT_MAX_TOKENS, speculative=None, clock=None):
         """
         Initialize the ChatAgent with necessary components and logging setup.
-        Sets up various chains for processing different aspects of the conversation.
+        The chains for the different aspects of the conversation are built on first use.
+
+        Args:
+            spell_correction (bool): Whether queries that skip the contextual chain should go
+                through the local spelling correction pass
+            search_query_confidence (float): Minimum confidence of the local search query rewrite,
+                below it the other chain is used to build the web search string
+            session_id (str): Id of the conversation to continue, a new session is started if not given
+            session_store (SessionStore): Store holding the conversation state, the process-wide store if not given
+            on_stage (callable): Called as on_stage(stage, data) when a pipeline stage completes, used for streaming
+            fast_path (bool): Answer small talk (greetings, thanks, goodbyes) from the pattern table without calling any chain
+            turn_timeout (float): Overall deadline of a turn in seconds, CHAT_TURN_TIMEOUT or no deadline if not given.
+                Stages that do not fit in the remaining time fall back to cheaper alternatives
+            conversation_summary (bool): Keep a rolling conversation summary for the contextual chain, updated in the background
+            context_max_tokens (int): Token ceiling of the context block (summary and previous message) of the contextual chain
+            speculative (bool): Classify the raw query while the contextual rewrite runs and extract entities for the
+                locally predicted intent while the classifier runs, CHAT_SPECULATIVE=1 or off if not given
+            clock (callable): Returns the session's current datetime, relative dates and times are resolved against it,
+                datetime.now if not given
         """
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
-        self.contextual_query_chain = contextual_query_chain()
-        self.intent_classifier_chain = intent_classifier_chain()
-        self.extract_key_entities_chain = extract_key_entities_chain()
-        self.follow_up_questions_chain = followup_questions_chain()
-        self.last_query = ""
-        self.memory = BotMemory().get_memory()
-        self.other_chain = other_chain()
+        self.session_store = session_store or get_session_store()
+        self.session_id = session_id or uuid.uuid4().hex
+        self.on_stage = on_stage
+        self.ledger = get_token_ledger()
+        self.interaction_logger = get_interaction_logger()
+        self.input_guard = get_input_guard()
+        self.entity_normalizer = get_entity_normalizer()
+        self.clock = clock or datetime.now
+        if turn_timeout is None and os.getenv("CHAT_TURN_TIMEOUT"):
+            turn_timeout = float(os.getenv("CHAT_TURN_TIMEOUT"))
+        self.turn_timeout = turn_timeout
+        self.conversation_summary = conversation_summary
+        if speculative is None:
+            speculative = os.getenv("CHAT_SPECULATIVE", "0") == "1"
+        self.speculative = speculative
+        self.last_speculation = None
+        self.context_max_tokens = context_max_tokens
+        # Set per turn by get_response
+        self.turn_usage = None
+        self.last_turn_usage = None
+        self.budget_exceeded = None
+        self.deadline = Deadline()
+        self.fallbacks = []
+        self.context_gate = ContextGate(spell_correction=spell_correction)
+        self.small_talk = get_fast_path()
+        self.fast_path = fast_path
+        self.web_search = get_web_search_service()
+        self.query_builder = QueryBuilder()
+        self.search_query_confidence = search_query_confidence
+        # Intents answered without entity extraction, all other intents are looked up in INTENT_REGISTRY
+        self.intent_handlers = {
+            "other": self.handle_other_intent,
+            "greetings": self.handle_greetings_intent,
+        }
+
+
+    @property
+    def last_query(self):
+        return self.session_store.get_state(self.session_id).get("last_query", "")
+
+    @last_query.setter
+    def last_query(self, query):
+        self.session_store.set_state(self.session_id, last_query=query)
+
+
+    def _agent_copy(self):
+        """
+        Returns a copy of the agent with its own per-turn state (usage, deadline, fallbacks), so that
+        batch chunks and speculative calls running on other threads never share it with each other
+        or with `get_response`.
+        """
+
+        agent = copy.copy(self)
+        agent.turn_usage = None
+        agent.last_turn_usage = None
+        agent.budget_exceeded = None
+        agent.deadline = Deadline()
+        agent.fallbacks = []
+        agent.last_speculation = None
+        agent.intent_handlers = {
+            "other": agent.handle_other_intent,
+            "greetings": agent.handle_greetings_intent,
+        }
+        return agent
+
+
+    def has_pending_intent(self, state=None):
+        """
+        Returns True if a request of the session still misses a required slot, i.e. the next
+        message is expected to answer its follow-up questions.
+
+        Args:
+            state (dict): The session state, read from the session store if not given
+        """
+
+        if state is None:
+            state = self.session_store.get_state(self.session_id)
+        return bool(incomplete_intents(state.get("partial_intents")))
+
+
+    def reset_session(self, session_id=None):
+        """
+        Switch the agent to another session, a new empty one if no session id is given.
+        
+        Args:
+            session_id (str): Id of the session to switch to
+        """
+
+        self.session_id = session_id or uuid.uuid4().hex
+
+
+    @property
+    def contextual_query_chain(self):
+        return get_chain("contextual_query_chain")
+
+    @property
+    def intent_classifier_chain(self):
+        return get_chain("intent_classifier_chain")
+
+    @property
+    def extract_key_entities_chain(self):
+        return get_chain("extract_key_entities_chain")
+
+    @property
+    def follow_up_questions_chain(self):
+        return get_chain("follow_up_questions_chain")
+
+    @property
+    def other_chain(self):
+        return get_chain("other_chain")
+
+    @property
+    def memory(self):
+        from personal_bot.get_memory import BotMemory
+        return BotMemory().get_memory()
+
+
+    def _run_chain(self, name, inputs, intent_category=None):
+        """
+        Run a chain for the current turn, on the smaller model once a token budget is exhausted,
+        record its token usage on the turn and log the interaction.
+        """
+
+        model_name = self.ledger.degraded_model if self.budget_exceeded else None
+        chain = get_chain(name, model_name)
+        inputs = self.input_guard.fit_chain_inputs(
+            name, chain.prompt, inputs, getattr(chain.llm, "model_name", None), getattr(chain.llm, "max_tokens", None)
+        )
+        callback = None
+        if self.turn_usage is not None:
+            callback = self.turn_usage.callback(name, getattr(chain.llm, "model_name", None), intent_category)
+
+        start = time.perf_counter()
+        raw_output = run_chain(
+            name, inputs, model_name=model_name, callbacks=[callback] if callback else None, timeout=self.deadline.remaining()
+        )
+        latency = time.perf_counter() - start
+        stage_latency.observe(name, latency)
+        if self.turn_usage is not None:
+            self.turn_usage.add_latency(name, latency)
+        if self.interaction_logger is not None:
+            self._log_interaction(name, chain, inputs, raw_output, latency, callback, intent_category)
+        return raw_output
+
+
+    def _stage_fits(self, name):
+        """Returns True if the stage is expected to finish before the turn's deadline."""
+        return self.deadline.fits(stage_latency.estimate(name))
+
+
+    def _fallback(self, name):
+        """Record that the turn fell back to a cheaper alternative for a stage."""
+        self.logger.warning(f"Falling back: {name}")
+        self.fallbacks.append(name)
+        fallback_stats[name] += 1
+
+
+    def _log_interaction(self, name, chain, inputs, raw_output, latency, callback, intent_category, batched=False):
+        usage = callback.last_entry if callback is not None else None
+        self.interaction_logger.log({
+            "timestamp": time.time(),
+            "session_id": self.session_id,
+            "turn_id": callback.turn_usage.turn_id if callback is not None else None,
+            "chain": name,
+            "model": getattr(chain.llm, "model_name", None),
+            "temperature": getattr(chain.llm, "temperature", None),
+            "intent": intent_category,
+            "inputs": inputs,
+            "input": chain.prompt.format(**inputs),
+            "raw_output": raw_output,
+            "latency_s": round(latency, 4),
+            "prompt_tokens": usage["prompt_tokens"] if usage else None,
+            "completion_tokens": usage["completion_tokens"] if usage else None,
+            # Coalesced calls shared another call's LLM round trip and report no usage of their own
+            "coalesced": callback is not None and usage is None,
+            "batched": batched,
+        }, parse=parse_json_response)
 
 
     def get_contextual_query_response(self, query):
         """
         Process the user query with context from previous conversation.
+
+        The context gate is checked first, queries with no prior context or no contextual
+        references are returned unchanged without calling the contextual chain, unless a request
+        of the session is still waiting for follow-up answers. The context is
+        the latest completed conversation summary and the previous user message, within a fixed
+        token ceiling.
         
         Args:
             query (str): The current user query
@@ -61,23 +430,32 @@ class ChatAgent:
         Returns:
             str: The processed query with context resolved
         """
+
+        previous_query = self.last_query
+        state = self.session_store.get_state(self.session_id)
+        needs_rewrite, reason = self.context_gate.check(query, previous_query, pending=self.has_pending_intent(state))
+        self.logger.info(f"Context gate decision: {'rewrite' if needs_rewrite else 'skip'} ({reason}), query: {query}")
+        if not needs_rewrite:
+            self.last_query = query
+            return self.context_gate.correct_spelling(query)
         
-        last_query = f"User: {self.last_query.strip()}" if self.last_query.strip() not in ["", None] else ""
-        if last_query:
-            input = f"Context:\n{last_query}\n\nquery: {query}"
-        else:
-            input = f"Context:\n\nquery: {query}"
+        summary = state.get("summary", "") if self.conversation_summary else ""
+        context = build_context(summary, previous_query, self.context_max_tokens)
+        input = f"Context:\n{context}\n\nquery: {query}"
 
         self.last_query = query
 
-        contextual_chain_response = self.contextual_query_chain.run({"input": input})
-
-        match = re.search(r"\{.*\}", contextual_chain_response, re.DOTALL)
-        if match:
-            contextual_chain_response = match.group(0)
+        if not self._stage_fits("contextual_query_chain"):
+            self._fallback("skip_contextual_rewrite")
+            return query
+        try:
+            contextual_chain_response = self._run_chain("contextual_query_chain", {"input": input})
+        except FutureTimeoutError:
+            self._fallback("skip_contextual_rewrite")
+            return query
 
         try:
-            contextual_chain_response = json.loads(contextual_chain_response)
+            contextual_chain_response = parse_json_response(contextual_chain_response)
         except Exception as e:
             self.logger.error(f"Error in contextual query chain: {e}")
             return "An error occurred while processing your query. Please try again."
@@ -95,48 +473,91 @@ class ChatAgent:
             absolute_query (str): The processed user query
             
         Returns:
-            tuple: (intent_category, confidence_score)
+            tuple: (intent_category, confidence_score) of the first request in the query
         """
 
-        intent_chain_response = self.intent_classifier_chain.run({"query": absolute_query})
+        intents = self.get_intents_classification_response(absolute_query)
+        return intents[0]["intent_category"], intents[0]["confidence_score"]
 
-        match = re.search(r"\{.*\}", intent_chain_response, re.DOTALL)
-        if match:
-            intent_chain_response = match.group(0)
+
+    def get_intents_classification_response(self, absolute_query):
+        """
+        Classify every request in the user's query.
+
+        Compound queries such as "Book a table for dinner and then a cab to go there" get one
+        entry per request, each with the span of the query it was found in. Repeated categories
+        are merged into one entry.
+        
+        Args:
+            absolute_query (str): The processed user query
+            
+        Returns:
+            list: Dicts with the keys intent_category, confidence_score and span, in the order asked
+        """
+
+        if not self._stage_fits("intent_classifier_chain"):
+            return self._get_keyword_intents(absolute_query)
+        try:
+            intent_chain_response = self._run_chain("intent_classifier_chain", {"query": absolute_query})
+        except FutureTimeoutError:
+            return self._get_keyword_intents(absolute_query)
 
         try:
-            intent_chain_response = json.loads(intent_chain_response)
+            intent_chain_response = parse_json_response(intent_chain_response)
+            intents = [{
+                "intent_category": intent_chain_response["intent_category"],
+                "confidence_score": intent_chain_response["confidence_score"],
+                "span": absolute_query,
+            }]
         except Exception as e:
-            self.logger.error(f"Error in intent classification chain: {e}")
-            return "An error occurred while processing your query. Please try again."
-        
-        intent_category = intent_chain_response["intent_category"]
-        confidence_score = intent_chain_response["confidence_score"]
+            self.logger.error(f"Error in intent classification chain: {e}, handling the query as other")
+            return [{"intent_category": "other", "confidence_score": 0.0, "span": absolute_query}]
 
-        return intent_category, confidence_score
+        sub_intents = intent_chain_response.get("intents")
+        if isinstance(sub_intents, list) and len(sub_intents) > 1:
+            intents = []
+            for sub_intent in sub_intents:
+                if not isinstance(sub_intent, dict) or not sub_intent.get("intent_category"):
+                    continue
+                span = sub_intent.get("span") or absolute_query
+                existing = next((intent for intent in intents if intent["intent_category"] == sub_intent["intent_category"]), None)
+                if existing is not None:
+                    existing["span"] = f"{existing['span']} and {span}"
+                    continue
+                intents.append({
+                    "intent_category": sub_intent["intent_category"],
+                    "confidence_score": sub_intent.get("confidence_score", intent_chain_response["confidence_score"]),
+                    "span": span,
+                })
+
+        return intents
     
 
-    def get_extracted_entities_response(self, absolute_query, keys):
+    def _get_keyword_intents(self, absolute_query):
+        """Classify the query with the local keyword classifier when the classifier chain does not fit the deadline."""
+
+        self._fallback("keyword_intent")
+        return split_intents_keywords(absolute_query)
+
+
+    def get_extracted_entities_response(self, absolute_query, keys, intent_category=None):
         """
         Extract relevant entities from the user query based on the intent type.
         
         Args:
             absolute_query (str): The processed user query
-            keys (list): List of entity keys to extract
+            keys (list or str): Entity keys to extract, or the intent's precomputed `keys_prompt`
+            intent_category (str): Intent the call is made for, used for token accounting
             
         Returns:
             dict: Extracted entities and their values
         """
 
         extract_keys_input = f"Key Entities: {keys}\nUser: {absolute_query}"
-        entities_chain_response = self.extract_key_entities_chain.run({"input": extract_keys_input})
-
-        match = re.search(r"\{.*\}", entities_chain_response, re.DOTALL)
-        if match:
-            entities_chain_response = match.group(0)
+        entities_chain_response = self._run_chain("extract_key_entities_chain", {"input": extract_keys_input}, intent_category)
 
         try:
-            entities_chain_response = json.loads(entities_chain_response)
+            entities_chain_response = parse_json_response(entities_chain_response)
         except Exception as e:
             self.logger.error(f"Error in extracting entities chain: {e}")
             return "An error occurred while processing your query. Please try again."
@@ -144,27 +565,24 @@ class ChatAgent:
         return entities_chain_response
     
 
-    def get_follow_up_questions(self, query, intent_entities):
+    def get_follow_up_questions(self, query, intent_entities, intent_category=None):
         """
         Generate relevant follow-up questions based on the current query and extracted entities.
         
         Args:
             query (str): The user's query
-            intent_entities (dict): The extracted entities for the current intent
+            intent_entities (dict): The entities of the current intent that are missing or could not be resolved locally
+            intent_category (str): Intent the call is made for, used for token accounting
             
         Returns:
             list: List of follow-up questions
         """
 
         input = f"User: {query}\n\nInfo:\n{json.dumps(intent_entities, indent=4)}"
-        follow_up_questions_chain_response = self.follow_up_questions_chain.run({"input": input})
-
-        match = re.search(r"\{.*\}", follow_up_questions_chain_response, re.DOTALL)
-        if match:
-            follow_up_questions_chain_response = match.group(0)
+        follow_up_questions_chain_response = self._run_chain("follow_up_questions_chain", {"input": input}, intent_category)
 
         try:
-            follow_up_questions_chain_response = json.loads(follow_up_questions_chain_response)
+            follow_up_questions_chain_response = parse_json_response(follow_up_questions_chain_response)
             follow_up_questions = follow_up_questions_chain_response["response"]
         except Exception as e:
             self.logger.error(f"Error in follow up questions chain: {e}")
@@ -173,39 +591,157 @@ class ChatAgent:
         return follow_up_questions
     
 
-    def get_web_search_response(self, absolute_query):
+    def get_web_search_query(self, absolute_query):
         """
-        Perform a web search for general queries that don't match specific intents.
+        Build the web search string for a general query.
+
+        The local query builder is tried first and the other chain is only called when
+        the local rewrite has low confidence.
         
         Args:
             absolute_query (str): The processed user query
             
         Returns:
-            list: List of search results
+            str: The web search string, or None if the other chain failed
         """
 
-        web_search_chain_response = self.other_chain.run({"query": absolute_query})
+        web_search_query, confidence = self.query_builder.build(absolute_query)
+        if confidence >= self.search_query_confidence:
+            self.logger.info(f"Local web search query (confidence {confidence}): {web_search_query}")
+            return web_search_query
 
-        match = re.search(r"\{.*\}", web_search_chain_response, re.DOTALL)
-        if match:
-            web_search_chain_response = match.group(0)
+        if not self._stage_fits("other_chain"):
+            self._fallback("local_search_query")
+            return web_search_query
 
+        self.logger.info(f"Local web search query has low confidence ({confidence}), using other chain")
         try:
-            web_search_chain_response = json.loads(web_search_chain_response)
+            return self.get_other_chain_search_query(absolute_query)
+        except FutureTimeoutError:
+            self._fallback("local_search_query")
+            return web_search_query
+
+
+    def get_other_chain_search_query(self, absolute_query):
+        """
+        Build the web search string for a general query with the other chain.
+        
+        Args:
+            absolute_query (str): The processed user query
+            
+        Returns:
+            str: The web search string, or None if the chain response could not be parsed
+        """
+
+        web_search_chain_response = self._run_chain("other_chain", {"query": absolute_query})
+
+        try:
+            web_search_chain_response = parse_json_response(web_search_chain_response)
             web_search_query = web_search_chain_response["response"]
         except Exception as e:
             self.logger.error(f"Error in web search chain: {e}")
-            return "An error occurred while processing your query. Please try again."
+            return None
+
+        return web_search_query
+
+
+    def get_web_search_response(self, absolute_query, web_search_query=None):
+        """
+        Perform a web search for general queries that don't match specific intents.
+
+        Under a turn deadline the search is skipped when it does not fit in the remaining time,
+        and a search that runs out of time returns no results.
         
-        wrapper = DuckDuckGoSearchAPIWrapper(max_results=5)
-        search = DuckDuckGoSearchResults(api_wrapper=wrapper, output_format="list")
+        Args:
+            absolute_query (str): The processed user query
+            web_search_query (str): The web search string, built from the query if not given
+            
+        Returns:
+            list: List of search results
+        """
 
-        web_search_results = search.invoke(web_search_query)
+        if web_search_query is None:
+            web_search_query = self.get_web_search_query(absolute_query)
+        if web_search_query is None:
+            return "An error occurred while processing your query. Please try again."
+
+        if not self._stage_fits("web_search"):
+            self._fallback("skip_web_search")
+            return []
+
+        remaining = self.deadline.remaining()
+        timeout = None if remaining is None else min(remaining, self.web_search.timeout)
+        start = time.perf_counter()
+        try:
+            web_search_results = self.web_search.search(web_search_query, timeout=timeout)
+        except WebSearchTimeout as e:
+            self.logger.error(f"Error in web search: {e}")
+            if remaining is None:
+                return "The web search took too long. Please try again."
+            self._fallback("web_search_timeout")
+            return []
+        latency = time.perf_counter() - start
+        stage_latency.observe("web_search", latency)
+        if self.turn_usage is not None:
+            self.turn_usage.add_latency("web_search", latency)
 
         return web_search_results
 
 
-    def get_response(self, query):
+    def get_greetings_response(self, query):
+        """
+        Returns the canned reply for a greeting.
+        
+        Args:
+            query (str): The processed user query
+            
+        Returns:
+            str: The greeting reply
+        """
+
+        category = self.small_talk.match(query, record_stats=False) or "greetings"
+        return self.small_talk.respond(category)
+
+
+    def handle_other_intent(self, absolute_query, ai_response):
+        """
+        Answer a general query with web search results.
+        
+        Args:
+            absolute_query (str): The processed user query
+            ai_response (dict): Response holding the intent classification
+            
+        Returns:
+            dict: The response with the web search results added
+        """
+
+        web_search_query = self.get_web_search_query(absolute_query)
+        web_search_response = self.get_web_search_response(absolute_query, web_search_query)
+        self.logger.info(f"Web search completed: {web_search_response}")
+        ai_response["web_search_response"] = web_search_response
+        if web_search_response == [] and web_search_query:
+            # The search was skipped for the deadline, the search string still lets the client search itself
+            ai_response["web_search_query"] = web_search_query
+        return ai_response
+
+
+    def handle_greetings_intent(self, absolute_query, ai_response):
+        """
+        Answer a greeting with a canned reply.
+        
+        Args:
+            absolute_query (str): The processed user query
+            ai_response (dict): Response holding the intent classification
+            
+        Returns:
+            dict: The response with the greeting reply added
+        """
+
+        ai_response["response"] = self.get_greetings_response(absolute_query)
+        return ai_response
+
+
+    def get_response(self, query, timeout=None):
         """
         Main method to process user queries and generate appropriate responses.
         
@@ -215,74 +751,703 @@ class ChatAgent:
         3. Extracts relevant entities
         4. Generates follow-up questions
         5. Handles special cases (greetings, web search)
+
+        Under a deadline, every stage gets the remaining time. A stage that does not fit falls back
+        to a cheaper alternative and the response is flagged with "degraded" and the list of "fallbacks".
         
         Args:
             query (str): The user's input query
+            timeout (float): Deadline of this turn in seconds, the agent's turn_timeout if not given
             
         Returns:
             dict: Response containing intent information, entities, and follow-up questions
+
+        Raises:
+            InputTooLong: If the query is over the input limit and the input guard rejects such queries
         """
 
-        absolute_query = self.get_contextual_query_response(query)
-        self.logger.info(f"Final query with no contextual references: {absolute_query}")
-        
-        intent_category, confidence_score = self.get_intent_classification_response(absolute_query)
-        self.logger.info(f"Intent category: {intent_category}, Confidence score: {confidence_score}")
+        turn_start = time.perf_counter()
+        original_query = query
+        query = self.input_guard.check_query(query)
+        self.session_store.append_turn(self.session_id, "user", query)
+        session_usage = self.session_store.get_state(self.session_id).get("token_usage") or {}
+        self.budget_exceeded = self.ledger.check_budget(session_usage.get("total_tokens", 0))
+        if self.budget_exceeded:
+            self.logger.warning(f"Token budget exhausted ({self.budget_exceeded}), using {self.ledger.degraded_model} and templated follow-up questions")
+
+        self.deadline = Deadline(timeout if timeout is not None else self.turn_timeout)
+        self.fallbacks = []
+        if self.budget_exceeded:
+            self._fallback("token_budget")
+
+        self.turn_usage = TurnUsage(self.session_id, turn_id=uuid.uuid4().hex)
+        ai_response = None
+        try:
+            ai_response = self._process_query(query)
+            if query is not original_query:
+                ai_response["input_truncated"] = True
+            if self.fallbacks:
+                ai_response["degraded"] = True
+                ai_response["fallbacks"] = list(dict.fromkeys(self.fallbacks))
+                fallback_stats["degraded_responses"] += 1
+        finally:
+            intent_category = ai_response.get("intent_category") if isinstance(ai_response, dict) else None
+            self.ledger.record(self.turn_usage, default_intent=intent_category)
+            # Concurrent turns of the session, and its summary updates, add to the same counters
+            self.session_store.increment_state(self.session_id, "token_usage", self.turn_usage.totals())
+            self.last_turn_usage, self.turn_usage = self.turn_usage, None
+
+        self.session_store.append_turn(self.session_id, "assistant", ai_response)
+        if self.conversation_summary and not self.budget_exceeded and intent_category not in (None, "greetings"):
+            summary_updater.schedule(self.session_id, (query, describe_response(ai_response)), self._update_summary)
+        get_readiness().observe_turn(time.perf_counter() - turn_start)
+        return ai_response
+
+
+    def _update_summary(self, session_id, exchanges):
+        """
+        Fold exchanges into the session's conversation summary, runs on the summary updater's threads.
+
+        Args:
+            session_id (str): The session id
+            exchanges (list): (user message, assistant message) tuples, oldest first
+        """
+        summary = self.session_store.get_state(session_id).get("summary", "")
+        messages = "\n".join(f"User: {query}\nAssistant: {reply}" for query, reply in exchanges)
+        chain = get_chain("summary_chain")
+        turn_usage = TurnUsage(session_id, turn_id=f"summary-{uuid.uuid4().hex}")
+        callback = turn_usage.callback("summary_chain", getattr(chain.llm, "model_name", None))
+        raw_output = run_chain(
+            "summary_chain", {"input": f"Current summary:\n{summary or 'None'}\n\nNew messages:\n{messages}"}, callbacks=[callback]
+        )
+        self.ledger.record(turn_usage)
+        # Summary calls count towards the session's token budget like the calls of its turns
+        self.session_store.increment_state(session_id, "token_usage", turn_usage.totals())
+        summary = truncate_to_tokens(parse_json_response(raw_output)["response"], SUMMARY_MAX_TOKENS, keep_end=True)
+        self.session_store.set_state(session_id, summary=summary)
+        self.logger.info(f"Conversation summary updated for session {session_id}: {summary}")
+
+
+    def _process_query(self, query):
+        """
+        Run the pipeline stages for one query, see `get_response`.
+        """
+
+        # While a request waits for follow-up answers, short replies such as "evening" are answers, not small talk
+        if self.fast_path and not self.has_pending_intent():
+            category = self.small_talk.match(query)
+            if category is not None:
+                self.logger.info(f"Small talk fast path ({category}), no chain called for: {query}")
+                self.last_query = query
+                self._emit_stage("intent", {"intent_category": "greetings", "confidence_score": 1.0})
+                return {
+                    "intent_category": "greetings",
+                    "confidence_score": 1.0,
+                    "response": self.small_talk.respond(category),
+                }
+
+        speculation = self._start_speculation(query) if self.speculative else None
+        try:
+            absolute_query = self.get_contextual_query_response(query)
+            self.logger.info(f"Final query with no contextual references: {absolute_query}")
+            self.session_store.set_state(self.session_id, context=absolute_query)
+            self._emit_stage("context", {"query": absolute_query})
+
+            intents = None
+            if speculation is not None:
+                intents = self._resolve_speculation(speculation, "classification", absolute_query.strip() == query.strip())
+            if intents is None:
+                intents = self.get_intents_classification_response(absolute_query)
+            intent_category, confidence_score = intents[0]["intent_category"], intents[0]["confidence_score"]
+            self.logger.info(f"Intent category: {intent_category}, Confidence score: {confidence_score}")
+            self._emit_stage("intent", {"intent_category": intent_category, "confidence_score": confidence_score})
+
+            prefetched_entities = None
+            if speculation is not None and "extraction" in speculation:
+                prefetched_entities = self._resolve_speculation(
+                    speculation, "extraction",
+                    speculation["results"].get("classification") == "hit" and len(intents) == 1 and intent_category == speculation["predicted"],
+                )
+        finally:
+            if speculation is not None:
+                self._finish_speculation(speculation)
+
+        partial_intents = self.session_store.get_state(self.session_id).get("partial_intents") or {}
+
+        if len(intents) == 1:
+            ai_response, filled = self._process_intent(
+                absolute_query, intent_category, confidence_score, partial_intents, prefetched_entities=prefetched_entities
+            )
+            filled_intents = {intent_category: filled} if filled is not None else {}
+        else:
+            # Sub-intents are independent, so their extraction and follow-up calls run side by side
+            # and the turn takes about as long as the slowest sub-intent
+            self.logger.info(f"Compound query with intents: {[intent['intent_category'] for intent in intents]}")
+            with ThreadPoolExecutor(max_workers=len(intents)) as executor:
+                futures = [
+                    executor.submit(
+                        self._process_intent, intent["span"], intent["intent_category"], intent["confidence_score"], partial_intents
+                    )
+                    for intent in intents
+                ]
+                results = [future.result() for future in futures]
+
+            sub_responses = []
+            filled_intents = {}
+            for intent, (sub_response, filled) in zip(intents, results):
+                sub_response["span"] = intent["span"]
+                sub_responses.append(sub_response)
+                if filled is not None:
+                    filled_intents[intent["intent_category"]] = filled
+
+            ai_response = {
+                "intent_category": intent_category,
+                "confidence_score": confidence_score,
+                "intents": sub_responses,
+            }
+            if "key_entities" in sub_responses[0]:
+                ai_response["key_entities"] = sub_responses[0]["key_entities"]
+            follow_up_questions = [
+                question
+                for sub_response in sub_responses
+                if isinstance(sub_response.get("follow_up_questions"), list)
+                for question in sub_response["follow_up_questions"]
+            ]
+            if follow_up_questions:
+                ai_response["follow_up_questions"] = follow_up_questions
+
+        # Only requests that still miss a required slot wait for answers. A completed request, or a turn
+        # about something else (greetings, other, another category), ends the pending one
+        self.session_store.set_state(self.session_id, partial_intents=incomplete_intents(filled_intents))
+
+        self.logger.info(f"FinalAI response: {ai_response}")
+
+        return ai_response
+
+
+    def _start_speculation(self, query):
+        """
+        Start classifying the raw query, and extracting entities for the intent the local keyword
+        classifier predicts, before the contextual rewrite and the classifier have finished.
+        """
+
+        predicted, _ = classify_intent_keywords(query)
+        speculation = {"predicted": predicted, "results": {}, "saved": 0.0, "agents": {}}
+
+        def speculate(stage, method, *args):
+            # Fallbacks and token usage stay on the copy until the stage is committed
+            agent = self._agent_copy()
+            agent.deadline = self.deadline
+            agent.budget_exceeded = self.budget_exceeded
+            agent.turn_usage = TurnUsage(self.session_id, turn_id=self.turn_usage.turn_id if self.turn_usage else None)
+            speculation["agents"][stage] = agent
+            speculation[stage] = Speculation(_speculation_executor, getattr(agent, method), *args)
+
+        speculate("classification", "get_intents_classification_response", query)
+        intent_class = INTENT_REGISTRY.get(predicted)
+        if intent_class is not None and len(split_intents_keywords(query)) == 1:
+            speculate("extraction", "get_extracted_entities_response", query, intent_class.keys_prompt, predicted)
+        return speculation
+
+
+    def _resolve_speculation(self, speculation, stage, confirmed):
+        """
+        Commit a speculative stage if its inputs were confirmed, discard it otherwise.
+
+        A committed stage adds its fallbacks and token usage to the turn. The usage of a discarded
+        stage that already ran is charged to the ledger as wasted once the call finishes, which can
+        be after the turn has been answered.
+
+        Returns:
+            The speculative result, None if it was discarded or failed
+        """
+
+        agent = speculation["agents"][stage]
+        if confirmed:
+            try:
+                result, saved = speculation[stage].commit(self.deadline.remaining())
+            except FutureTimeoutError:
+                confirmed = False
+            else:
+                speculation["results"][stage] = "hit"
+                speculation["saved"] += saved
+                self.fallbacks.extend(agent.fallbacks)
+                if self.turn_usage is not None:
+                    self.turn_usage.merge(agent.turn_usage)
+                return result
+        speculation["results"][stage] = "miss"
+        if speculation[stage].discard():
+            speculation_stats["cancelled"] += 1
+        else:
+            speculation_stats["wasted"] += 1
+            default_intent = speculation["predicted"] if stage == "extraction" else None
+            speculation[stage].future.add_done_callback(lambda _: self._charge_wasted(agent.turn_usage, default_intent))
+        return None
+
+
+    def _charge_wasted(self, turn_usage, default_intent):
+        """Record the token usage of a discarded speculative call, flagged as wasted."""
+        for entry in turn_usage.entries:
+            entry["wasted"] = True
+        self.ledger.record(turn_usage, default_intent=default_intent)
+        totals = turn_usage.totals()
+        speculation_stats["wasted_calls"] += len(turn_usage.entries)
+        speculation_stats["wasted_tokens"] += totals["total_tokens"]
+
+
+    def _finish_speculation(self, speculation):
+        for stage in ("classification", "extraction"):
+            if stage in speculation and stage not in speculation["results"]:
+                # The turn failed before the stage was resolved
+                self._resolve_speculation(speculation, stage, False)
+        speculation_stats["turns"] += 1
+        for stage, result in speculation["results"].items():
+            speculation_stats[f"{stage}_{result}"] += 1
+        speculation_stats["saved_ms"] += int(speculation["saved"] * 1000)
+        self.last_speculation = {**speculation["results"], "predicted": speculation["predicted"], "saved_ms": round(speculation["saved"] * 1000, 1)}
+        self.logger.info(f"Speculation: {self.last_speculation}")
+
+
+    def _process_intent(self, query, intent_category, confidence_score, partial_intents, prefetched_entities=None):
+        """
+        Handle a single intent: extract entities and generate follow-up questions for slot filling
+        intents, or run the intent handler for the others.
+
+        Args:
+            query (str): The processed user query, or the span of it for one request of a compound query
+            intent_category (str): The intent category
+            confidence_score (float): The classifier's confidence
+            partial_intents (dict): Slot values collected in earlier turns, by intent category
+            prefetched_entities (dict): Entities already extracted from the query by a committed speculative call
+
+        Returns:
+            tuple: (response, filled) where filled holds the slot values to keep for the next turn,
+                None for intents without slots
+        """
 
         ai_response = {
             "intent_category": intent_category,
             "confidence_score": confidence_score,
         }
 
-        if intent_category == "other":
-            web_search_response = self.get_web_search_response(absolute_query)
-            self.logger.info(f"Web search completed: {web_search_response}")
-            ai_response["web_search_response"] = web_search_response
-            return ai_response
+        intent_class = INTENT_REGISTRY.get(intent_category)
+        if intent_class is None:
+            handler = self.intent_handlers.get(intent_category)
+            if handler is None:
+                self.logger.warning(f"Unknown intent category {intent_category}, handling it as other")
+                handler = self.handle_other_intent
+            return handler(query, ai_response), None
+
+        # Continue filling the slots collected in earlier turns of the same intent
+        intent = intent_class()
+        if intent_category in partial_intents:
+            intent.update_info(partial_intents[intent_category])
+
+        entities_chain_response = {}
+        if prefetched_entities is not None:
+            entities_chain_response = prefetched_entities
+        elif not self._stage_fits("extract_key_entities_chain"):
+            self._fallback("skip_entity_extraction")
+        else:
+            try:
+                entities_chain_response = self.get_extracted_entities_response(query, intent.keys_prompt, intent_category)
+            except FutureTimeoutError:
+                self._fallback("skip_entity_extraction")
+        if not isinstance(entities_chain_response, dict):
+            self.logger.warning(f"Ignoring malformed entities for {intent_category}: {entities_chain_response!r}")
+            entities_chain_response = {}
+        intent.update_info(entities_chain_response, skip_empty=True)
+        self.logger.info(f"Entities updated with extracted values for {intent_category}: {entities_chain_response}")
+
+        normalized, unresolved = self.entity_normalizer.normalize(intent.get_updated_info(), intent.kinds, self.clock())
+        ai_response["key_entities"] = intent.get_normalized_info()
+        ai_response["normalized_entities"] = normalized
+        self._emit_stage("key_entities", {
+            "intent_category": intent_category, "key_entities": ai_response["key_entities"], "normalized_entities": normalized,
+        })
+
+        # Values resolved locally are clear, only missing and unresolved values are left for clarification
+        intent_entities = {key: value for key, value in intent.get_info().items() if key not in normalized}
+
+        if not intent_entities:
+            follow_up_questions = []
+        elif self.budget_exceeded:
+            follow_up_questions = intent.get_missing_questions(unresolved)
+        elif self.deadline.expired():
+            self._fallback("skip_follow_up_questions")
+            follow_up_questions = []
+        elif not self._stage_fits("follow_up_questions_chain"):
+            self._fallback("templated_follow_ups")
+            follow_up_questions = intent.get_missing_questions(unresolved)
+        else:
+            try:
+                follow_up_questions = self.get_follow_up_questions(query, intent_entities, intent_category)
+            except FutureTimeoutError:
+                self._fallback("templated_follow_ups")
+                follow_up_questions = intent.get_missing_questions(unresolved)
+        self.logger.info(f"Follow up questions for {intent_category}: {follow_up_questions}")
+        ai_response["follow_up_questions"] = follow_up_questions
+
+        return ai_response, intent.get_updated_info()
+
+
+    def _emit_stage(self, stage, data):
+        if self.on_stage is not None:
+            self.on_stage(stage, data)
+
+
+    async def aget_response(self, query, executor=None):
+        """
+        Async entry point for `get_response`.
+
+        The chains use blocking HTTP clients, so the turn runs on a worker thread and the event loop stays free.
         
-        elif intent_category == "greetings":
-            if "how are you" in absolute_query.lower() or "how you" in absolute_query.lower():
-                ai_response["response"] = "I'm good, thank you! How can I help you today?"
-            else:
-                ai_response["response"] = "Hello! What can I help you with today?"
-                
-            return ai_response
+        Args:
+            query (str): The user's input query
+            executor (Executor): Executor running the turn, the loop's default executor if not given
+            
+        Returns:
+            dict: Response containing intent information, entities, and follow-up questions
+        """
+
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(executor, self.get_response, query)
+
+
+    def _run_stateless_batch(self, chain, inputs, max_concurrency, callbacks=None):
+        """
+        Run a chain over a batch of inputs in one LLM-side batch call, without reading or
+        writing the conversation memory.
         
-        elif intent_category == "dining":
-            intent = DiningIntent()
-            keys = intent.get_keys()
+        Args:
+            chain (LLMChain): The chain whose prompt and LLM are used
+            inputs (list): List of prompt input dicts
+            max_concurrency (int): Maximum number of concurrent LLM requests in the batch
+            callbacks (list): One usage callback per input, for token accounting
+            
+        Returns:
+            list: Parsed JSON dict per input, or the exception raised for that input
+        """
+
+        if not inputs:
+            return []
+
+        name = callbacks[0].chain if callbacks else None
+        inputs = [
+            self.input_guard.fit_chain_inputs(name, chain.prompt, row, getattr(chain.llm, "model_name", None), getattr(chain.llm, "max_tokens", None))
+            for row in inputs
+        ]
+        runnable = chain.prompt | chain.llm
+        if callbacks is None:
+            config = {"max_concurrency": max_concurrency}
+        else:
+            config = [{"max_concurrency": max_concurrency, "callbacks": [callback]} for callback in callbacks]
+        start = time.perf_counter()
+        outputs = runnable.batch(inputs, config=config, return_exceptions=True)
+        latency = time.perf_counter() - start
+
+        parsed_outputs = []
+        for index, output in enumerate(outputs):
+            if isinstance(output, Exception):
+                parsed_outputs.append(output)
+                continue
+            if self.interaction_logger is not None:
+                callback = callbacks[index] if callbacks else None
+                self._log_interaction(
+                    callback.chain if callback else None, chain, inputs[index], output.content, latency,
+                    callback, callback.intent if callback else None, batched=True,
+                )
+            try:
+                parsed_outputs.append(parse_json_response(output.content))
+            except Exception as e:
+                parsed_outputs.append(e)
+        return parsed_outputs
+
+
+    def _get_batch_responses(self, queries, max_concurrency):
+        """
+        Process a chunk of independent queries stage by stage, batching the LLM calls of each stage.
+
+        Every query is handled as a stateless first turn, so the contextual rewrite is skipped
+        and neither `last_query` nor the conversation memory is touched. Stages that do not fit
+        the agent's deadline fall back as in `get_response`, and the affected responses are
+        flagged with "degraded" and their "fallbacks".
         
-        elif intent_category == "travel":
-            intent = TravelIntent()
-            keys = intent.get_keys()
+        Args:
+            queries (list): List of user queries
+            max_concurrency (int): Maximum number of concurrent LLM requests per stage
+            
+        Returns:
+            list: One response dict per query, in the same order
+        """
+
+        responses = [None] * len(queries)
+        usages = [TurnUsage(self.session_id, turn_id=uuid.uuid4().hex) for _ in queries]
+
+        original_queries = queries
+        queries = list(queries)
+        for index, query in enumerate(queries):
+            try:
+                queries[index] = self.input_guard.check_query(query)
+            except InputTooLong as e:
+                responses[index] = {"error": str(e)}
+
+        def usage_callbacks(name, rows):
+            model_name = getattr(get_chain(name).llm, "model_name", None)
+            return [usages[index].callback(name, model_name, intent_category) for index, intent_category in rows]
+
+        fallbacks = [[] for _ in queries]
+
+        def fall_back(name, rows):
+            # Recorded per query, so only the responses that took the cheaper path are flagged
+            self.logger.warning(f"Falling back for {len(rows)} batched queries: {name}")
+            for index in rows:
+                fallbacks[index].append(name)
+                fallback_stats[name] += 1
+
+        classify_rows = []
+        for index, query in enumerate(queries):
+            if responses[index] is not None:
+                continue
+            category = self.small_talk.match(query) if self.fast_path else None
+            if category is not None:
+                responses[index] = {"intent_category": "greetings", "confidence_score": 1.0, "response": self.small_talk.respond(category)}
+            else:
+                classify_rows.append(index)
+
+        if classify_rows and not self._stage_fits("intent_classifier_chain"):
+            fall_back("keyword_intent", classify_rows)
+            classifications = [
+                dict(zip(("intent_category", "confidence_score"), classify_intent_keywords(queries[index]))) for index in classify_rows
+            ]
+        else:
+            classifications = self._run_stateless_batch(
+                self.intent_classifier_chain, [{"query": queries[index]} for index in classify_rows], max_concurrency,
+                usage_callbacks("intent_classifier_chain", [(index, None) for index in classify_rows]),
+            )
+
+        extraction_rows = []
+        for index, classification in zip(classify_rows, classifications):
+            query = queries[index]
+            if isinstance(classification, Exception):
+                responses[index] = {"error": f"Error in intent classification chain: {classification}"}
+                continue
+
+            intent_category = classification.get("intent_category")
+            responses[index] = {
+                "intent_category": intent_category,
+                "confidence_score": classification.get("confidence_score"),
+            }
+
+            intent_class = INTENT_REGISTRY.get(intent_category)
+            if intent_class is not None:
+                extraction_rows.append((index, intent_class()))
+            else:
+                handler = self.intent_handlers.get(intent_category, self.handle_other_intent)
+                # The chunk has its own agent, so the handler's chain calls can be recorded on the query's usage
+                self.turn_usage, self.fallbacks = usages[index], fallbacks[index]
+                try:
+                    handler(query, responses[index])
+                finally:
+                    self.turn_usage, self.fallbacks = None, []
+
+        if extraction_rows and not self._stage_fits("extract_key_entities_chain"):
+            fall_back("skip_entity_extraction", [index for index, _ in extraction_rows])
+            extractions = [{} for _ in extraction_rows]
+        else:
+            extractions = self._run_stateless_batch(
+                self.extract_key_entities_chain,
+                [{"input": f"Key Entities: {intent.keys_prompt}\nUser: {queries[index]}"} for index, intent in extraction_rows],
+                max_concurrency,
+                usage_callbacks("extract_key_entities_chain", [(index, intent.intent_name) for index, intent in extraction_rows]),
+            )
+
+        follow_up_rows = []
+        now = self.clock()
+        for (index, intent), entities in zip(extraction_rows, extractions):
+            if isinstance(entities, Exception):
+                responses[index]["error"] = f"Error in extracting entities chain: {entities}"
+                continue
+            if not isinstance(entities, dict):
+                # A malformed extraction fails its own query only, not the rest of the chunk
+                responses[index]["error"] = f"Error in extracting entities chain: expected a JSON object, got {entities!r}"
+                continue
+            intent.update_info(entities)
+            normalized, unresolved = self.entity_normalizer.normalize(intent.get_updated_info(), intent.kinds, now)
+            responses[index]["key_entities"] = intent.get_normalized_info()
+            responses[index]["normalized_entities"] = normalized
+            info = {key: value for key, value in intent.get_info().items() if key not in normalized}
+            if info:
+                follow_up_rows.append((index, info, intent, unresolved))
+            else:
+                responses[index]["follow_up_questions"] = []
+
+        if follow_up_rows and (self.deadline.expired() or not self._stage_fits("follow_up_questions_chain")):
+            expired = self.deadline.expired()
+            fall_back("skip_follow_up_questions" if expired else "templated_follow_ups", [index for index, *_ in follow_up_rows])
+            for index, _, intent, unresolved in follow_up_rows:
+                responses[index]["follow_up_questions"] = [] if expired else intent.get_missing_questions(unresolved)
+            follow_up_rows = []
+
+        follow_ups = self._run_stateless_batch(
+            self.follow_up_questions_chain,
+            [{"input": f"User: {queries[index]}\n\nInfo:\n{json.dumps(info, indent=4)}"} for index, info, _, _ in follow_up_rows],
+            max_concurrency,
+            usage_callbacks("follow_up_questions_chain", [(index, intent.intent_name) for index, _, intent, _ in follow_up_rows]),
+        )
+
+        for (index, _, _, _), follow_up in zip(follow_up_rows, follow_ups):
+            if isinstance(follow_up, Exception) or "response" not in follow_up:
+                responses[index]["error"] = f"Error in follow up questions chain: {follow_up}"
+                continue
+            responses[index]["follow_up_questions"] = follow_up["response"]
+
+        for index, query in enumerate(queries):
+            if query is not original_queries[index] and "error" not in responses[index]:
+                responses[index]["input_truncated"] = True
+            if fallbacks[index] and "error" not in responses[index]:
+                responses[index]["degraded"] = True
+                responses[index]["fallbacks"] = list(dict.fromkeys(fallbacks[index]))
+                fallback_stats["degraded_responses"] += 1
+
+        for usage, response in zip(usages, responses):
+            self.ledger.record(usage, default_intent=response.get("intent_category"))
+
+        return responses
+
+
+    def iter_responses(self, queries, concurrency=4, batch_size=8, preserve_order=True, timeout=None):
+        """
+        Process many independent queries, yielding results as soon as their chunk completes.
+
+        Queries are split into chunks of `batch_size`. Up to `concurrency` chunks are processed
+        at the same time and each chunk batches its LLM calls stage by stage, on its own copy of
+        the agent. Queries are read lazily, so `queries` can be a generator over a large file.
+        All chunks share one deadline, stages that do not fit it fall back to cheaper alternatives.
         
-        elif intent_category == "gifting":
-            intent = GiftingIntent()
-            keys = intent.get_keys()
+        Args:
+            queries (iterable): User queries
+            concurrency (int): Maximum number of chunks processed at the same time
+            batch_size (int): Number of queries per chunk
+            preserve_order (bool): Yield results in input order instead of completion order
+            timeout (float): Deadline of the whole batch in seconds, no limit if not given
+            
+        Yields:
+            tuple: (index, response) where index is the position of the query in `queries`
+        """
+
+        query_iterator = iter(queries)
+        next_start = 0
+        pending = deque()
+        deadline = Deadline(timeout)
+
+        def submit_next_chunk(executor):
+            nonlocal next_start
+            chunk = list(itertools.islice(query_iterator, batch_size))
+            if not chunk:
+                return False
+            agent = self._agent_copy()
+            agent.deadline = deadline
+            pending.append((next_start, executor.submit(agent._get_batch_responses, chunk, batch_size)))
+            next_start += len(chunk)
+            return True
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # Keep a bounded window of chunks in flight so huge inputs are never fully materialized
+            while len(pending) < concurrency * 2 and submit_next_chunk(executor):
+                pass
+
+            while pending:
+                if preserve_order:
+                    start, future = pending.popleft()
+                    completed = [(start, future)]
+                else:
+                    wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                    completed = [(start, future) for start, future in pending if future.done()]
+                    for item in completed:
+                        pending.remove(item)
+
+                for start, future in completed:
+                    for offset, response in enumerate(future.result()):
+                        yield start + offset, response
+                    submit_next_chunk(executor)
+
+
+    def get_responses(self, queries, concurrency=4, batch_size=8, preserve_order=True, timeout=None):
+        """
+        Process many independent queries with bounded concurrency and batched LLM calls.
+
+        See `iter_responses` for how the work is split.
         
-        elif intent_category == "cab_booking":
-            intent = CabIntent()
-            keys = intent.get_keys()
+        Args:
+            queries (iterable): User queries
+            concurrency (int): Maximum number of chunks processed at the same time
+            batch_size (int): Number of queries per chunk
+            preserve_order (bool): Return results in input order instead of completion order
+            timeout (float): Deadline of the whole batch in seconds, no limit if not given
+            
+        Returns:
+            list: Response dicts
+        """
 
-        entities_chain_response = self.get_extracted_entities_response(absolute_query, keys)
-        intent.update_info(entities_chain_response)
-        self.logger.info(f"Entities updated with extracted values: {entities_chain_response}")
+        return [
+            response
+            for _, response in self.iter_responses(queries, concurrency, batch_size, preserve_order, timeout)
+        ]
 
-        intent_attributes = intent.get_info()
-        for key, value in intent_attributes.items():
-            if value is None or value == "None" or value == "" or value == []:
-                intent_attributes[key] = "Not Specified"
-        ai_response["key_entities"] = intent_attributes
 
-        intent_entities = intent.get_info()
+# Query answered by the optional synthetic warm-up turn, it goes through classification, extraction and follow-ups
+WARMUP_QUERY = "Book a table for 2 people tomorrow at 8 pm in Bandra"
 
-        follow_up_questions = self.get_follow_up_questions(absolute_query, intent_entities)
-        self.logger.info(f"Follow up questions: {follow_up_questions}")
-        ai_response["follow_up_questions"] = follow_up_questions
 
-        self.logger.info(f"FinalAI response: {ai_response}")
+def warm_up(synthetic_turn=False, connections=2, readiness=None):
+    """
+    Prepare the process for its first turn and mark it ready.
 
-        return ai_response
+    Builds every chain in CHAIN_FACTORIES, loads the local pattern tables, search backend and
+    parser caches, opens pooled connections to the LLM API and optionally answers WARMUP_QUERY
+    in a throwaway session through the configured LLM backend.
+
+    Args:
+        synthetic_turn (bool): Run a synthetic turn after the other steps
+        connections (int): Number of pooled connections to open to the LLM API
+        readiness (Readiness): Readiness state to update, the process-wide one if not given
+
+    Returns:
+        bool: True if the process is ready
+    """
+
+    from personal_bot.get_llm import warm_connections
+    from personal_bot.session_store import InMemorySessionStore
+
+    def build_chains():
+        for name in CHAIN_FACTORIES:
+            get_chain(name)
+
+    def load_local_state():
+        get_fast_path().match(WARMUP_QUERY, record_stats=False)
+        get_web_search_service().backend.warm_up()
+        ContextGate(spell_correction=True).check(WARMUP_QUERY, "")
+        QueryBuilder().build(WARMUP_QUERY)
+        split_intents_keywords(WARMUP_QUERY)
+        get_input_guard()
+        normalizer = get_entity_normalizer()
+        for kind, value in (("date", "tomorrow"), ("time", "8 pm"), ("amount", "2000 rupees"), ("count", "2 people")):
+            normalizer.normalize_value(kind, value, datetime.now())
+
+    def run_synthetic_turn():
+        agent = ChatAgent(session_store=InMemorySessionStore(), conversation_summary=False)
+        agent.get_response(WARMUP_QUERY)
+
+    steps = [
+        ("chains", build_chains, True),
+        ("local_state", load_local_state, True),
+        ("connections", lambda: warm_connections(connections), False),
+    ]
+    if synthetic_turn:
+        steps.append(("synthetic_turn", run_synthetic_turn, False))
+    return (readiness or get_readiness()).run(steps)
 
 
 def main():
@@ -290,40 +1455,40 @@ def main():
     Main function to run the Streamlit chat interface.
     Sets up the chat interface and handles the conversation flow.
     """
+    import streamlit as st
 
     st.title("Swiggy Chat Agent")
-    
-    # Initialize chat history for streamlit
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    
-    # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            if isinstance(message["content"], dict):
-                st.json(message["content"])
-            else:
-                st.write(message["content"])
+
+    # The conversation state is kept in the session store under this session id
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+
+    # Only a bounded window of messages is kept in session state and only its tail is rendered
+    from chat_history import ChatHistory, render_message
+    history = ChatHistory(st.session_state, get_session_store(), st.session_state.session_id)
+    history.render(st)
     
     # Chat input
     if prompt := st.chat_input("What would you like to do?"):
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        history.append("user", prompt)
         
         # Display user message
         with st.chat_message("user"):
             st.write(prompt)
         
         # Get bot response
-        chat_agent = ChatAgent()
+        chat_agent = ChatAgent(session_id=st.session_state.session_id)
         response = chat_agent.get_response(prompt)
         
         # Add assistant response to chat history
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        history.append("assistant", response)
         
         # Display assistant response
         with st.chat_message("assistant"):
-            st.json(response)
+            render_message(st, response)
+
+    history.render_debug_sidebar(st)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,136 @@
+"""
+Bounded chat history for the Streamlit interface.
+
+Streamlit reruns the whole script on every interaction, so rendering every message of a long
+conversation (with full web search result lists) makes each rerun slower than the last.
+ChatHistory keeps only a bounded window of messages in `st.session_state` and renders only the
+visible tail. Older messages are not lost: ChatAgent writes every turn to the session store,
+and they are read back from there when the user asks for earlier messages.
+
+Assistant payloads are shown as a one line summary with the JSON collapsed in an expander, and
+the render time of every rerun is recorded for the debug sidebar.
+"""
+
+import time
+from collections import deque
+
+
+class ChatHistory:
+    """
+    Bounded, lazily rendered chat history kept in Streamlit session state.
+    """
+
+    def __init__(self, state, session_store, session_id, window=40, visible=10, page_size=10):
+        """
+        Args:
+            state: `st.session_state`
+            session_store (SessionStore): Store holding all turns of the session
+            session_id (str): The session id
+            window (int): Maximum number of messages kept in session state
+            visible (int): Number of most recent messages rendered by default
+            page_size (int): Number of earlier messages added per "show earlier" click
+        """
+        self.state = state
+        self.session_store = session_store
+        self.session_id = session_id
+        self.window = window
+        self.visible = visible
+        self.page_size = page_size
+
+        if "messages" not in state:
+            state.messages = []
+        state.setdefault("spilled_messages", 0)
+        state.setdefault("extra_messages", 0)
+        state.setdefault("render_times", deque(maxlen=100))
+
+    @property
+    def messages(self):
+        return self.state.messages
+
+    def total_messages(self):
+        return self.state.spilled_messages + len(self.messages)
+
+    def append(self, role, content):
+        """
+        Add a message, dropping the oldest messages from session state beyond the window.
+        """
+        self.messages.append({"role": role, "content": content})
+        overflow = len(self.messages) - self.window
+        if overflow > 0:
+            del self.messages[:overflow]
+            self.state.spilled_messages += overflow
+
+    def get_visible_messages(self):
+        """
+        Returns the messages to render, reading from the session store when the user asked for
+        more earlier messages than session state holds.
+        """
+        count = min(self.visible + self.state.extra_messages, self.total_messages())
+        if count <= len(self.messages):
+            return self.messages[len(self.messages) - count:]
+        turns = self.session_store.get_turns(self.session_id, last_n=count)
+        return [{"role": turn["role"], "content": turn["content"]} for turn in turns]
+
+    def render(self, st):
+        """
+        Render the visible tail of the conversation and record the render time.
+        """
+        start = time.perf_counter()
+
+        hidden = self.total_messages() - min(self.visible + self.state.extra_messages, self.total_messages())
+        if hidden > 0 and st.button(f"Show {min(self.page_size, hidden)} earlier messages ({hidden} hidden)"):
+            self.state.extra_messages += self.page_size
+
+        for message in self.get_visible_messages():
+            with st.chat_message(message["role"]):
+                render_message(st, message["content"])
+
+        self.state.render_times.append(time.perf_counter() - start)
+
+    def render_debug_sidebar(self, st):
+        """
+        Show render times and history sizes in the sidebar when debugging is switched on.
+        """
+        if not st.sidebar.checkbox("Debug", value=False):
+            return
+        render_times = sorted(self.state.render_times)
+        if render_times:
+            st.sidebar.metric("Last render", f"{self.state.render_times[-1] * 1000:.1f} ms")
+            st.sidebar.write(f"Mean render: {sum(render_times) / len(render_times) * 1000:.1f} ms")
+            st.sidebar.write(f"p95 render: {render_times[int(len(render_times) * 0.95)] * 1000:.1f} ms")
+        st.sidebar.write(f"Messages in session state: {len(self.messages)} / {self.window}")
+        st.sidebar.write(f"Messages spilled to the session store: {self.state.spilled_messages}")
+        st.sidebar.write(f"Session id: {self.session_id}")
+
+
+def summarize_response(response):
+    """
+    One line summary of an assistant response dict.
+    """
+    parts = [f"**{response.get('intent_category', 'response')}**"]
+    if isinstance(response.get("confidence_score"), (int, float)):
+        parts.append(f"confidence {response['confidence_score']:.2f}")
+    if isinstance(response.get("intents"), list):
+        parts.append(" + ".join(intent.get("intent_category", "?") for intent in response["intents"]))
+    if isinstance(response.get("web_search_response"), list):
+        parts.append(f"{len(response['web_search_response'])} web results")
+    return " · ".join(parts)
+
+
+def render_message(st, content):
+    """
+    Render one message, assistant dicts as a summary with the full payload collapsed.
+    """
+    if not isinstance(content, dict):
+        st.write(content)
+        return
+
+    st.markdown(summarize_response(content))
+    if isinstance(content.get("response"), str):
+        st.write(content["response"])
+    follow_up_questions = content.get("follow_up_questions")
+    if isinstance(follow_up_questions, list):
+        for question in follow_up_questions:
+            st.write(f"- {question}")
+    with st.expander("Details", expanded=False):
+        st.json(content, expanded=False)
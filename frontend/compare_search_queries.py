@@ -0,0 +1,83 @@
+"""
+Side-by-side comparison of the local search query builder and the other chain.
+
+For every query both search strings are built, both are searched and the overlap of the
+returned result links is reported, so we can check that the local rewrite finds the same
+results as the LLM rewrite before relying on it.
+"""
+
+import json
+import os
+import argparse
+from chat_agent import ChatAgent
+
+
+def link_overlap(results_a, results_b):
+    """Returns the Jaccard overlap of the result links of two searches."""
+    links_a = {result.get("link") for result in results_a if isinstance(result, dict)}
+    links_b = {result.get("link") for result in results_b if isinstance(result, dict)}
+    if not links_a and not links_b:
+        return 1.0
+    return len(links_a & links_b) / len(links_a | links_b)
+
+
+def compare_queries(test_cases_path, output_dir, all_intents=False):
+    chat_agent = ChatAgent()
+
+    with open(test_cases_path, 'r') as f:
+        test_data = json.load(f)
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, 'search_query_comparison.json')
+
+    results = []
+    for test_case in test_data['test_cases']:
+        if not all_intents and test_case['intent'] != 'other':
+            continue
+
+        user_input = test_case['input']
+        local_query, confidence = chat_agent.query_builder.build(user_input)
+        chain_query = chat_agent.get_other_chain_search_query(user_input)
+
+        local_results = chat_agent.web_search.search(local_query) if local_query else []
+        chain_results = chat_agent.web_search.search(chain_query) if chain_query else []
+
+        result = {
+            'id': test_case['id'],
+            'input': user_input,
+            'local_query': local_query,
+            'local_confidence': confidence,
+            'chain_query': chain_query,
+            'result_overlap': round(link_overlap(local_results, chain_results), 2),
+        }
+        results.append(result)
+        print(f"{result['id']:<8} overlap={result['result_overlap']:<5} confidence={confidence:<5} "
+              f"local='{local_query}' chain='{chain_query}'")
+
+    if results:
+        mean_overlap = sum(result['result_overlap'] for result in results) / len(results)
+        print(f"Mean result overlap over {len(results)} queries: {mean_overlap:.2f}")
+
+    with open(output_file, 'w') as f:
+        json.dump({'comparisons': results}, f, indent=4)
+
+    print(f"Comparison results have been saved to {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare local and other chain web search queries side by side')
+    parser.add_argument('--test-cases', '-t',
+                      default='../test_cases/test_cases.json',
+                      help='Path to the test cases JSON file (default: ../test_cases/test_cases.json)')
+    parser.add_argument('--output-dir', '-o',
+                      default='../test_results',
+                      help='Directory to save the comparison (default: ../test_results)')
+    parser.add_argument('--all-intents', action='store_true',
+                      help='Compare every test case instead of only the "other" intent ones')
+
+    args = parser.parse_args()
+
+    compare_queries(args.test_cases, args.output_dir, args.all_intents)
+
+if __name__ == "__main__":
+    main()
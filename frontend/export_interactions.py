@@ -0,0 +1,114 @@
+"""
+Export chain interaction logs as training and evaluation datasets.
+
+Reads the gzip JSONL shards written by the interaction logger (INTERACTION_LOG_DIR) and writes
+one train and one eval JSONL file per chain. Records are deduplicated by their normalized chain
+inputs, and the split is decided by a hash of the normalized inputs, so the same input always
+lands in the same split across exports and never leaks from train into eval.
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from collections import defaultdict, Counter
+sys.path.append("../")
+
+from personal_bot.interaction_log import read_interactions
+
+
+def normalize_inputs(inputs):
+    """
+    Normalize chain inputs for deduplication: lowercase, collapsed whitespace, sorted keys.
+    """
+    normalized = {
+        key: re.sub(r"\s+", " ", value.strip().lower()) if isinstance(value, str) else value
+        for key, value in (inputs or {}).items()
+    }
+    return json.dumps(normalized, sort_keys=True)
+
+
+def assign_split(normalized_input, eval_fraction):
+    bucket = int(hashlib.sha256(normalized_input.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+    return "eval" if bucket < eval_fraction else "train"
+
+
+def export(log_dir, output_dir, eval_fraction, chains=None, include_unparsed=False):
+    """
+    Export deduplicated per-chain train/eval splits.
+
+    Args:
+        log_dir (str): Interaction log directory
+        output_dir (str): Directory the per-chain datasets are written to
+        eval_fraction (float): Fraction of unique inputs that go to the eval split
+        chains (list): Only export these chains, all chains if not given
+        include_unparsed (bool): Also export records whose output could not be parsed
+
+    Returns:
+        dict: Counts per chain
+    """
+    datasets = defaultdict(dict)
+    counts = defaultdict(Counter)
+    for record in read_interactions(log_dir):
+        chain = record.get("chain")
+        if not chain or (chains and chain not in chains):
+            continue
+        counts[chain]["records"] += 1
+        if record.get("parsed") is None and not include_unparsed:
+            counts[chain]["unparsed"] += 1
+            continue
+
+        key = normalize_inputs(record.get("inputs"))
+        if key in datasets[chain]:
+            counts[chain]["duplicates"] += 1
+            continue
+        datasets[chain][key] = {
+            "input": record["input"],
+            "inputs": record.get("inputs"),
+            "output": record["raw_output"],
+            "parsed": record.get("parsed"),
+            "model": record.get("model"),
+            "intent": record.get("intent"),
+        }
+
+    for chain, examples in datasets.items():
+        chain_dir = os.path.join(output_dir, chain)
+        os.makedirs(chain_dir, exist_ok=True)
+        files = {split: open(os.path.join(chain_dir, f"{split}.jsonl"), 'w') for split in ["train", "eval"]}
+        try:
+            for key, example in examples.items():
+                split = assign_split(key, eval_fraction)
+                files[split].write(json.dumps(example) + '\n')
+                counts[chain][split] += 1
+        finally:
+            for f in files.values():
+                f.close()
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export chain interaction logs as per-chain train/eval datasets')
+    parser.add_argument('--log-dir', '-l', required=True,
+                      help='Interaction log directory (INTERACTION_LOG_DIR of the chat agent)')
+    parser.add_argument('--output-dir', '-o', default='../datasets',
+                      help='Directory the datasets are written to (default: ../datasets)')
+    parser.add_argument('--eval-fraction', type=float, default=0.1,
+                      help='Fraction of unique inputs in the eval split (default: 0.1)')
+    parser.add_argument('--chain', action='append', dest='chains',
+                      help='Only export this chain, can be given several times (default: all chains)')
+    parser.add_argument('--include-unparsed', action='store_true',
+                      help='Also export records whose output could not be parsed')
+
+    args = parser.parse_args()
+
+    counts = export(args.log_dir, args.output_dir, args.eval_fraction, args.chains, args.include_unparsed)
+    for chain, chain_counts in sorted(counts.items()):
+        print(f"{chain:<28} records {chain_counts['records']:>6}  duplicates {chain_counts['duplicates']:>6}  "
+              f"unparsed {chain_counts['unparsed']:>5}  train {chain_counts['train']:>6}  eval {chain_counts['eval']:>5}")
+    print(f"Datasets have been saved to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Small talk fast path report.
+
+Runs a traffic sample through the small talk fast path and reports the hit rate per category,
+the latency of a fast path check and the tokens and latency the full pipeline would have spent
+on the queries the fast path answered.
+
+With --compare the fast path hits are also sent through the full pipeline (which needs a working
+LLM backend, e.g. LLM_BACKEND=fake) to measure the saved latency and tokens. Without it, the saved
+tokens are estimated from the rendered intent classifier prompt.
+"""
+
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+sys.path.append("../")
+
+from personal_bot.utils.fast_path import FastPath
+from personal_bot.token_ledger import estimate_tokens
+
+
+def load_queries(path):
+    """
+    Read queries from a test cases JSON file, a JSONL file with "query" or "input" fields,
+    or a text file with one query per line.
+    """
+    with open(path, 'r') as f:
+        if path.endswith('.json'):
+            return [case["input"] for case in json.load(f)["test_cases"]]
+        if path.endswith('.jsonl'):
+            records = [json.loads(line) for line in f if line.strip()]
+            return [record.get("query") or record.get("input") for record in records]
+        return [line.strip() for line in f if line.strip()]
+
+
+def estimate_saved_tokens(queries):
+    """Estimate the classifier tokens of the given queries from the rendered prompt."""
+    from chat_agent import get_chain
+
+    prompt = get_chain("intent_classifier_chain").prompt
+    return sum(estimate_tokens(prompt.format(query=query)) for query in queries)
+
+
+def measure_pipeline(queries):
+    """Run the queries through the full pipeline with the fast path switched off."""
+    from chat_agent import ChatAgent
+
+    latencies = []
+    tokens = 0
+    for query in queries:
+        agent = ChatAgent(fast_path=False)
+        start = time.perf_counter()
+        try:
+            agent.get_response(query)
+        except Exception as e:
+            print(f"Pipeline failed for {query!r}: {e}")
+            continue
+        latencies.append(time.perf_counter() - start)
+        tokens += (agent.session_store.get_state(agent.session_id).get("token_usage") or {}).get("total_tokens", 0)
+    return latencies, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the hit rate and savings of the small talk fast path')
+    parser.add_argument('--input', '-i', default='../test_cases/chat_traffic_sample.txt',
+                      help='Traffic sample: test cases JSON, JSONL or one query per line (default: ../test_cases/chat_traffic_sample.txt)')
+    parser.add_argument('--patterns', '-p',
+                      help='Pattern table JSON file (default: the bundled personal_bot/data/small_talk.json)')
+    parser.add_argument('--compare', action='store_true',
+                      help='Send the fast path hits through the full pipeline to measure the saved latency and tokens')
+    parser.add_argument('--output', '-o',
+                      help='Also write the report to this JSON file')
+
+    args = parser.parse_args()
+
+    fast_path = FastPath(args.patterns)
+    queries = load_queries(args.input)
+    hits = []
+    categories = Counter()
+    for query in queries:
+        category = fast_path.match(query)
+        if category is not None:
+            hits.append(query)
+            categories[category] += 1
+
+    report = {
+        "queries": len(queries),
+        "hits": len(hits),
+        "hit_rate": round(fast_path.hit_rate(), 4),
+        "hits_by_category": dict(categories),
+        "mean_check_us": round(fast_path.mean_check_us(), 2),
+    }
+
+    latencies = []
+    if args.compare and hits:
+        latencies, tokens = measure_pipeline(hits)
+    if latencies:
+        report["pipeline_mean_latency_s"] = round(sum(latencies) / len(latencies), 4)
+        report["latency_saved_s"] = round(sum(latencies), 4)
+        report["tokens_saved"] = tokens
+    elif hits:
+        try:
+            report["tokens_saved_estimate"] = estimate_saved_tokens(hits)
+        except Exception as e:
+            print(f"Could not estimate the saved tokens: {e}")
+
+    print(f"Queries: {report['queries']}, fast path hits: {report['hits']} ({report['hit_rate']:.1%})")
+    for category, count in categories.most_common():
+        print(f"  {category:<14} {count}")
+    print(f"Mean fast path check: {report['mean_check_us']:.1f} us")
+    if "latency_saved_s" in report:
+        print(f"Full pipeline on the hits: {report['pipeline_mean_latency_s']:.3f} s per query, "
+              f"{report['latency_saved_s']:.3f} s and {report['tokens_saved']} tokens saved in total")
+    elif "tokens_saved_estimate" in report:
+        print(f"Estimated tokens saved: {report['tokens_saved_estimate']} (intent classifier prompt only)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report has been saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
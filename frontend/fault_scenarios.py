@@ -0,0 +1,159 @@
+"""
+Resilience benchmark for the chat agent.
+
+Runs the same multi-turn conversations under a series of fault scenarios (latency spikes,
+timeouts, rate limits, connection resets, truncated and malformed outputs) injected by the
+fault injecting LLM backend (personal_bot/fault_llm.py), and reports per scenario the goodput,
+the tail latency and how the turns failed.
+
+A turn is "ok", "degraded" (answered with a fallback), an "error_response" (answered with an
+error message because a chain output could not be parsed) or an exception. Goodput counts the
+ok and degraded turns per second. Conversations continue after a failed turn, as a user would.
+
+Usage:
+    python fault_scenarios.py --scenarios ../test_cases/fault_scenarios.json --turn-timeout 5
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append("../")
+
+from load_test import load_conversations, percentile
+
+ERROR_MESSAGE = "An error occurred"
+
+
+def classify_outcome(response, error):
+    """Returns the outcome of a turn: ok, degraded, error_response or exception:<type>."""
+    if error is not None:
+        return f"exception:{type(error).__name__}"
+    if ERROR_MESSAGE in json.dumps(response, default=str):
+        return "error_response"
+    if isinstance(response, dict) and response.get("degraded"):
+        return "degraded"
+    return "ok"
+
+
+def run_scenario(scenario, conversations, rounds, concurrency, turn_timeout):
+    """
+    Run every conversation `rounds` times under the scenario's faults.
+
+    Returns:
+        dict: Summary of the scenario
+    """
+    from chat_agent import ChatAgent, fallback_stats
+    from personal_bot.fault_llm import get_fault_injector
+
+    injector = get_fault_injector()
+    injector.configure(scenario.get("faults", ()), scenario.get("seed", 0))
+    fallbacks_before = Counter(fallback_stats)
+    turns = []
+    lock = threading.Lock()
+
+    def run_conversation(conversation):
+        agent = ChatAgent(session_id=f"faults-{uuid.uuid4().hex}", turn_timeout=turn_timeout, conversation_summary=False)
+        for query in conversation["turns"]:
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = agent.get_response(query)
+            except Exception as e:
+                error = e
+            with lock:
+                turns.append((time.perf_counter() - start, classify_outcome(response, error)))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run_conversation, conversations * rounds))
+    elapsed = time.perf_counter() - start
+
+    outcomes = Counter(outcome for _, outcome in turns)
+    good = [latency for latency, outcome in turns if outcome in ("ok", "degraded")]
+    latencies = [latency for latency, _ in turns]
+    fallbacks = Counter(fallback_stats)
+    fallbacks.subtract(fallbacks_before)
+    return {
+        "name": scenario["name"],
+        "description": scenario.get("description", ""),
+        "turns": len(turns),
+        "elapsed_s": round(elapsed, 2),
+        "goodput_tps": round(len(good) / elapsed, 2) if elapsed else 0.0,
+        "success_rate": round(len(good) / len(turns), 4) if turns else None,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        "outcomes": dict(outcomes),
+        "injected": {key: count for key, count in injector.stats.items() if key != "calls" and ":" not in key},
+        "llm_calls": injector.stats["calls"],
+        "fallbacks": {key: count for key, count in fallbacks.items() if count > 0},
+    }
+
+
+def format_report(summaries):
+    lines = [f"{'scenario':<20}{'turns':>7}{'ok':>6}{'degr':>6}{'fail':>6}{'goodput/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  failure modes"]
+    for summary in summaries:
+        outcomes = summary["outcomes"]
+        failures = {outcome: count for outcome, count in outcomes.items() if outcome not in ("ok", "degraded")}
+        lines.append(
+            f"{summary['name']:<20}{summary['turns']:>7}{outcomes.get('ok', 0):>6}{outcomes.get('degraded', 0):>6}"
+            f"{sum(failures.values()):>6}{summary['goodput_tps']:>11}{str(summary['p50_ms']):>9}{str(summary['p95_ms']):>9}"
+            f"{str(summary['p99_ms']):>9}  {', '.join(f'{outcome} {count}' for outcome, count in sorted(failures.items())) or '-'}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure goodput, tail latency and failure modes of the chat agent under injected LLM faults')
+    parser.add_argument('--scenarios', '-s', default='../test_cases/fault_scenarios.json',
+                      help='Fault scenarios JSON file (default: ../test_cases/fault_scenarios.json)')
+    parser.add_argument('--only', action='append',
+                      help='Run only the named scenario, can be given more than once')
+    parser.add_argument('--conversations', '-c', default='../test_cases/load_conversations.json',
+                      help='Conversation scripts (.json), text file or SQLite session store to replay (default: ../test_cases/load_conversations.json)')
+    parser.add_argument('--rounds', type=int, default=2,
+                      help='Times every conversation is run per scenario (default: 2)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                      help='Conversations running at once (default: 4)')
+    parser.add_argument('--turn-timeout', type=float,
+                      help='Deadline per turn in seconds, stages fall back once it is near (default: no deadline)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                      help='Latency of a clean LLM call in seconds, unless FAKE_LLM_LATENCY is set (default: 0.05)')
+    parser.add_argument('--output', '-o', help='Write the scenario summaries to this JSON file')
+
+    args = parser.parse_args()
+
+    # The backend is chosen when the chains are built, so this has to happen before the first turn
+    os.environ["LLM_BACKEND"] = "faults"
+    os.environ.setdefault("FAKE_LLM_LATENCY", str(args.latency))
+    os.environ.setdefault("WEB_SEARCH_BACKEND", "fixture")
+
+    with open(args.scenarios, 'r') as f:
+        scenarios = json.load(f)["scenarios"]
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if scenario["name"] in args.only]
+        if not scenarios:
+            parser.error(f"No scenario named {', '.join(args.only)} in {args.scenarios}")
+    conversations = load_conversations(args.conversations)
+    if not conversations:
+        parser.error(f"No conversations found in {args.conversations}")
+
+    summaries = []
+    for scenario in scenarios:
+        print(f"Running scenario {scenario['name']}: {scenario.get('description', '')}")
+        summaries.append(run_scenario(scenario, conversations, args.rounds, args.concurrency, args.turn_timeout))
+
+    print(format_report(summaries))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"conversations": args.conversations, "turn_timeout": args.turn_timeout, "scenarios": summaries}, f, indent=4)
+        print(f"Scenario report has been saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
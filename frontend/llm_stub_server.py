@@ -0,0 +1,247 @@
+"""
+Local stand-in for the Groq API, for load tests and capacity planning.
+
+This module serves an OpenAI/Groq compatible chat completions endpoint that answers chain
+prompts with the fake LLM's keyword based answers (personal_bot/fake_llm.py), after a latency
+drawn from a configurable distribution. Requests and tokens per minute can be rate limited
+the way Groq does it, answering 429 with a retry-after header, so the real Groq client,
+including its retries, is exercised end to end.
+
+Endpoints:
+- POST /openai/v1/chat/completions   Groq client path
+- POST /v1/chat/completions          OpenAI client path
+- GET  /healthz                      Liveness check
+- GET  /stats                        Request, rate limit and token counters
+
+Point the chat agent at it with:
+    GROQ_API_BASE=http://127.0.0.1:8100 GROQ_API_KEY=stub python load_test.py ...
+
+Run with:
+    python llm_stub_server.py --port 8100 --latency lognormal:0.4,0.5 --rpm 600 --tpm 300000
+"""
+
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+from collections import Counter, deque
+sys.path.append("../")
+
+from personal_bot.fake_llm import fake_chain_response
+from personal_bot.token_ledger import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def parse_latency(spec):
+    """
+    Parse a latency distribution spec into a sampler.
+
+    Supported specs (seconds):
+    - "constant:0.3"
+    - "uniform:0.2,0.6"
+    - "normal:0.4,0.1"        mean, standard deviation
+    - "lognormal:0.4,0.5"     median, sigma of the underlying normal distribution
+
+    Returns:
+        callable: Function without arguments returning a latency in seconds, never negative
+    """
+    name, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(",")] if params else []
+    except ValueError:
+        raise ValueError(f"Invalid latency parameters in {spec!r}")
+    samplers = {
+        "constant": (1, lambda value: value),
+        "uniform": (2, random.uniform),
+        "normal": (2, random.gauss),
+        "lognormal": (2, lambda median, sigma: median * random.lognormvariate(0.0, sigma)),
+    }
+    if name not in samplers:
+        raise ValueError(f"Unknown latency distribution {name!r}, expected one of {sorted(samplers)}")
+    arity, sampler = samplers[name]
+    if len(values) != arity:
+        raise ValueError(f"Latency distribution {name!r} takes {arity} parameter(s), got {spec!r}")
+    return lambda: max(0.0, sampler(*values))
+
+
+class RateLimiter:
+    """
+    Rolling one minute windows of requests and tokens, like the Groq per-model limits.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._window = deque()
+        self._tokens = 0
+
+    def _prune(self, now):
+        while self._window and self._window[0][0] <= now - 60:
+            self._tokens -= self._window.popleft()[1]
+
+    def check(self, tokens):
+        """
+        Admit a request of `tokens` tokens.
+
+        Returns:
+            tuple: (limit type or None if admitted, seconds until the request would be admitted)
+        """
+        now = time.monotonic()
+        self._prune(now)
+        if self.requests_per_minute is not None and len(self._window) >= self.requests_per_minute:
+            return "requests", self._window[0][0] + 60 - now
+        if self.tokens_per_minute is not None and self._tokens + tokens > self.tokens_per_minute:
+            return "tokens", (self._window[0][0] + 60 - now) if self._window else 60.0
+        self._window.append((now, tokens))
+        self._tokens += tokens
+        return None, 0.0
+
+    def headers(self):
+        headers = []
+        if self.requests_per_minute is not None:
+            headers.append((b"x-ratelimit-remaining-requests", str(max(0, self.requests_per_minute - len(self._window))).encode()))
+        if self.tokens_per_minute is not None:
+            headers.append((b"x-ratelimit-remaining-tokens", str(max(0, self.tokens_per_minute - self._tokens)).encode()))
+        return headers
+
+
+class LLMStub:
+    """
+    ASGI application answering chat completion requests like the Groq API.
+
+    Requests only sleep on the event loop, so a single process sustains thousands of concurrent
+    requests and the stub never becomes the bottleneck of a load test.
+    """
+
+    def __init__(self, latency="constant:0.3", tokens_per_second=None, requests_per_minute=None, tokens_per_minute=None, error_rate=0.0):
+        """
+        Args:
+            latency (str): Latency distribution spec of a request, see `parse_latency`
+            tokens_per_second (float): Additional generation time per completion token, none if not given
+            requests_per_minute (int): Requests per rolling minute before 429 is returned, unlimited if not given
+            tokens_per_minute (int): Tokens per rolling minute before 429 is returned, unlimited if not given
+            error_rate (float): Fraction of requests answered with 500
+        """
+        self.sample_latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.error_rate = error_rate
+        self.stats = Counter()
+        self.routes = {
+            ("POST", "/openai/v1/chat/completions"): self.chat_completions,
+            ("POST", "/v1/chat/completions"): self.chat_completions,
+            ("GET", "/healthz"): self.healthz,
+            ("GET", "/stats"): self.stats_endpoint,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        handler = self.routes.get((scope["method"], scope["path"]))
+        if handler is None:
+            await send_json(send, 404, {"error": {"message": "Unknown request URL", "type": "invalid_request_error"}})
+            return
+        await handler(scope, receive, send)
+
+    async def chat_completions(self, scope, receive, send):
+        self.stats["requests"] += 1
+        try:
+            body = json.loads(await read_body(receive) or b"{}")
+            messages = body["messages"]
+        except (ValueError, KeyError, TypeError):
+            self.stats["bad_requests"] += 1
+            await send_json(send, 400, {"error": {"message": "Invalid request body", "type": "invalid_request_error"}})
+            return
+
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        prompt_tokens = estimate_tokens(prompt)
+        limit, retry_after = self.rate_limiter.check(prompt_tokens + (body.get("max_tokens") or 0))
+        if limit is not None:
+            self.stats[f"rate_limited_{limit}"] += 1
+            error = {
+                "message": f"Rate limit reached for model `{body.get('model')}` on {limit} per minute (stub). "
+                           f"Please try again in {retry_after:.2f}s.",
+                "type": limit,
+                "code": "rate_limit_exceeded",
+            }
+            headers = [(b"retry-after", f"{retry_after:.2f}".encode())] + self.rate_limiter.headers()
+            await send_json(send, 429, {"error": error}, headers)
+            return
+
+        content = fake_chain_response(prompt)
+        completion_tokens = estimate_tokens(content)
+        latency = self.sample_latency()
+        if self.tokens_per_second:
+            latency += completion_tokens / self.tokens_per_second
+        await asyncio.sleep(latency)
+
+        if self.error_rate and random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            await send_json(send, 500, {"error": {"message": "Internal server error (stub)", "type": "internal_server_error"}})
+            return
+
+        self.stats["completions"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+        request_id = f"chatcmpl-{uuid.uuid4().hex}"
+        await send_json(send, 200, {
+            "id": request_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "logprobs": None, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "total_time": latency,
+            },
+            "system_fingerprint": "stub",
+            "x_groq": {"id": request_id},
+        }, self.rate_limiter.headers())
+
+    async def healthz(self, scope, receive, send):
+        await send_json(send, 200, {"status": "ok"})
+
+    async def stats_endpoint(self, scope, receive, send):
+        await send_json(send, 200, dict(self.stats))
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def send_json(send, status, payload, headers=()):
+    headers = [(b"content-type", b"application/json")] + list(headers)
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Serve a local OpenAI/Groq compatible stand-in for load tests')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8100, help='Port to bind (default: 8100)')
+    parser.add_argument('--latency', default='constant:0.3',
+                      help='Latency distribution: constant:S, uniform:MIN,MAX, normal:MEAN,STD or lognormal:MEDIAN,SIGMA (default: constant:0.3)')
+    parser.add_argument('--tokens-per-second', type=float,
+                      help='Additional generation time per completion token (default: none)')
+    parser.add_argument('--rpm', type=int, help='Requests per minute before 429 is returned (default: unlimited)')
+    parser.add_argument('--tpm', type=int, help='Tokens per minute before 429 is returned (default: unlimited)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500 (default: 0)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    app = LLMStub(args.latency, args.tokens_per_second, args.rpm, args.tpm, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,267 @@
+"""
+Load generator and capacity planning harness for the chat agent.
+
+Simulates concurrent users, each running multi-turn conversations one turn after the other,
+against the in-process ChatAgent or the HTTP API server. Concurrency is ramped up in steps, and
+every step reports sustained turns per second, latency percentiles, error rates and the memory
+used per session, which shows where a single process saturates.
+
+Conversations come from a JSON script file ({"conversations": [{"id": ..., "turns": [...]}]}),
+a text file (one turn per line, conversations separated by blank lines) or are replayed from
+the user turns of a SQLite session store (SESSION_STORE_PATH of a previous deployment).
+
+Point the agent at the local Groq stand-in (llm_stub_server.py) to load test without
+touching the real API:
+    GROQ_API_BASE=http://127.0.0.1:8100 GROQ_API_KEY=stub python load_test.py --conversations ../test_cases/load_conversations.json
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import resource
+import argparse
+import threading
+from collections import Counter
+sys.path.append("../")
+
+
+def load_conversations(path):
+    """
+    Load conversations from a JSON script, a text file or a SQLite session store.
+
+    Returns:
+        list: Conversations as dicts with "id" and "turns" (list of user queries)
+    """
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        connection = sqlite3.connect(path)
+        try:
+            rows = connection.execute("SELECT session_id, content FROM turns WHERE role = 'user' ORDER BY id").fetchall()
+        finally:
+            connection.close()
+        sessions = {}
+        for session_id, content in rows:
+            sessions.setdefault(session_id, []).append(json.loads(content))
+        return [{"id": session_id, "turns": turns} for session_id, turns in sessions.items()]
+
+    with open(path, "r") as f:
+        if path.endswith(".json"):
+            conversations = json.load(f)["conversations"]
+            return [
+                conversation if isinstance(conversation, dict) else {"id": str(index), "turns": conversation}
+                for index, conversation in enumerate(conversations)
+            ]
+        blocks = f.read().split("\n\n")
+    conversations = []
+    for block in blocks:
+        turns = [line.strip() for line in block.splitlines() if line.strip()]
+        if turns:
+            conversations.append({"id": str(len(conversations)), "turns": turns})
+    return conversations
+
+
+def current_rss():
+    """Returns the resident set size of this process in bytes (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+class InProcessTarget:
+    """Runs turns on ChatAgent instances in this process, one agent per virtual user."""
+
+    name = "in-process"
+
+    def __init__(self):
+        from chat_agent import ChatAgent
+        self.agent_class = ChatAgent
+        self._local = threading.local()
+
+    def turn(self, session_id, query):
+        agent = getattr(self._local, "agent", None)
+        if agent is None:
+            agent = self._local.agent = self.agent_class(session_id=session_id)
+        elif agent.session_id != session_id:
+            agent.reset_session(session_id)
+        return agent.get_response(query)
+
+
+class HTTPTarget:
+    """Sends turns to the /v1/chat endpoint of the API server."""
+
+    def __init__(self, url, timeout):
+        import httpx
+        self.name = url
+        self.url = url.rstrip("/") + "/v1/chat"
+        self.client = httpx.Client(timeout=timeout, limits=httpx.Limits(max_connections=1000, max_keepalive_connections=1000))
+
+    def turn(self, session_id, query):
+        response = self.client.post(self.url, json={"session_id": session_id, "query": query})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response.json()["response"]
+
+
+class Step:
+    """Results of one concurrency step."""
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self.latencies = []
+        self.errors = Counter()
+        self.turns = 0
+        self.degraded = 0
+        self.sessions = 0
+        self.elapsed = 0.0
+        self.rss_before = 0
+        self.rss_after = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency, response=None, error=None):
+        with self._lock:
+            self.turns += 1
+            if error is not None:
+                self.errors[error] += 1
+                return
+            self.latencies.append(latency)
+            if isinstance(response, dict) and response.get("degraded"):
+                self.degraded += 1
+
+    def start_session(self):
+        with self._lock:
+            self.sessions += 1
+
+    def summary(self, in_process):
+        error_count = sum(self.errors.values())
+        return {
+            "concurrency": self.concurrency,
+            "turns": self.turns,
+            "sessions": self.sessions,
+            "turns_per_sec": round(len(self.latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 0.5) * 1000, 1) if self.latencies else None,
+            "p90_ms": round(percentile(self.latencies, 0.9) * 1000, 1) if self.latencies else None,
+            "p99_ms": round(percentile(self.latencies, 0.99) * 1000, 1) if self.latencies else None,
+            "max_ms": round(max(self.latencies) * 1000, 1) if self.latencies else None,
+            "error_rate": round(error_count / self.turns, 4) if self.turns else 0.0,
+            "errors": dict(self.errors),
+            "degraded": self.degraded,
+            "rss_mb": round(self.rss_after / 2**20, 1) if in_process else None,
+            "kb_per_session": round((self.rss_after - self.rss_before) / 1024 / self.sessions, 1) if in_process and self.sessions else None,
+        }
+
+
+def virtual_user(user_index, target, conversations, step, stop_at, think_time):
+    """Runs whole conversations, one turn after the other, until the step ends."""
+    conversation_index = user_index
+    while time.monotonic() < stop_at:
+        conversation = conversations[conversation_index % len(conversations)]
+        conversation_index += 1
+        session_id = f"load-{uuid.uuid4().hex}"
+        step.start_session()
+        for query in conversation["turns"]:
+            if time.monotonic() >= stop_at:
+                return
+            start = time.perf_counter()
+            try:
+                response = target.turn(session_id, query)
+            except Exception as e:
+                step.record(time.perf_counter() - start, error=str(e) if str(e).startswith("HTTP") else type(e).__name__)
+                break
+            step.record(time.perf_counter() - start, response)
+            if think_time:
+                time.sleep(think_time)
+
+
+def run_step(target, conversations, concurrency, duration, think_time):
+    step = Step(concurrency)
+    step.rss_before = current_rss()
+    stop_at = time.monotonic() + duration
+    users = [
+        threading.Thread(target=virtual_user, args=(index, target, conversations, step, stop_at, think_time), daemon=True)
+        for index in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    step.elapsed = time.perf_counter() - start
+    step.rss_after = current_rss()
+    return step
+
+
+def find_saturation(summaries, min_gain, max_error_rate):
+    """
+    Returns the summary of the step where the process saturates: the last step before throughput
+    stops growing by at least `min_gain` or the error rate exceeds `max_error_rate`, None if it never does.
+    """
+    for previous, current in zip(summaries, summaries[1:]):
+        if current["error_rate"] > max_error_rate or current["turns_per_sec"] < previous["turns_per_sec"] * (1 + min_gain):
+            return previous
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ramp up concurrent multi-turn users against the chat agent and report capacity')
+    parser.add_argument('--conversations', '-c', default='../test_cases/load_conversations.json',
+                      help='Conversation scripts (.json), text file or SQLite session store to replay (default: ../test_cases/load_conversations.json)')
+    parser.add_argument('--url', help='Base URL of the API server, the agent is run in process if not given')
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32',
+                      help='Comma separated concurrency steps (default: 1,2,4,8,16,32)')
+    parser.add_argument('--step-duration', type=float, default=30.0,
+                      help='Seconds per concurrency step (default: 30)')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                      help='Seconds a user waits between turns (default: 0)')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                      help='HTTP request timeout in seconds (default: 60)')
+    parser.add_argument('--min-gain', type=float, default=0.1,
+                      help='Throughput gain per step below which the process counts as saturated (default: 0.1)')
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                      help='Error rate above which the process counts as saturated (default: 0.01)')
+    parser.add_argument('--output', '-o', help='Write the step summaries to this JSON file')
+
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.conversations)
+    if not conversations:
+        parser.error(f"No conversations found in {args.conversations}")
+    target = HTTPTarget(args.url, args.timeout) if args.url else InProcessTarget()
+    in_process = args.url is None
+
+    print(f"Target {target.name}, {len(conversations)} conversations, {args.step_duration:.0f}s per step")
+    print(f"{'users':>6}{'turns/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'errors':>9}{'degraded':>10}{'sessions':>10}{'KB/session':>12}")
+    summaries = []
+    for concurrency in [int(value) for value in args.concurrency.split(",")]:
+        summary = run_step(target, conversations, concurrency, args.step_duration, args.think_time).summary(in_process)
+        summaries.append(summary)
+        print(f"{concurrency:>6}{summary['turns_per_sec']:>10.2f}{summary['p50_ms'] or 0:>10.0f}{summary['p90_ms'] or 0:>10.0f}"
+              f"{summary['p99_ms'] or 0:>10.0f}{summary['error_rate']:>9.1%}{summary['degraded']:>10}{summary['sessions']:>10}"
+              f"{summary['kb_per_session'] if summary['kb_per_session'] is not None else 'n/a':>12}")
+        if summary["errors"]:
+            print(f"{'':>6}errors: {summary['errors']}")
+
+    saturation = find_saturation(summaries, args.min_gain, args.max_error_rate)
+    if saturation:
+        print(f"Saturates at {saturation['concurrency']} concurrent users, {saturation['turns_per_sec']:.2f} turns/s")
+    else:
+        print("No saturation within the tested concurrency steps")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"target": target.name, "steps": summaries, "saturation": saturation}, f, indent=4)
+        print(f"Load test results have been saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Performance regression gate for prompt and pipeline changes.
+
+Runs the test cases through ChatAgent and records, per test case and per chain, the prompt and
+completion tokens, the LLM calls per turn and the stage latencies. The run is saved as a
+versioned baseline file or compared against one, and the gate exits non-zero when a metric
+regresses beyond its tolerance.
+
+Modes:
+- replay: Offline, chain outputs come from a recording (LLM_RECORDING), web search from fixtures
+- record: Live LLM calls, their outputs are appended to the recording for later replays
+- live:   Live LLM calls without a recording
+
+Tokens of replayed calls are estimated from the prompt as rendered today and the recorded output,
+so a bloated prompt template shows up offline. Compare baselines and runs of the same mode only.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+sys.path.append("../")
+
+BASELINE_FORMAT_VERSION = 1
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure_mode(mode, recording_path):
+    """Set the environment for the mode before the first chain or search call."""
+    if mode in ("replay", "record"):
+        os.environ["LLM_RECORDING"] = recording_path
+        os.environ["LLM_RECORDING_MODE"] = mode
+    if mode == "replay":
+        # Chains still need a model object, the fake backend needs no API key and never reaches it
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        os.environ.setdefault("WEB_SEARCH_BACKEND", "fixture")
+
+
+def run_benchmark(test_cases_path, repeat):
+    """
+    Run every test case `repeat` times as an independent conversation.
+
+    Returns:
+        dict: "test_cases" and "chains" metrics, latencies are medians over the repeats
+    """
+    from chat_agent import ChatAgent, CHAIN_FACTORIES, get_chain
+    from personal_bot.token_ledger import estimate_tokens
+
+    with open(test_cases_path, 'r') as f:
+        test_cases = json.load(f)['test_cases']
+
+    chat_agent = ChatAgent()
+    results = {}
+    chain_usage = defaultdict(lambda: {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+    for test_case in test_cases:
+        runs = []
+        for _ in range(repeat):
+            chat_agent.reset_session()
+            start = time.perf_counter()
+            error = None
+            try:
+                chat_agent.get_response(test_case['input'])
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            latency = time.perf_counter() - start
+            usage = chat_agent.last_turn_usage
+            runs.append((latency, usage.latencies if usage is not None else {}, usage, error))
+
+        _, _, usage, error = runs[0]
+        entries = usage.entries if usage is not None else []
+        stages = sorted({stage for _, latencies, _, _ in runs for stage in latencies})
+        results[test_case['id']] = {
+            "llm_calls": len(entries),
+            "prompt_tokens": sum(entry["prompt_tokens"] for entry in entries),
+            "completion_tokens": sum(entry["completion_tokens"] for entry in entries),
+            "latency_ms": round(statistics.median(run[0] for run in runs) * 1000, 2),
+            "stages_ms": {
+                stage: round(statistics.median(latencies.get(stage, 0.0) for _, latencies, _, _ in runs) * 1000, 2)
+                for stage in stages
+            },
+            "error": error,
+        }
+        for entry in entries:
+            chain_usage[entry["chain"]]["llm_calls"] += 1
+            chain_usage[entry["chain"]]["prompt_tokens"] += entry["prompt_tokens"]
+            chain_usage[entry["chain"]]["completion_tokens"] += entry["completion_tokens"]
+
+    chains = {}
+    for name in CHAIN_FACTORIES:
+        template = get_chain(name).prompt.template
+        chains[name] = {
+            "prompt_hash": hashlib.sha256(template.encode()).hexdigest()[:12],
+            "template_tokens": estimate_tokens(template),
+            **chain_usage.get(name, {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}),
+            "latency_ms": round(sum(result["stages_ms"].get(name, 0.0) for result in results.values()), 2),
+        }
+    chains["web_search"] = {"latency_ms": round(sum(result["stages_ms"].get("web_search", 0.0) for result in results.values()), 2)}
+    return {"test_cases": results, "chains": chains}
+
+
+def compare(baseline, current, tolerances):
+    """
+    Compare a run against the baseline.
+
+    Args:
+        baseline (dict): Baseline run
+        current (dict): Current run
+        tolerances (dict): "tokens" and "latency" relative increases, "calls" absolute increase and
+            "latency_floor_ms", the latency increase below which latency never counts as a regression
+
+    Returns:
+        list: Row dicts with scope, name, metric, baseline, current, delta and regression
+    """
+    def check(scope, name, metric, base, value):
+        if base is None or value is None:
+            return None
+        delta = value - base
+        if metric in ("prompt_tokens", "completion_tokens", "template_tokens"):
+            regression = delta > 0 and value > base * (1 + tolerances["tokens"])
+        elif metric == "llm_calls":
+            regression = delta > tolerances["calls"]
+        else:
+            regression = delta > tolerances["latency_floor_ms"] and value > base * (1 + tolerances["latency"])
+        return {"scope": scope, "name": name, "metric": metric, "baseline": base, "current": value,
+                "delta": round(delta, 2), "regression": regression}
+
+    rows = []
+    for scope in ("chains", "test_cases"):
+        for name, metrics in current[scope].items():
+            base_metrics = baseline[scope].get(name)
+            if base_metrics is None:
+                rows.append({"scope": scope, "name": name, "metric": "new", "baseline": None, "current": None, "delta": None, "regression": False})
+                continue
+            if scope == "chains" and "prompt_hash" in metrics and metrics["prompt_hash"] != base_metrics.get("prompt_hash"):
+                rows.append({"scope": scope, "name": name, "metric": "prompt_changed", "baseline": base_metrics.get("prompt_hash"),
+                             "current": metrics["prompt_hash"], "delta": None, "regression": False})
+            if scope == "test_cases" and metrics["error"] and not base_metrics.get("error"):
+                rows.append({"scope": scope, "name": name, "metric": "error", "baseline": None, "current": metrics["error"],
+                             "delta": None, "regression": True})
+            for metric in ("template_tokens", "llm_calls", "prompt_tokens", "completion_tokens", "latency_ms"):
+                row = check(scope, name, metric, base_metrics.get(metric), metrics.get(metric))
+                if row is not None:
+                    rows.append(row)
+        for name in baseline[scope]:
+            if name not in current[scope]:
+                rows.append({"scope": scope, "name": name, "metric": "missing", "baseline": None, "current": None, "delta": None, "regression": False})
+    return rows
+
+
+def format_report(rows, show_all):
+    """
+    Per-chain and per-test-case table of the compared metrics. Unchanged metrics are left out
+    unless `show_all`, and latency only shows when it regressed, as it is noisy.
+    """
+    lines = []
+    for scope, title in (("chains", "Per chain"), ("test_cases", "Per test case")):
+        scope_rows = [
+            row for row in rows
+            if row["scope"] == scope and (show_all or row["regression"] or (row["delta"] != 0 and row["metric"] != "latency_ms"))
+        ]
+        lines.append(f"{title}:")
+        if not scope_rows:
+            lines.append("  no changes")
+            continue
+        lines.append(f"  {'name':<28}{'metric':<20}{'baseline':>14}{'current':>14}{'delta':>12}")
+        for row in scope_rows:
+            baseline = "" if row["baseline"] is None else row["baseline"]
+            current = "" if row["current"] is None else row["current"]
+            if row["metric"] == "error":
+                current = str(current)[:40]
+            delta = "" if row["delta"] is None else (f"{row['delta'] / row['baseline']:+.1%}" if row["baseline"] else f"{row['delta']:+}")
+            lines.append(f"  {row['name']:<28}{row['metric']:<20}{baseline!s:>14}{current!s:>14}{delta:>12}"
+                         + ("  REGRESSION" if row["regression"] else ""))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tokens, LLM calls and latency per turn and gate on regressions against a baseline')
+    parser.add_argument('--test-cases', '-t', default='../test_cases/test_cases.json',
+                      help='Path to the test cases JSON file (default: ../test_cases/test_cases.json)')
+    parser.add_argument('--mode', choices=['replay', 'record', 'live'], default='replay',
+                      help='replay recorded chain outputs offline, record live outputs, or run live (default: replay)')
+    parser.add_argument('--recording', default='../benchmarks/llm_recording.jsonl',
+                      help='Recording of chain outputs (default: ../benchmarks/llm_recording.jsonl)')
+    parser.add_argument('--baseline', '-b', default='../benchmarks/perf_baseline.json',
+                      help='Baseline file (default: ../benchmarks/perf_baseline.json)')
+    parser.add_argument('--update-baseline', action='store_true',
+                      help='Save this run as the new baseline instead of comparing')
+    parser.add_argument('--repeat', type=int, default=3,
+                      help='Runs per test case, latencies are the median (default: 3)')
+    parser.add_argument('--token-tolerance', type=float, default=0.05,
+                      help='Relative token increase allowed (default: 0.05)')
+    parser.add_argument('--calls-tolerance', type=int, default=0,
+                      help='Additional LLM calls per test case or chain allowed (default: 0)')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                      help='Relative latency increase allowed (default: 0.25)')
+    parser.add_argument('--latency-floor-ms', type=float, default=5.0,
+                      help='Latency increases below this never count as regressions (default: 5)')
+    parser.add_argument('--report', help='Write the comparison rows to this JSON file')
+    parser.add_argument('--show-all', action='store_true', help='Show unchanged metrics in the report')
+
+    args = parser.parse_args()
+
+    if args.mode == 'replay' and not os.path.exists(args.recording):
+        parser.error(f"Recording {args.recording} does not exist, create it with --mode record")
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"Baseline {args.baseline} does not exist, create it with --update-baseline")
+        sys.exit(2)
+
+    configure_mode(args.mode, args.recording)
+    run = {
+        "format_version": BASELINE_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "mode": "live" if args.mode == "record" else args.mode,
+        "test_cases_path": args.test_cases,
+        "repeat": args.repeat,
+        **run_benchmark(args.test_cases, args.repeat),
+    }
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=4)
+        print(f"Baseline has been saved to {args.baseline}")
+        return
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get("format_version") != BASELINE_FORMAT_VERSION:
+        print(f"Baseline format version {baseline.get('format_version')} does not match {BASELINE_FORMAT_VERSION}, re-create it with --update-baseline")
+        sys.exit(2)
+    if baseline["mode"] != run["mode"]:
+        print(f"Warning: comparing a {run['mode']} run against a {baseline['mode']} baseline")
+
+    rows = compare(baseline, run, {
+        "tokens": args.token_tolerance,
+        "calls": args.calls_tolerance,
+        "latency": args.latency_tolerance,
+        "latency_floor_ms": args.latency_floor_ms,
+    })
+    print(f"Baseline from {baseline['created_at']} (commit {baseline.get('git_commit')}), current commit {run['git_commit']}")
+    print(format_report(rows, args.show_all))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({"baseline": args.baseline, "run": run, "rows": rows}, f, indent=4)
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s)")
+        sys.exit(1)
+    print("No regressions")
+
+if __name__ == "__main__":
+    main()
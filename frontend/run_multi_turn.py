@@ -0,0 +1,278 @@
+"""
+Multi-turn task completion suite for the chat agent.
+
+Drives ChatAgent through scripted conversations until every required slot of the scenario's
+intent is filled, and reports how many turns, LLM calls, tokens and how much wall time it took,
+per scenario and per intent. This is the end-to-end efficiency of the pipeline: a change that
+saves one LLM call per turn but needs an extra turn to complete a booking is a regression.
+
+A scenario has an opening message and scripted user replies keyed by slot. After every turn the
+follow-up questions are mapped to slots and the user answers all the questions it has a reply
+for in one message. If none of the questions can be answered, the user volunteers the reply for
+a required slot that is still missing. The scenario ends when all required slots are filled,
+when the user has nothing left to say or after --max-turns turns.
+
+Scenario format ({"scenarios": [...]}):
+    {"id": "MT001", "intent": "dining", "opening": "Book a table for dinner tomorrow",
+     "replies": {"time": "at 8 pm", "party_size": "4 people", "location": "in Bandra"}}
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+sys.path.append("../")
+
+from personal_bot.utils.intent_utils import INTENT_REGISTRY, NOT_SPECIFIED
+
+# Words of a follow-up question pointing at a slot, on top of the slot name itself
+TOPIC_KEYWORDS = {
+    "date": ["which date", "which day", "what date", "when"],
+    "time": ["what time", "time"],
+    "location": ["where", "restaurant", "area", "location", "dine"],
+    "party_size": ["how many", "people", "guests", "attending"],
+    "cuisine": ["cuisine", "food"],
+    "budget": ["budget", "price", "spend", "cost", "expensive"],
+    "special_requests": ["special request", "preference", "requests"],
+    "location_from": ["travelling from", "traveling from", "starting", "depart from", "from where"],
+    "location_to": ["travel to", "destination", "going to"],
+    "start_date": ["start", "leave", "departure", "when"],
+    "end_date": ["return", "returning", "end date", "coming back"],
+    "mode": ["mode", "flight", "train"],
+    "members": ["how many", "people", "travellers", "travelers", "passengers"],
+    "pickup_location": ["pick you up", "pickup", "pick-up", "pick up"],
+    "drop_off_location": ["drop", "dropped", "destination"],
+    "recipient": ["who is the gift", "who", "recipient"],
+    "occasion": ["occasion"],
+}
+
+
+def question_topic(question, intent_class):
+    """
+    Map a follow-up question to the slot it asks about.
+
+    Args:
+        question (str): The follow-up question
+        intent_class (type): The intent class of the scenario
+
+    Returns:
+        str: The slot name, None if the question does not match any slot of the intent
+    """
+    lowered = question.lower()
+    best, best_score = None, 0
+    for key in intent_class.keys:
+        if question == intent_class.questions[key]:
+            return key
+        score = 3 if key.replace("_", " ") in lowered else 0
+        score += sum(1 for keyword in TOPIC_KEYWORDS.get(key, ()) if keyword in lowered)
+        if score > best_score:
+            best, best_score = key, score
+    return best
+
+
+def response_intent(response, intent_class):
+    """
+    Returns the intent of the scenario as filled after a turn, from the key entities of the
+    response. The agent drops a request from the session once it is complete or the user moved
+    on, so the response is the only place the collected slots are still visible.
+    """
+    intent = intent_class()
+    if not isinstance(response, dict):
+        return intent
+    for sub_response in response.get("intents") or [response]:
+        if isinstance(sub_response, dict) and sub_response.get("intent_category") == intent_class.intent_name:
+            entities = sub_response.get("key_entities")
+            if isinstance(entities, dict):
+                intent.update_info(entities)
+            break
+    return intent
+
+
+def filled_slots(intent):
+    """Returns the slots of the intent that hold a value."""
+    return {key for key, value in intent.get_normalized_info().items() if value != NOT_SPECIFIED}
+
+
+def run_scenario(chat_agent, scenario, max_turns):
+    """
+    Run one scenario in a fresh session.
+
+    Returns:
+        dict: Result of the scenario with its transcript
+    """
+    from chat_agent import summary_updater
+
+    intent_class = INTENT_REGISTRY[scenario["intent"]]
+    replies = dict(scenario.get("replies", {}))
+    chat_agent.reset_session()
+    ledger_before = dict(chat_agent.ledger.totals)
+    summary_updates_before = summary_updater.stats["updates"]
+
+    result = {
+        "id": scenario["id"],
+        "intent": scenario["intent"],
+        "completed": False,
+        "turns": 0,
+        "llm_calls": 0,
+        "questions_asked": 0,
+        "redundant_questions": 0,
+        "volunteered_replies": 0,
+        "errors": 0,
+        "transcript": [],
+    }
+    query = scenario["opening"]
+    intent = intent_class()
+    start = time.perf_counter()
+    while query is not None and result["turns"] < max_turns:
+        filled_before = filled_slots(intent)
+        try:
+            response = chat_agent.get_response(query)
+        except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+            result["errors"] += 1
+        result["turns"] += 1
+        usage = chat_agent.last_turn_usage
+        result["llm_calls"] += len(usage.entries) if usage is not None else 0
+
+        questions = response.get("follow_up_questions") if isinstance(response, dict) else None
+        questions = questions if isinstance(questions, list) else []
+        topics = [question_topic(question, intent_class) for question in questions]
+        result["questions_asked"] += len(questions)
+        # Questions about slots the user had already filled before the turn
+        result["redundant_questions"] += sum(1 for topic in topics if topic in filled_before)
+        result["transcript"].append({
+            "query": query,
+            "intent_category": response.get("intent_category") if isinstance(response, dict) else None,
+            "follow_up_questions": questions,
+            "topics": topics,
+        })
+
+        intent = response_intent(response, intent_class)
+        missing = intent.get_missing_required_info()
+        if not missing:
+            result["completed"] = True
+            break
+
+        answers = [replies.pop(topic) for topic in dict.fromkeys(topics) if topic in replies]
+        if not answers:
+            volunteered = next((slot for slot in missing if slot in replies), None)
+            if volunteered is not None:
+                answers = [replies.pop(volunteered)]
+                result["volunteered_replies"] += 1
+        query = ", ".join(answers) if answers else None
+
+    # Summary updates run in the background and count towards the cost of the conversation
+    summary_updater.wait(timeout=30)
+    result["wall_time_s"] = round(time.perf_counter() - start, 3)
+    result["background_llm_calls"] = summary_updater.stats["updates"] - summary_updates_before
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        result[key] = chat_agent.ledger.totals[key] - ledger_before[key]
+    result["missing_slots"] = intent.get_missing_required_info()
+    return result
+
+
+def summarize(results):
+    """Returns the mean cost per scenario of a group of results, completion costs over completed scenarios only."""
+    completed = [result for result in results if result["completed"]]
+    summary = {
+        "scenarios": len(results),
+        "completion_rate": round(len(completed) / len(results), 3) if results else None,
+    }
+    for key in ("turns", "llm_calls", "background_llm_calls", "total_tokens", "wall_time_s", "redundant_questions"):
+        summary[f"mean_{key}"] = round(statistics.mean(result[key] for result in completed), 3) if completed else None
+    return summary
+
+
+def format_report(results, intents, overall):
+    lines = [f"{'scenario':<10}{'intent':<14}{'done':>6}{'turns':>7}{'calls':>7}{'bg':>5}{'tokens':>9}{'wall s':>9}{'redundant':>11}"]
+    for result in results:
+        lines.append(
+            f"{result['id']:<10}{result['intent']:<14}{'yes' if result['completed'] else 'no':>6}{result['turns']:>7}"
+            f"{result['llm_calls']:>7}{result['background_llm_calls']:>5}{result['total_tokens']:>9}{result['wall_time_s']:>9}"
+            f"{result['redundant_questions']:>11}"
+        )
+    lines.append("")
+    lines.append(f"{'intent':<14}{'completed':>10}{'turns':>8}{'calls':>8}{'bg':>6}{'tokens':>10}{'wall s':>9}")
+    for intent, summary in list(intents.items()) + [("all", overall)]:
+        lines.append(
+            f"{intent:<14}{summary['completion_rate']:>10}{str(summary['mean_turns']):>8}{str(summary['mean_llm_calls']):>8}"
+            f"{str(summary['mean_background_llm_calls']):>6}{str(summary['mean_total_tokens']):>10}{str(summary['mean_wall_time_s']):>9}"
+        )
+    return "\n".join(lines)
+
+
+def compare(previous, intents, overall):
+    """Returns the lines comparing the per intent means with a previous report."""
+    lines = [f"Compared with {previous.get('created_at')}:"]
+    previous_groups = {**previous.get("intents", {}), "all": previous.get("overall", {})}
+    for intent, summary in list(intents.items()) + [("all", overall)]:
+        before = previous_groups.get(intent)
+        if not before:
+            continue
+        changes = []
+        for key in ("completion_rate", "mean_turns", "mean_llm_calls", "mean_total_tokens", "mean_wall_time_s"):
+            if summary.get(key) is not None and before.get(key) is not None and summary[key] != before[key]:
+                changes.append(f"{key} {before[key]} -> {summary[key]}")
+        lines.append(f"  {intent:<14}{', '.join(changes) or 'unchanged'}")
+    return "\n".join(lines)
+
+
+def run_scenarios(scenarios_path, output_dir, max_turns, compare_path=None):
+    from chat_agent import ChatAgent
+
+    with open(scenarios_path, 'r') as f:
+        scenarios = json.load(f)['scenarios']
+
+    chat_agent = ChatAgent()
+    results = []
+    for scenario in scenarios:
+        result = run_scenario(chat_agent, scenario, max_turns)
+        print(f"Scenario {result['id']} ({result['intent']}): {'completed' if result['completed'] else 'not completed'} "
+              f"in {result['turns']} turns, {result['llm_calls']} LLM calls, {result['total_tokens']} tokens")
+        results.append(result)
+
+    intents = {}
+    for intent in dict.fromkeys(result["intent"] for result in results):
+        intents[intent] = summarize([result for result in results if result["intent"] == intent])
+    overall = summarize(results)
+    print(format_report(results, intents, overall))
+
+    if compare_path:
+        with open(compare_path, 'r') as f:
+            print(compare(json.load(f), intents, overall))
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, 'multi_turn_results.json')
+    with open(output_file, 'w') as f:
+        json.dump({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scenarios_path": scenarios_path,
+            "max_turns": max_turns,
+            "overall": overall,
+            "intents": intents,
+            "results": results,
+        }, f, indent=4)
+    print(f"Multi-turn results have been saved to {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run scripted multi-turn conversations and report turns, LLM calls and tokens to task completion')
+    parser.add_argument('--scenarios', '-s',
+                      default='../test_cases/multi_turn_scenarios.json',
+                      help='Path to the multi-turn scenarios JSON file (default: ../test_cases/multi_turn_scenarios.json)')
+    parser.add_argument('--output-dir', '-o',
+                      default='../test_results',
+                      help='Directory to save the results (default: ../test_results)')
+    parser.add_argument('--max-turns', type=int, default=8,
+                      help='Turns after which a scenario counts as not completed (default: 8)')
+    parser.add_argument('--compare',
+                      help='Previous multi_turn_results.json to compare the per intent means with')
+
+    args = parser.parse_args()
+
+    run_scenarios(args.scenarios, args.output_dir, args.max_turns, args.compare)
+
+if __name__ == "__main__":
+    main()
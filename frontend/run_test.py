@@ -1,11 +1,44 @@
 import json
 import os
+import sys
 import argparse
-from chat_agent import ChatAgent
+from chat_agent import ChatAgent, summary_updater
+sys.path.append("../")
 
-def run_tests(test_cases_path, output_dir):
+from personal_bot.utils.profiler import SamplingProfiler, ProfileResult
+
+# (stage, path, function) rules for the profiler, the innermost matching frame decides the stage
+PROFILE_STAGES = [
+    ("prompt_render", "langchain_core/prompts/", None),
+    ("json_parse", "chat_agent.py", "parse_json_response"),
+    ("logging", "/logging/", None),
+    ("session_store", "personal_bot/session_store.py", None),
+    ("token_ledger", "personal_bot/token_ledger.py", None),
+    ("interaction_log", "personal_bot/interaction_log.py", None),
+    ("fast_path", "personal_bot/utils/fast_path.py", None),
+    ("context", "chat_agent.py", "get_contextual_query_response"),
+    ("intent", "chat_agent.py", "get_intents_classification_response"),
+    ("intent", "chat_agent.py", "_get_keyword_intents"),
+    ("entities", "chat_agent.py", "get_extracted_entities_response"),
+    ("follow_up", "chat_agent.py", "get_follow_up_questions"),
+    ("search_query", "chat_agent.py", "get_web_search_query"),
+    ("web_search", "chat_agent.py", "get_web_search_response"),
+    ("greetings", "chat_agent.py", "get_greetings_response"),
+    ("summary", "chat_agent.py", "_update_summary"),
+    ("summary", "personal_bot/utils/conversation_summary.py", None),
+]
+
+def run_tests(test_cases_path, output_dir, profile=False, profile_interval=0.005, isolate_cases=False):
     # Initialize the chat agent
     chat_agent = ChatAgent()
+
+    # Sample every get_response call, per test case and for the whole run
+    profiler = SamplingProfiler(PROFILE_STAGES, interval=profile_interval, default_stage='pipeline') if profile else None
+    run_profile = ProfileResult()
+    profile_summaries = {}
+    profile_dir = os.path.join(output_dir, 'profiles')
+    if profile:
+        os.makedirs(profile_dir, exist_ok=True)
     
     # Read test cases
     with open(test_cases_path, 'r') as f:
@@ -24,13 +57,28 @@ def run_tests(test_cases_path, output_dir):
         user_input = test_case['input']
         expected_intent = test_case['intent']
         
+        # Test cases run as one conversation unless every case should start from a fresh session
+        if isolate_cases:
+            chat_agent.reset_session()
+
         # Get response from chat agent
+        if profiler:
+            profiler.start()
         try:
             response = chat_agent.get_response(user_input)
         except Exception as e:
             print(f"Error in test case {test_id}: {e}")
             response = str(e)
             break
+        finally:
+            if profiler:
+                # The summary update runs in the background after the response, it belongs to this test case
+                summary_updater.wait(timeout=30)
+                case_profile = profiler.stop()
+                case_profile.write_collapsed(os.path.join(profile_dir, f'{test_id}.folded'))
+                profile_summaries[test_id] = case_profile.summary()
+                run_profile.merge(case_profile)
+                print(case_profile.format_table(f"Test case {test_id}"))
         
         # Store the result
         result = {
@@ -44,6 +92,13 @@ def run_tests(test_cases_path, output_dir):
     
     print(f"Test results have been saved to {output_file}")
 
+    if profile:
+        run_profile.write_collapsed(os.path.join(profile_dir, 'all.folded'))
+        with open(os.path.join(profile_dir, 'profile_summary.json'), 'w') as f:
+            json.dump({'run': run_profile.summary(), 'test_cases': profile_summaries}, f, indent=4)
+        print(run_profile.format_table("Whole run"))
+        print(f"Profiles have been saved to {profile_dir}")
+
 def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Run chat agent tests with specified test cases file and output directory')
@@ -53,12 +108,18 @@ def main():
     parser.add_argument('--output-dir', '-o',
                       default='../test_results',
                       help='Directory to save test results (default: ../test_results)')
+    parser.add_argument('--profile', action='store_true',
+                      help='Profile every test case, attributing time to stages and to CPU versus network')
+    parser.add_argument('--profile-interval', type=float, default=5.0,
+                      help='Sampling interval of the profiler in milliseconds (default: 5)')
+    parser.add_argument('--isolate-cases', action='store_true',
+                      help='Run every test case in a fresh session instead of one conversation')
     
     # Parse arguments
     args = parser.parse_args()
     
     # Run tests with provided arguments
-    run_tests(args.test_cases, args.output_dir)
+    run_tests(args.test_cases, args.output_dir, args.profile, args.profile_interval / 1000, args.isolate_cases)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,101 @@
+"""
+Speculative pipelining report for the chat agent.
+
+Runs the same multi-turn conversations twice, with speculative classification and extraction
+off and on, and reports per turn how often the speculative calls were committed, how much
+latency they saved and how many extra LLM calls the discarded ones cost.
+
+Use a latency that looks like the real API to get meaningful numbers offline:
+    LLM_BACKEND=fake FAKE_LLM_LATENCY=0.3 python speculation_report.py
+"""
+
+import sys
+import json
+import time
+import argparse
+sys.path.append("../")
+
+from load_test import load_conversations, percentile
+
+
+def run_conversations(conversations, speculative):
+    """
+    Run every conversation in its own session.
+
+    Returns:
+        tuple: (per turn dicts with latency (s), llm_calls and the agent's speculation outcome,
+            LLM calls of discarded speculative calls, which are not part of any turn's usage)
+    """
+    from chat_agent import ChatAgent, speculation_stats
+
+    wasted_before = speculation_stats["wasted_calls"]
+    chat_agent = ChatAgent(speculative=speculative)
+    turns = []
+    for conversation in conversations:
+        chat_agent.reset_session()
+        for query in conversation["turns"]:
+            start = time.perf_counter()
+            try:
+                chat_agent.get_response(query)
+            except Exception as e:
+                print(f"Error in conversation {conversation['id']}: {type(e).__name__}: {e}")
+                continue
+            usage = chat_agent.last_turn_usage
+            turns.append({
+                "latency": time.perf_counter() - start,
+                "llm_calls": len(usage.entries) if usage is not None else 0,
+                "speculation": chat_agent.last_speculation if speculative else None,
+            })
+    return turns, speculation_stats["wasted_calls"] - wasted_before
+
+
+def summarize(turns, wasted_calls=0):
+    latencies = [turn["latency"] for turn in turns]
+    summary = {
+        "turns": len(turns),
+        "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+        "latency_p90_ms": round(percentile(latencies, 0.9) * 1000, 1) if latencies else None,
+        "llm_calls_per_turn": round((sum(turn["llm_calls"] for turn in turns) + wasted_calls) / len(turns), 2) if turns else None,
+    }
+    speculations = [turn["speculation"] for turn in turns if turn["speculation"]]
+    if speculations:
+        for stage in ("classification", "extraction"):
+            results = [speculation[stage] for speculation in speculations if stage in speculation]
+            summary[f"{stage}_speculated"] = len(results)
+            summary[f"{stage}_hit_rate"] = round(results.count("hit") / len(results), 3) if results else None
+        summary["saved_ms_per_turn"] = round(sum(speculation["saved_ms"] for speculation in speculations) / len(speculations), 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare turn latency and LLM calls with speculative classification and extraction off and on')
+    parser.add_argument('--conversations', '-c', default='../test_cases/load_conversations.json',
+                      help='Conversation scripts (.json), text file or SQLite session store to replay (default: ../test_cases/load_conversations.json)')
+    parser.add_argument('--output', '-o', help='Write both summaries to this JSON file')
+
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.conversations)
+    if not conversations:
+        parser.error(f"No conversations found in {args.conversations}")
+
+    from chat_agent import speculation_stats
+
+    baseline = summarize(*run_conversations(conversations, speculative=False))
+    speculative = summarize(*run_conversations(conversations, speculative=True))
+
+    print(f"{'':<28}{'off':>12}{'on':>12}")
+    for key in ("turns", "latency_p50_ms", "latency_p90_ms", "llm_calls_per_turn"):
+        print(f"{key:<28}{str(baseline[key]):>12}{str(speculative[key]):>12}")
+    for key in ("classification_speculated", "classification_hit_rate", "extraction_speculated", "extraction_hit_rate", "saved_ms_per_turn"):
+        print(f"{key:<28}{'':>12}{str(speculative.get(key)):>12}")
+    print(f"Discarded speculative calls: {speculation_stats['cancelled']} cancelled, {speculation_stats['wasted']} wasted "
+          f"({speculation_stats['wasted_calls']} LLM calls, {speculation_stats['wasted_tokens']} tokens)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"off": baseline, "on": speculative, "discarded": dict(speculation_stats)}, f, indent=4)
+        print(f"Report has been saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Startup benchmark for the chat agent.
+
+Measures the cold start of a fresh worker process in two parts:
+- An import time report of `import chat_agent` based on `python -X importtime`
+- Time to construct ChatAgent, optionally the warm-up time, and time to the first response in a fresh interpreter
+
+Every run is appended to a JSONL history file and compared with the previous run, so cold
+start regressions show up as soon as they are introduced.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+FRONTEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_TIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+FIRST_RESPONSE_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import chat_agent
+imported = time.perf_counter()
+agent = chat_agent.ChatAgent()
+constructed = time.perf_counter()
+timings = {"import_s": imported - start, "construct_s": constructed - imported}
+if __WARM_UP__:
+    chat_agent.warm_up(synthetic_turn=__WARMUP_TURN__)
+    timings["warmup_s"] = time.perf_counter() - constructed
+    constructed = time.perf_counter()
+query = __QUERY__
+if query:
+    agent.get_response(query)
+    timings["first_response_s"] = time.perf_counter() - constructed
+timings["time_to_first_response_s"] = time.perf_counter() - start
+print("STARTUP_TIMINGS " + json.dumps(timings))
+"""
+
+
+def measure_import_time(top_n):
+    """
+    Runs `python -X importtime -c "import chat_agent"` and parses its report.
+
+    Returns:
+        dict: Total import time of chat_agent and its slowest direct imports by cumulative time
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import chat_agent"],
+        cwd=FRONTEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing chat_agent failed:\n{result.stderr[-2000:]}")
+
+    total_ms = 0.0
+    children = []
+    direct_imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entry = {"module": module, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000}
+        # Children are printed before their parent, one space marks a top level import and
+        # every nesting level adds two more
+        if len(indent) == 3:
+            children.append(entry)
+        elif len(indent) == 1:
+            if module == "chat_agent":
+                total_ms = entry["cumulative_ms"]
+                direct_imports = children
+            children = []
+
+    slowest = sorted(direct_imports, key=lambda entry: entry["cumulative_ms"], reverse=True)[:top_n]
+    return {"total_import_ms": round(total_ms, 1), "slowest_imports": slowest}
+
+
+def measure_first_response(query, warm_up=False, warmup_turn=False):
+    """
+    Imports chat_agent, builds ChatAgent, optionally warms the process up and answers one query in a fresh interpreter.
+
+    Returns:
+        dict: Timings in seconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RESPONSE_SCRIPT.replace("__QUERY__", repr(query)).replace("__WARM_UP__", repr(warm_up)).replace("__WARMUP_TURN__", repr(warmup_turn))],
+        cwd=FRONTEND_DIR, capture_output=True, text=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP_TIMINGS "):
+            return {key: round(value, 4) for key, value in json.loads(line.split(" ", 1)[1]).items()}
+    raise RuntimeError(f"First response measurement failed:\n{result.stderr[-2000:]}")
+
+
+def load_previous_run(history_path):
+    if not os.path.exists(history_path):
+        return None
+    with open(history_path, 'r') as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def run_benchmark(history_path, query, repeat, top_n, warm_up=False, warmup_turn=False):
+    import_runs = [measure_import_time(top_n) for _ in range(repeat)]
+    best_import = min(import_runs, key=lambda run: run["total_import_ms"])
+    first_response_runs = [measure_first_response(query, warm_up, warmup_turn) for _ in range(repeat)]
+    best_first_response = min(first_response_runs, key=lambda run: run["time_to_first_response_s"])
+
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "query": query,
+        "warm_up": "turn" if warmup_turn else bool(warm_up),
+        **best_import,
+        **best_first_response,
+    }
+
+    print(f"Total import time of chat_agent: {run['total_import_ms']:.1f} ms")
+    print("Slowest direct imports:")
+    for entry in run["slowest_imports"]:
+        print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+    for key in ["import_s", "construct_s", "warmup_s", "first_response_s", "time_to_first_response_s"]:
+        if key in run:
+            print(f"{key:<26} {run[key]:.4f}")
+
+    previous = load_previous_run(history_path)
+    if previous and previous.get("warm_up", False) != run["warm_up"]:
+        print(f"The previous run from {previous['timestamp']} used warm-up {previous.get('warm_up', False)}, not comparing")
+    elif previous:
+        print(f"Compared with the previous run from {previous['timestamp']}:")
+        for key in ["total_import_ms", "import_s", "construct_s", "warmup_s", "first_response_s", "time_to_first_response_s"]:
+            if key in run and key in previous:
+                print(f"  {key:<26} {previous[key]:>10.4f} -> {run[key]:>10.4f} ({run[key] - previous[key]:+.4f})")
+
+    os.makedirs(os.path.dirname(os.path.abspath(history_path)), exist_ok=True)
+    with open(history_path, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+
+    print(f"Startup benchmark has been appended to {history_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure chat agent import time and time to first response')
+    parser.add_argument('--history', default='../test_results/startup_benchmarks.jsonl',
+                      help='JSONL file the results are appended to (default: ../test_results/startup_benchmarks.jsonl)')
+    parser.add_argument('--query', '-q', default='',
+                      help='Query answered to measure time to first response, needs a working LLM backend (default: none)')
+    parser.add_argument('--repeat', '-r', type=int, default=3,
+                      help='Number of fresh processes per measurement, the fastest is reported (default: 3)')
+    parser.add_argument('--warm-up', action='store_true',
+                      help='Run the worker warm-up before the query, first_response_s is then the first turn of a warm process')
+    parser.add_argument('--warm-up-turn', action='store_true',
+                      help='Include a synthetic turn in the warm-up (implies --warm-up)')
+    parser.add_argument('--top', type=int, default=10,
+                      help='Number of slowest direct imports to report (default: 10)')
+
+    args = parser.parse_args()
+
+    run_benchmark(args.history, args.query, args.repeat, args.top, args.warm_up or args.warm_up_turn, args.warm_up_turn)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Token usage report.
+
+Aggregates the token ledger written by the chat agent (TOKEN_LEDGER_PATH) into calls, turns,
+prompt and completion tokens and cost per intent, or per chain, model or session.
+"""
+
+import sys
+import json
+import argparse
+from collections import defaultdict
+sys.path.append("../")
+
+from personal_bot.token_ledger import load_ledger
+
+
+def aggregate(entries, group_by):
+    """
+    Aggregate ledger entries by one entry field.
+
+    Args:
+        entries (list): Ledger entry dicts
+        group_by (str): Entry field to group by, e.g. "intent" or "chain"
+
+    Returns:
+        list: One row dict per group, the most expensive group first
+    """
+    groups = defaultdict(lambda: {"calls": 0, "turns": set(), "prompt_tokens": 0, "completion_tokens": 0,
+                                  "total_tokens": 0, "cost": 0.0, "estimated_calls": 0})
+    for entry in entries:
+        group = groups[entry.get(group_by) or "unknown"]
+        group["calls"] += 1
+        group["turns"].add(entry.get("turn_id"))
+        for key in ["prompt_tokens", "completion_tokens", "total_tokens", "cost"]:
+            group[key] += entry.get(key, 0)
+        group["estimated_calls"] += bool(entry.get("estimated"))
+
+    rows = []
+    for name, group in groups.items():
+        turns = len(group.pop("turns"))
+        rows.append({
+            group_by: name,
+            **group,
+            "turns": turns,
+            "tokens_per_turn": round(group["total_tokens"] / turns, 1) if turns else 0,
+            "cost_per_turn": group["cost"] / turns if turns else 0,
+        })
+    return sorted(rows, key=lambda row: (row["cost"], row["total_tokens"]), reverse=True)
+
+
+def print_report(rows, group_by):
+    header = f"{group_by:<28} {'turns':>7} {'calls':>7} {'prompt':>10} {'completion':>11} {'tokens/turn':>12} {'cost USD':>11} {'USD/turn':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{str(row[group_by]):<28} {row['turns']:>7} {row['calls']:>7} {row['prompt_tokens']:>10} "
+            f"{row['completion_tokens']:>11} {row['tokens_per_turn']:>12} {row['cost']:>11.5f} {row['cost_per_turn']:>10.6f}"
+        )
+    estimated = sum(row["estimated_calls"] for row in rows)
+    if estimated:
+        print(f"\n{estimated} calls had no provider usage and were estimated locally")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report token usage and cost from the token ledger')
+    parser.add_argument('--ledger', '-l', required=True,
+                      help='Token ledger JSONL file (TOKEN_LEDGER_PATH of the chat agent)')
+    parser.add_argument('--by', default='intent', choices=['intent', 'chain', 'model', 'session_id'],
+                      help='Field to aggregate by (default: intent)')
+    parser.add_argument('--output', '-o',
+                      help='Also write the report rows to this JSON file')
+
+    args = parser.parse_args()
+
+    rows = aggregate(load_ledger(args.ledger), args.by)
+    print_report(rows, args.by)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"Report has been saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
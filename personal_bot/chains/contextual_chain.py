@@ -25,12 +25,12 @@ def contextual_query_chain():
     centextual_query_prompt = PromptTemplate(
             input_variables=["input"],
             template="""Instructions:
-You are a highly intelligent chatbot that recognizes and replaces contextual words in queries with fully self-contained terms using the last five messages (combined from both user and assistant). Your goal is to ensure that all references are explicit and unambiguous before processing.
+You are a highly intelligent chatbot that recognizes and replaces contextual words in queries with fully self-contained terms using the context: a summary of the conversation so far and the previous user message. Your goal is to ensure that all references are explicit and unambiguous before processing.
 
 Guidelines:
 
 1. Detect Contextual References: Identify words or phrases like "that feature," "those colors," "it," or "such options" that depend on previous messages for clarity.
-2. Retrieve Relevant Context: Extract the most relevant details from the last five messages (both user and assistant) that clarify the ambiguous references.
+2. Retrieve Relevant Context: Extract the most relevant details from the context (the summary and the previous message) that clarify the ambiguous references.
 3. Replace Contextual Words: Substitute only the ambiguous references with explicit details from the retrieved context while keeping the rest of the query unchanged.
 
 Ensure Clarity: The final query should be fully understandable on its own without requiring any external context.
@@ -75,6 +75,19 @@ Response:
 
 c.
 
+Context:
+Summary: The user wants a table for 4 at an Italian restaurant in Bandra tomorrow at 8 PM. The user also asked for a cab to the airport on Friday.
+User: "Book the cab for 6 AM."
+
+query: "Move the restaurant booking to 9 PM."
+
+Response:
+{{
+    "response": "Move the table for 4 at the Italian restaurant in Bandra tomorrow to 9 PM."
+}}
+
+c.
+
 Context:
 User: "Suggest a few weekend getaways near Mumbai."
 
@@ -42,6 +42,7 @@ Your task is:
 2. For fields with value = None, generate a follow-up question to ask for that information.
 3. For fields with vague, unclear or ambiguous values, ask the user to clarify.
 4. If a field is already filled and clearly understood, skip it — DO NOT ask again.
+   Fields that are not in the dictionary have already been understood — DO NOT ask about them.
 5. If the user provides the location, be it destination, pickup or drop off location, in an ambiguos manner (eg: my place, friend's house, office, etc.), ask for the exact location.
 6. Ask questions in a natural, friendly tone, based on the user’s original query.
 7. Do not add any explanation or extra text, output only valid JSON.
@@ -44,6 +44,18 @@ NOTE: Output your answer strictly in this JSON format:
   "confidence_score": <float between 0 and 1>
 }}
 
+If the user asks for more than one thing in the same message (for example a table and a cab), use the first request as "intent_category" and also add an "intents" list with one entry per request, in the order they were asked. The "span" is the part of the user input that belongs to that request:
+
+{{
+  "intent_category": "<category of the first request>",
+  "confidence_score": <float between 0 and 1>,
+  "intents": [
+    {{"intent_category": "<category>", "confidence_score": <float between 0 and 1>, "span": "<part of the user input>"}}
+  ]
+}}
+
+Leave out "intents" when the user asks for only one thing.
+
 DO NOT include any explanation or text outside the JSON.
 
 Examples:
@@ -165,6 +177,19 @@ Response:
   "confidence_score": 0.86
 }}
 
+Example 14:
+User: "Book a table for dinner at 8 and then a cab to go there"
+
+Response:
+{{
+  "intent_category": "dining",
+  "confidence_score": 0.9,
+  "intents": [
+    {{"intent_category": "dining", "confidence_score": 0.92, "span": "Book a table for dinner at 8"}},
+    {{"intent_category": "cab_booking", "confidence_score": 0.87, "span": "a cab to go there"}}
+  ]
+}}
+
 Now, classify the following user input:
 
 User: {query}
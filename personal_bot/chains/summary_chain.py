@@ -0,0 +1,61 @@
+"""
+Conversation Summary Chain
+
+This module implements a chain that folds the latest messages of a conversation into a rolling summary.
+The summary is updated in the background after a response has been returned and is read by the
+contextual query chain to resolve references to earlier turns.
+
+Key functionalities:
+- Updates an existing summary with new messages instead of re-reading the whole conversation
+- Keeps the names, places, dates, counts and preferences that later turns may refer to
+- Keeps the summary short so the context block has a fixed size
+"""
+
+from langchain.chains import LLMChain
+from langchain.prompts import PromptTemplate
+import sys
+sys.path.append("./personal_bot")
+from ..get_llm import get_llm
+
+def summary_chain():
+    llm = get_llm("llama-3.1-8b-instant", temperature=0.2, max_tokens=400)
+
+    summary_prompt = PromptTemplate(
+        input_variables=["input"],
+        template="""Instructions:
+You maintain a rolling summary of a conversation between a user and an assistant that books tables, trips, cabs and gifts and searches the web.
+Update the current summary with the new messages.
+
+Guidelines:
+
+1. Keep every detail a later message may refer back to: restaurants, places, dates, times, people counts, budgets, names, preferences and the requests the user made.
+2. Prefer the newest information when it contradicts the summary.
+3. Drop greetings, thanks and small talk.
+4. Write plain sentences in the third person ("The user wants ..."), at most 120 words.
+
+Example:
+
+Current summary:
+The user wants a table for 4 at an Italian restaurant in Bandra tomorrow.
+
+New messages:
+User: make it 8 pm instead
+Assistant: dining request, time: 8 PM
+
+Response:
+{{
+    "response": "The user wants a table for 4 at an Italian restaurant in Bandra tomorrow at 8 PM."
+}}
+
+Final Output Format:
+Return the updated summary strictly as a JSON object with the key "response" as shown in the example above. There should be no extra words before or after the JSON object.
+
+{input}
+
+"""
+    )
+
+    # No BotMemory, the summary runs in the background for any session and must not mix into the shared buffer
+    summary_chain = LLMChain(llm=llm, prompt=summary_prompt)
+
+    return summary_chain
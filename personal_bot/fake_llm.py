@@ -0,0 +1,225 @@
+"""
+Fake LLM
+
+This module implements a local stand-in for the Groq chat model.
+It recognises which chain a prompt belongs to and returns a plausible JSON answer in the
+format that chain expects, so the whole pipeline can run offline for load tests and demos.
+
+Key functionalities:
+- Deterministic keyword based answers for every chain in personal_bot/chains (see utils/keyword_intent.py)
+- Contextual rewrites that tie bare follow-up answers to the request they answer
+- Configurable artificial latency
+- Token usage reported in the same shape as the Groq client
+"""
+
+import re
+import json
+import time
+import random
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from .token_ledger import estimate_tokens
+from .utils.keyword_intent import classify_intent_keywords, split_intents_keywords
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+
+
+def extract_entities_keywords(query, keys):
+    """
+    Keyword and regex based entity extraction for the keys of an intent.
+
+    Args:
+        query (str): The user query
+        keys (list): Entity keys to extract
+
+    Returns:
+        dict: Extracted entities, missing entities are omitted
+    """
+    entities = {}
+    lowered = query.lower()
+
+    count = re.search(r"\b(\d+|" + "|".join(NUMBER_WORDS) + r")\s+(people|persons|guests|members|adults|of us)\b", lowered)
+    if count:
+        value = count.group(1)
+        value = str(NUMBER_WORDS.get(value, value))
+        for key in ("party_size", "members"):
+            if key in keys:
+                entities[key] = value
+
+    for budget in re.finditer(r"(?:budget(?: of| around| is)?|under|within|for|worth)\s*(?:rs\.?|inr|₹)?\s*(\d[\d,]*)\s*(rupees|inr|rs)?", lowered):
+        if "budget" in keys and (budget.group(2) or "budget" in budget.group(0)):
+            entities["budget"] = f"{budget.group(1)} {budget.group(2) or 'rupees'}"
+            break
+
+    time_match = re.search(r"\b(\d{1,2}(?::\d{2})?\s*(?:am|pm))\b", lowered)
+    if time_match and "time" in keys:
+        entities["time"] = time_match.group(1).upper()
+
+    date_match = re.search(r"\b(today|tonight|tomorrow|this weekend|next week|next month|(?:on )?\d{1,2}(?:st|nd|rd|th)? (?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*|(?:mon|tues|wednes|thurs|fri|satur|sun)day)\b", lowered)
+    if date_match:
+        for key in ("date", "start_date"):
+            if key in keys:
+                entities[key] = date_match.group(1).replace("on ", "")
+                break
+
+    route = re.search(r"\bfrom ([\w' ]+?) to ([\w' ]+?)(?:\b(?:on|at|for|tomorrow|today|tonight|next|with|in)\b|[,.]|$)", query, re.IGNORECASE)
+    if route:
+        for source_key, target_key in (("location_from", "location_to"), ("pickup_location", "drop_off_location")):
+            if source_key in keys:
+                entities[source_key] = route.group(1).strip()
+                entities[target_key] = route.group(2).strip()
+    else:
+        destination = re.search(r"\bto (?:the )?([A-Z][\w']*(?: [A-Z][\w']*)*|airport|office|home|station|mall)", query)
+        for key in ("location_to", "drop_off_location"):
+            if destination and key in keys:
+                entities[key] = destination.group(1)
+
+    place = re.search(r"\b(?:in|at|near) ([A-Z][\w']*(?: [A-Z][\w']*)*)", query)
+    if place and "location" in keys:
+        entities["location"] = place.group(1)
+
+    cuisine = re.search(r"\b(italian|chinese|indian|mexican|thai|japanese|continental|vegan|south indian|north indian)\b", lowered)
+    if cuisine and "cuisine" in keys:
+        entities["cuisine"] = cuisine.group(1).title()
+
+    mode = re.search(r"\b(flights?|trains?|bus|car)\b", lowered)
+    if mode and "mode" in keys:
+        entities["mode"] = mode.group(1)
+
+    recipient = re.search(r"\b(?:to|for) my (\w+)", lowered)
+    if recipient and "recipient" in keys:
+        entities["recipient"] = recipient.group(1)
+
+    occasion = re.search(r"\b(birthday|anniversary|wedding|graduation|diwali|christmas|farewell)\b", lowered)
+    if occasion and "occasion" in keys:
+        entities["occasion"] = occasion.group(1)
+
+    requests = re.findall(r"\b(?:need|with|prefer) ([^,.]+?)(?=,|\.| and |$)", lowered)
+    if requests and "special_requests" in keys:
+        entities["special_requests"] = requests
+
+    return entities
+
+
+def resolve_context_keywords(context, query):
+    """
+    Ties a query without an intent of its own, such as "2000 rupees", to the latest request in the context.
+
+    Args:
+        context (str): The context block of the contextual chain prompt
+        query (str): The user query
+
+    Returns:
+        str: The query prefixed with the request it answers, unchanged if it has an intent or there is none
+    """
+    if classify_intent_keywords(query)[0] != "other":
+        return query
+    messages = re.findall(r"(?:^User: |The user said: )(.+?)(?:\.(?=\s)|\.?$)", context, re.MULTILINE)
+    for message in reversed(messages):
+        if classify_intent_keywords(message)[0] not in ("other", "greetings"):
+            return f"{message.rstrip('.')}, {query}"
+    return query
+
+
+def fake_chain_response(prompt):
+    """
+    Returns the raw text answer the fake model gives to a rendered chain prompt.
+
+    Args:
+        prompt (str): The rendered prompt
+
+    Returns:
+        str: JSON answer in the format of the chain the prompt belongs to
+    """
+    if "replaces contextual words" in prompt:
+        query = prompt.rsplit("query:", 1)[-1].strip()
+        context = prompt.rsplit("Context:\n", 1)[-1].rsplit("query:", 1)[0]
+        return json.dumps({"response": resolve_context_keywords(context, query)})
+
+    if "classify a user's natural language input" in prompt:
+        query = prompt.rsplit("User:", 1)[-1].strip()
+        intent_category, confidence_score = classify_intent_keywords(query)
+        response = {"intent_category": intent_category, "confidence_score": confidence_score}
+        intents = split_intents_keywords(query)
+        if len(intents) > 1:
+            response = {"intent_category": intents[0]["intent_category"], "confidence_score": intents[0]["confidence_score"], "intents": intents}
+        return json.dumps(response)
+
+    if "entity extraction assistant" in prompt:
+        keys_match = re.findall(r"Key Entities: (\[.*?\])", prompt)
+        keys = re.findall(r"'(\w+)'", keys_match[-1]) if keys_match else []
+        query = prompt.rsplit("User:", 1)[-1].strip()
+        return json.dumps(extract_entities_keywords(query, keys), indent=2)
+
+    if "collect missing or unclear details" in prompt:
+        info_match = re.findall(r"Info:\n(\{.*?\n\})", prompt, re.DOTALL)
+        try:
+            info = json.loads(info_match[-1]) if info_match else {}
+        except ValueError:
+            info = {}
+        questions = [
+            f"Could you tell me the {key.replace('_', ' ')}?"
+            for key, value in info.items()
+            if value in (None, "", [], "Not Specified")
+        ]
+        return json.dumps({"response": questions}, indent=2)
+
+    if "rolling summary of a conversation" in prompt:
+        summary = prompt.rsplit("Current summary:\n", 1)[-1].split("\n\nNew messages:", 1)[0].strip()
+        messages = prompt.rsplit("New messages:\n", 1)[-1]
+        sentences = [] if summary == "None" else [summary]
+        sentences += [f"The user said: {message.strip()}." for message in re.findall(r"^User: (.*)$", messages, re.MULTILINE)]
+        return json.dumps({"response": " ".join(sentences)[-600:]})
+
+    if "web search strings" in prompt:
+        query = prompt.rsplit("User:", 1)[-1].strip()
+        return json.dumps({"response": re.sub(r"[?!.]+$", "", query)})
+
+    return json.dumps({"response": ""})
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that answers chain prompts locally with `fake_chain_response`.
+
+    Attributes:
+        model_name (str): Model name reported in the LLM output
+        latency (float): Mean artificial latency per call in seconds
+        jitter (float): Maximum random deviation from the mean latency in seconds
+    """
+
+    model_name: str = "fake-llm"
+    temperature: float = 0.0
+    max_tokens: Optional[int] = None
+    latency: float = 0.0
+    jitter: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        content = fake_chain_response(prompt)
+        token_usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+        }
+        token_usage["total_tokens"] = token_usage["prompt_tokens"] + token_usage["completion_tokens"]
+        message = AIMessage(content=content, response_metadata={"token_usage": token_usage, "model_name": self.model_name})
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": token_usage, "model_name": self.model_name},
+        )
@@ -0,0 +1,239 @@
+"""
+Fault Injecting LLM
+
+This module implements a local stand-in for the Groq chat model that misbehaves on purpose.
+It answers like the fake LLM (see fake_llm.py) and injects the failures seen from the real API
+at configured rates and patterns, so the resilience of the chat agent can be measured offline.
+
+Key functionalities:
+- Latency spikes and client timeouts
+- Rate limit errors (429) and connection resets, raised as the Groq client's exceptions
+- Truncated outputs, as when a completion hits max_tokens or a stream is cut off
+- Non-JSON outputs: prose, JSON followed by more braces, broken JSON and empty answers
+- Faults drawn at random rates or in bursts, optionally only for some chains
+- Counters of the injected faults by type and chain
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from collections import Counter
+from typing import Any, List, Optional
+
+import httpx
+import groq
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from .fake_llm import FakeChatModel, fake_chain_response
+from .token_ledger import estimate_tokens
+
+FAULT_TYPES = ("latency_spike", "timeout", "rate_limit", "connection_reset", "truncate", "non_json")
+NON_JSON_MODES = ("prose", "two_objects", "broken", "empty")
+
+# Phrases of the chain prompts, used to target faults at chains
+CHAIN_MARKERS = {
+    "replaces contextual words": "contextual_query_chain",
+    "classify a user's natural language input": "intent_classifier_chain",
+    "entity extraction assistant": "extract_key_entities_chain",
+    "collect missing or unclear details": "follow_up_questions_chain",
+    "rolling summary of a conversation": "summary_chain",
+    "web search strings": "other_chain",
+}
+
+API_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+
+def detect_chain(prompt):
+    """Returns the name of the chain a rendered prompt belongs to, None if unknown."""
+    return next((chain for marker, chain in CHAIN_MARKERS.items() if marker in prompt), None)
+
+
+class Fault:
+    """
+    One kind of fault and when it fires.
+
+    A fault fires at random with probability `rate`, or deterministically in bursts of `burst_length`
+    consecutive calls every `burst_every` calls (counted per fault, over the calls it targets).
+    """
+
+    def __init__(self, type, rate=0.0, burst_every=None, burst_length=1, chains=None, seconds=None, mode=None):
+        """
+        Args:
+            type (str): One of FAULT_TYPES
+            rate (float): Probability of firing on a call
+            burst_every (int): Fire in bursts starting every this many calls instead of at random
+            burst_length (int): Consecutive calls per burst
+            chains (list): Chain names the fault applies to, all chains if not given
+            seconds (float): Added latency of latency_spike, time before timeout raises (default 3 and 10)
+            mode (str): Output of non_json, one of NON_JSON_MODES, a random one if not given
+        """
+        if type not in FAULT_TYPES:
+            raise ValueError(f"Unknown fault type {type!r}, expected one of {FAULT_TYPES}")
+        if mode is not None and mode not in NON_JSON_MODES:
+            raise ValueError(f"Unknown non_json mode {mode!r}, expected one of {NON_JSON_MODES}")
+        self.type = type
+        self.rate = rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.chains = set(chains) if chains else None
+        self.seconds = seconds if seconds is not None else {"latency_spike": 3.0, "timeout": 10.0}.get(type)
+        self.mode = mode
+        self.calls = 0
+
+    @classmethod
+    def from_dict(cls, spec):
+        spec = dict(spec)
+        burst = spec.pop("burst", None)
+        if burst:
+            spec["burst_every"] = burst["every"]
+            spec["burst_length"] = burst.get("length", 1)
+        return cls(**spec)
+
+    def fires(self, chain, rng):
+        """Returns True if the fault fires on this call, counts the call if it targets the chain."""
+        if self.chains is not None and chain not in self.chains:
+            return False
+        position = self.calls
+        self.calls += 1
+        if self.burst_every:
+            return position % self.burst_every < self.burst_length
+        return rng.random() < self.rate
+
+
+class FaultInjector:
+    """
+    Decides which fault, if any, hits each LLM call. Shared by all models in the process, so
+    rates and bursts apply to the overall call sequence.
+    """
+
+    def __init__(self, faults=(), seed=None):
+        """
+        Args:
+            faults (list): Fault instances or their dict specs, the first that fires wins
+            seed (int): Seed of the random draws, for repeatable runs
+        """
+        self.configure(faults, seed)
+
+    def configure(self, faults=(), seed=None):
+        """Replace the faults and reset the draws and the counters."""
+        self._lock = threading.Lock()
+        self.faults = [fault if isinstance(fault, Fault) else Fault.from_dict(fault) for fault in faults]
+        self.rng = random.Random(seed)
+        self.stats = Counter()
+
+    def draw(self, chain):
+        """Returns the fault that hits a call of the chain, None for a clean call."""
+        with self._lock:
+            self.stats["calls"] += 1
+            for fault in self.faults:
+                if fault.fires(chain, self.rng):
+                    self.stats[fault.type] += 1
+                    self.stats[f"{fault.type}:{chain}"] += 1
+                    return fault
+        return None
+
+    def uniform(self, low, high):
+        with self._lock:
+            return self.rng.uniform(low, high)
+
+    def choice(self, options):
+        with self._lock:
+            return self.rng.choice(options)
+
+
+def non_json_output(content, mode):
+    """Returns a malformed version of a JSON chain answer."""
+    if mode == "prose":
+        return "I'm sorry, I couldn't work out the details of that request. Could you rephrase it?"
+    if mode == "two_objects":
+        # Extra braces after the answer, a greedy {.*} match spans both and is not valid JSON
+        return f"{content}\n\nNote: I assumed the defaults {{\"confidence\": \"low\"}} where nothing was given."
+    if mode == "broken":
+        return content.rstrip().rstrip("}").rstrip() + ",\n"
+    return ""
+
+
+class FaultInjectingChatModel(FakeChatModel):
+    """
+    Fake chat model whose calls fail as configured by a FaultInjector.
+
+    Attributes:
+        injector (FaultInjector): Decides the fault of each call, the process-wide one if not given
+    """
+
+    injector: Optional[Any] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fault-injecting-chat-model"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        injector = self.injector or get_fault_injector()
+        prompt = "\n".join(str(message.content) for message in messages)
+        fault = injector.draw(detect_chain(prompt))
+
+        delay = max(0.0, self.latency + injector.uniform(-self.jitter, self.jitter)) if self.latency or self.jitter else 0.0
+        if fault is not None and fault.type == "latency_spike":
+            delay += fault.seconds
+        if fault is not None and fault.type == "timeout":
+            time.sleep(fault.seconds)
+            raise groq.APITimeoutError(request=httpx.Request("POST", API_URL))
+        if delay:
+            time.sleep(delay)
+        if fault is not None and fault.type == "rate_limit":
+            response = httpx.Response(429, headers={"retry-after": "2"}, request=httpx.Request("POST", API_URL))
+            raise groq.RateLimitError("Rate limit reached for requests (injected)", response=response, body=None)
+        if fault is not None and fault.type == "connection_reset":
+            raise groq.APIConnectionError(message="Connection reset by peer (injected)", request=httpx.Request("POST", API_URL))
+
+        content = fake_chain_response(prompt)
+        finish_reason = "stop"
+        if fault is not None and fault.type == "truncate":
+            content = content[:int(len(content) * injector.uniform(0.2, 0.9))]
+            finish_reason = "length"
+        elif fault is not None and fault.type == "non_json":
+            content = non_json_output(content, fault.mode or injector.choice(NON_JSON_MODES))
+
+        token_usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+        }
+        token_usage["total_tokens"] = token_usage["prompt_tokens"] + token_usage["completion_tokens"]
+        metadata = {"token_usage": token_usage, "model_name": self.model_name, "finish_reason": finish_reason}
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content, response_metadata=metadata))],
+            llm_output={"token_usage": token_usage, "model_name": self.model_name},
+        )
+
+
+_default_injector = None
+_default_injector_lock = threading.Lock()
+
+
+def get_fault_injector():
+    """
+    Returns the process-wide fault injector, creating it on first use.
+
+    Configured with the environment variable LLM_FAULTS, a JSON object such as
+    {"seed": 7, "faults": [{"type": "rate_limit", "rate": 0.1}]} or the path of a file holding one.
+    """
+    global _default_injector
+    if _default_injector is None:
+        with _default_injector_lock:
+            if _default_injector is None:
+                config = os.getenv("LLM_FAULTS", "")
+                if config and not config.lstrip().startswith("{"):
+                    with open(config, "r") as f:
+                        config = f.read()
+                config = json.loads(config) if config else {}
+                _default_injector = FaultInjector(config.get("faults", ()), config.get("seed"))
+    return _default_injector
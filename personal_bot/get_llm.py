@@ -9,11 +9,14 @@ Key functionalities:
 - Configures LLM parameters
 - Creates and returns LLM instance
 - Manages API key security
+- Switches to the local fake LLM when LLM_BACKEND=fake, or to the fault injecting one when LLM_BACKEND=faults
+- Shares one pooled HTTP client between all models, so connections are reused across chains
 """
 
 from langchain_groq import ChatGroq
 import os
 import httpx
+import threading
 from dotenv import load_dotenv
 import logging
 
@@ -25,14 +28,84 @@ load_dotenv("../personal_bot/.env")
 
 groq_api_key = os.getenv("GROQ_API_KEY")
 
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    Returns the process-wide HTTP client of the Groq models, creating it on first use.
+
+    Its connection pool is sized with LLM_HTTP_MAX_CONNECTIONS (default 32), idle connections are
+    kept alive for LLM_HTTP_KEEPALIVE seconds (default 60).
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                max_connections = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "32"))
+                _http_client = httpx.Client(
+                    verify=False,
+                    limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_connections,
+                        keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE", "60")),
+                    ),
+                )
+    return _http_client
+
+
+def warm_connections(connections=1, timeout=5.0):
+    """
+    Open pooled connections to the Groq API ahead of the first LLM call, so the first turn does not
+    pay for DNS, TCP and TLS setup. Does nothing with the fake backend.
+
+    Args:
+        connections (int): Number of connections to open
+        timeout (float): Timeout of each request in seconds
+
+    Returns:
+        int: Number of connections opened
+    """
+    if os.getenv("LLM_BACKEND", "groq") in ("fake", "faults"):
+        return 0
+    client = get_http_client()
+    base_url = os.getenv("GROQ_API_BASE") or "https://api.groq.com"
+    streams = []
+    try:
+        # Held open together, so every request gets its own connection instead of reusing the first one
+        for _ in range(connections):
+            stream = client.stream("HEAD", base_url, timeout=timeout)
+            stream.__enter__()
+            streams.append(stream)
+    finally:
+        for stream in streams:
+            stream.__exit__(None, None, None)
+    return len(streams)
+
+
 def get_llm(model_name="llama3-70b-8192", temperature=0.5, stop_words=None, max_tokens=512):
+    backend = os.getenv("LLM_BACKEND", "groq")
+    if backend in ("fake", "faults"):
+        if backend == "faults":
+            from .fault_llm import FaultInjectingChatModel as model_class
+        else:
+            from .fake_llm import FakeChatModel as model_class
+        return model_class(
+            model_name=model_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            latency=float(os.getenv("FAKE_LLM_LATENCY", "0")),
+            jitter=float(os.getenv("FAKE_LLM_JITTER", "0")),
+        )
+
     model = ChatGroq(
         model_name=model_name,
         temperature=temperature,
         stop=stop_words,
         max_tokens=max_tokens,
         api_key=groq_api_key,
-        http_client=httpx.Client(verify=False)
+        http_client=get_http_client()
     )
     
     return model
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Interaction Log
+
+This module implements a structured, asynchronous log of every chain call, used to build
+training and evaluation datasets for local replacements of the chains.
+
+Key functionalities:
+- Non-blocking `log` call, records are written by a background thread
+- Rotating gzip compressed JSONL shards
+- Raw outputs are parsed on the writer thread, off the request path
+- Records are dropped (and counted) instead of blocking when the queue is full
+- Reader for all shards of a log directory, tolerant of a shard cut off by a crash
+"""
+
+import os
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class InteractionLogger:
+    """
+    Appends chain interaction records to rotating gzip JSONL shards from a background thread.
+
+    Every process writes its own shards (the pid is part of the file name), so several worker
+    processes can log to the same directory.
+    """
+
+    def __init__(self, directory, shard_records=5000, queue_size=10000, flush_interval=5.0):
+        """
+        Args:
+            directory (str): Directory the shards are written to, created if it does not exist
+            shard_records (int): Number of records per shard before a new shard is started
+            queue_size (int): Maximum number of records waiting to be written, further records are dropped
+            flush_interval (float): Seconds after which buffered records are flushed to disk when idle
+        """
+        self.directory = directory
+        self.shard_records = shard_records
+        self.flush_interval = flush_interval
+        self.stats = Counter()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._shard_index = 0
+        self._shard_count = 0
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="interaction-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, record, parse=None):
+        """
+        Queue a record for writing, never blocks.
+
+        Args:
+            record (dict): JSON serializable record, must contain "raw_output" if `parse` is given
+            parse (callable): Parser applied to record["raw_output"] on the writer thread, its result
+                is stored under "parsed" and a failure under "parse_error"
+        """
+        try:
+            self._queue.put_nowait((record, parse))
+            self.stats["queued"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _open_shard(self):
+        self._shard_index += 1
+        self._shard_count = 0
+        name = f"interactions-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._shard_index:04d}.jsonl.gz"
+        self._file = gzip.open(os.path.join(self.directory, name), "wt", encoding="utf-8")
+
+    def _close_shard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record, parse):
+        if parse is not None:
+            try:
+                record["parsed"] = parse(record["raw_output"])
+            except Exception as e:
+                record["parsed"] = None
+                record["parse_error"] = str(e)
+        if self._file is None:
+            self._open_shard()
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._shard_count += 1
+        self.stats["written"] += 1
+        if self._shard_count >= self.shard_records:
+            self._close_shard()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._file is not None:
+                    self._file.flush()
+                continue
+            if item is _STOP:
+                break
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error writing interaction record: {e}")
+        self._close_shard()
+
+    def close(self, timeout=10.0):
+        """Write the queued records and close the current shard."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+
+def read_interactions(directory):
+    """
+    Yield all records from the shards in a log directory, oldest shard first.
+
+    A shard that was cut off by a crash is read up to its last complete record.
+    """
+    for path in sorted(glob.glob(os.path.join(directory, "interactions-*.jsonl.gz"))):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except (EOFError, OSError) as e:
+            logger.warning(f"Stopped reading truncated shard {path}: {e}")
+
+
+_default_logger = None
+_default_logger_lock = threading.Lock()
+
+
+def get_interaction_logger():
+    """
+    Returns the process-wide interaction logger writing to INTERACTION_LOG_DIR, or None if the
+    environment variable is not set. INTERACTION_LOG_SHARD_RECORDS sets the records per shard.
+    """
+    global _default_logger
+    directory = os.getenv("INTERACTION_LOG_DIR")
+    if not directory:
+        return None
+    if _default_logger is None:
+        with _default_logger_lock:
+            if _default_logger is None:
+                _default_logger = InteractionLogger(
+                    directory,
+                    shard_records=int(os.getenv("INTERACTION_LOG_SHARD_RECORDS", "5000")),
+                )
+    return _default_logger
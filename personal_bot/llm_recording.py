@@ -0,0 +1,142 @@
+"""
+LLM Recording
+
+This module records chain outputs from live LLM calls and replays them offline, so that
+benchmarks and regression checks can run the whole pipeline without network access.
+
+Key functionalities:
+- Recording keyed by chain name and chain inputs, so edits to a prompt template still replay
+- Append-only JSONL recording file, the last output recorded for a key wins
+- Replay through the chain's prompt and a chat model returning the recorded output, so callbacks
+  (token usage, interaction log) see the prompt as it is rendered today
+- Hit and miss counters
+"""
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from .utils.single_flight import make_key
+
+
+class RecordingMiss(LookupError):
+    """Raised on replay when no output was recorded for a chain call."""
+
+
+class RecordedChatModel(BaseChatModel):
+    """
+    Chat model that returns a fixed output. It reports no token usage, so usage callbacks
+    estimate the tokens of the current prompt and the recorded output.
+    """
+
+    model_name: str = "recorded"
+    output: str = ""
+
+    @property
+    def _llm_type(self) -> str:
+        return "recorded-chat-model"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.output))])
+
+
+class LLMRecording:
+    """
+    Chain outputs recorded per (chain name, chain inputs).
+    """
+
+    def __init__(self, path, mode="replay"):
+        """
+        Args:
+            path (str): JSONL recording file
+            mode (str): "record" to run chains live and append their outputs, "replay" to return
+                recorded outputs without calling the LLM
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown recording mode {mode!r}, expected 'record' or 'replay'")
+        self.path = path
+        self.mode = mode
+        self.outputs = {}
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.outputs[record["key"]] = record
+
+    @staticmethod
+    def key(name, inputs):
+        return make_key(name, {key: inputs[key] for key in sorted(inputs)})
+
+    def record(self, name, inputs, output, latency):
+        record = {"key": self.key(name, inputs), "chain": name, "inputs": inputs, "output": output, "latency_s": round(latency, 4)}
+        with self._lock:
+            self.outputs[record["key"]] = record
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            self.stats["recorded"] += 1
+
+    def lookup(self, name, inputs):
+        """
+        Returns the recorded output of a chain call.
+
+        Raises:
+            RecordingMiss: If the call was never recorded
+        """
+        record = self.outputs.get(self.key(name, inputs))
+        with self._lock:
+            self.stats["hits" if record else "misses"] += 1
+        if record is None:
+            raise RecordingMiss(f"No recorded output for {name} with inputs {inputs}")
+        return record["output"]
+
+    def run(self, name, chain, inputs, callbacks=None):
+        """
+        Run a chain through the recording, a drop-in replacement for `chain.run(inputs, callbacks=...)`.
+        """
+        if self.mode == "record":
+            start = time.perf_counter()
+            output = chain.run(inputs, callbacks=callbacks)
+            self.record(name, inputs, output, time.perf_counter() - start)
+            return output
+
+        model = RecordedChatModel(model_name=getattr(chain.llm, "model_name", None) or "recorded", output=self.lookup(name, inputs))
+        return (chain.prompt | model).invoke(inputs, config={"callbacks": callbacks}).content
+
+
+_default_recording = None
+_default_recording_lock = threading.Lock()
+
+
+def get_llm_recording():
+    """
+    Returns the process-wide recording at LLM_RECORDING, or None if the environment variable is
+    not set. LLM_RECORDING_MODE is "replay" (default) or "record".
+    """
+    global _default_recording
+    path = os.getenv("LLM_RECORDING")
+    if not path:
+        return None
+    if _default_recording is None:
+        with _default_recording_lock:
+            if _default_recording is None:
+                _default_recording = LLMRecording(path, os.getenv("LLM_RECORDING_MODE", "replay"))
+    return _default_recording
@@ -0,0 +1,291 @@
+"""
+Session Store
+
+This module implements persistent storage of conversation state per session.
+Keeping turns and partial intent state out of process memory lets several worker processes
+serve the same session interchangeably.
+
+Key functionalities:
+- Pluggable session store interface
+- In-memory store for single process use and tests
+- SQLite store in WAL mode shared by multiple processes
+- Append-only turn log with windowed reads of the last N turns
+- Per-session state (last query, rewritten context, partial intent state)
+- Atomic counters in the session state (token usage), safe across threads and processes
+- TTL cleanup of inactive sessions
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+
+
+class SessionStore:
+    """
+    Base class for session stores.
+
+    Turns are only ever appended. Session state is a small dict of JSON serializable values,
+    updated key by key.
+    """
+
+    def append_turn(self, session_id, role, content):
+        """
+        Append a turn to the session's conversation log.
+
+        Args:
+            session_id (str): The session id
+            role (str): "user" or "assistant"
+            content (str or dict): The message, assistant responses are dicts
+        """
+        raise NotImplementedError
+
+    def get_turns(self, session_id, last_n=None):
+        """
+        Returns the session's turns in chronological order.
+
+        Args:
+            session_id (str): The session id
+            last_n (int): Only return the last N turns, all turns if not given
+
+        Returns:
+            list: List of dicts with the keys "role", "content" and "created_at"
+        """
+        raise NotImplementedError
+
+    def get_state(self, session_id):
+        """Returns the session state as a dict, empty for unknown sessions."""
+        raise NotImplementedError
+
+    def set_state(self, session_id, **values):
+        """Sets the given session state keys, other keys are left unchanged."""
+        raise NotImplementedError
+
+    def increment_state(self, session_id, key, amounts):
+        """
+        Atomically add amounts to the counters of a session state key.
+
+        Concurrent turns of the same session, in this or another process, never lose an update.
+
+        Args:
+            session_id (str): The session id
+            key (str): State key holding a dict of counters, created if missing
+            amounts (dict): Amount to add by counter name
+
+        Returns:
+            dict: The counters after the update
+        """
+        raise NotImplementedError
+
+    def cleanup(self, ttl):
+        """
+        Delete all sessions that have not been active for `ttl` seconds.
+
+        Returns:
+            int: Number of deleted sessions
+        """
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Session store keeping everything in process memory, for single process use and tests.
+    """
+
+    def __init__(self):
+        self._turns = defaultdict(list)
+        self._state = defaultdict(dict)
+        self._last_active = {}
+        self._lock = threading.Lock()
+
+    def append_turn(self, session_id, role, content):
+        with self._lock:
+            now = time.time()
+            self._turns[session_id].append({"role": role, "content": content, "created_at": now})
+            self._last_active[session_id] = now
+
+    def get_turns(self, session_id, last_n=None):
+        with self._lock:
+            turns = self._turns.get(session_id, [])
+            return list(turns[-last_n:] if last_n else turns)
+
+    def get_state(self, session_id):
+        with self._lock:
+            return dict(self._state.get(session_id, {}))
+
+    def set_state(self, session_id, **values):
+        with self._lock:
+            self._state[session_id].update(values)
+            self._last_active[session_id] = time.time()
+
+    def increment_state(self, session_id, key, amounts):
+        with self._lock:
+            counters = dict(self._state[session_id].get(key) or {})
+            for name, amount in amounts.items():
+                counters[name] = counters.get(name, 0) + amount
+            self._state[session_id][key] = counters
+            self._last_active[session_id] = time.time()
+            return dict(counters)
+
+    def cleanup(self, ttl):
+        cutoff = time.time() - ttl
+        with self._lock:
+            expired = [session_id for session_id, last_active in self._last_active.items() if last_active < cutoff]
+            for session_id in expired:
+                self._turns.pop(session_id, None)
+                self._state.pop(session_id, None)
+                del self._last_active[session_id]
+        return len(expired)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a local SQLite database in WAL mode.
+
+    WAL mode lets readers in other processes proceed while one process writes, so every
+    worker process behind a load balancer can open the same database file.
+    Each thread gets its own connection.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS turns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_turns_session ON turns (session_id, id);
+    CREATE TABLE IF NOT EXISTS session_state (
+        session_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (session_id, key)
+    );
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        last_active REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_sessions_last_active ON sessions (last_active);
+    """
+
+    def __init__(self, path, busy_timeout=30.0):
+        """
+        Args:
+            path (str): Path to the SQLite database file, created if it does not exist
+            busy_timeout (float): Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(self.SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _touch(self, connection, session_id, now):
+        connection.execute(
+            "INSERT INTO sessions (session_id, last_active) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET last_active = excluded.last_active",
+            (session_id, now),
+        )
+
+    def append_turn(self, session_id, role, content):
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            connection.execute(
+                "INSERT INTO turns (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, role, json.dumps(content), now),
+            )
+            self._touch(connection, session_id, now)
+
+    def get_turns(self, session_id, last_n=None):
+        connection = self._connection()
+        if last_n:
+            rows = connection.execute(
+                "SELECT role, content, created_at FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, last_n),
+            ).fetchall()
+            rows.reverse()
+        else:
+            rows = connection.execute(
+                "SELECT role, content, created_at FROM turns WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            ).fetchall()
+        return [{"role": role, "content": json.loads(content), "created_at": created_at} for role, content, created_at in rows]
+
+    def get_state(self, session_id):
+        rows = self._connection().execute(
+            "SELECT key, value FROM session_state WHERE session_id = ?", (session_id,)
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_state(self, session_id, **values):
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT INTO session_state (session_id, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id, key) DO UPDATE SET value = excluded.value",
+                [(session_id, key, json.dumps(value)) for key, value in values.items()],
+            )
+            self._touch(connection, session_id, time.time())
+
+    def increment_state(self, session_id, key, amounts):
+        connection = self._connection()
+        with connection:
+            # Take the write lock before reading, so the read-modify-write cannot interleave with another process
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT value FROM session_state WHERE session_id = ? AND key = ?", (session_id, key)
+            ).fetchone()
+            counters = json.loads(row[0]) if row else {}
+            counters = counters if isinstance(counters, dict) else {}
+            for name, amount in amounts.items():
+                counters[name] = counters.get(name, 0) + amount
+            connection.execute(
+                "INSERT INTO session_state (session_id, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id, key) DO UPDATE SET value = excluded.value",
+                (session_id, key, json.dumps(counters)),
+            )
+            self._touch(connection, session_id, time.time())
+        return counters
+
+    def cleanup(self, ttl):
+        connection = self._connection()
+        cutoff = time.time() - ttl
+        with connection:
+            expired = "SELECT session_id FROM sessions WHERE last_active < ?"
+            connection.execute(f"DELETE FROM turns WHERE session_id IN ({expired})", (cutoff,))
+            connection.execute(f"DELETE FROM session_state WHERE session_id IN ({expired})", (cutoff,))
+            deleted = connection.execute("DELETE FROM sessions WHERE last_active < ?", (cutoff,)).rowcount
+        return deleted
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """
+    Returns the process-wide session store, creating it on first use.
+
+    If the SESSION_STORE_PATH environment variable is set, a SQLite store at that path is used
+    so that several processes can share sessions, otherwise sessions live in process memory.
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                path = os.getenv("SESSION_STORE_PATH")
+                _default_store = SQLiteSessionStore(path) if path else InMemorySessionStore()
+    return _default_store
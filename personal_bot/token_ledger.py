@@ -0,0 +1,285 @@
+"""
+Token Ledger
+
+This module records the prompt and completion tokens of every LLM call and enforces token budgets.
+
+Key functionalities:
+- LangChain callback that reads token usage from the provider response, with a local estimate as fallback
+- Ledger of usage entries keyed by session, chain, model and intent, optionally appended to a JSONL file
+- Cost per call from a per-model price table
+- Per-session and per-minute token budgets
+"""
+
+import os
+import json
+import time
+import threading
+from functools import lru_cache
+from collections import deque
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama3-70b-8192": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama3-8b-8192": (0.05, 0.08),
+}
+
+USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def estimate_tokens(text):
+    """Rough token estimate used when the provider reports no usage (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def get_cost(model_name, prompt_tokens, completion_tokens):
+    """
+    Returns the cost of a call in USD, 0 for models without a known price.
+    """
+    prompt_price, completion_price = MODEL_PRICES.get(model_name, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class UsageCallback:
+    """
+    Callback that turns the usage of every LLM call it sees into a ledger entry.
+
+    Entries are collected on a `TurnUsage` and written to the ledger when the turn ends. Instances
+    are created through `TurnUsage.callback`, which mixes in LangChain's callback base class.
+    """
+
+    def __init__(self, turn_usage, chain, model_name, intent=None):
+        self.turn_usage = turn_usage
+        self.chain = chain
+        self.model_name = model_name
+        self.intent = intent
+        self.last_entry = None
+        self._prompts = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._prompts[run_id] = "\n".join(prompts)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._prompts[run_id] = "\n".join(str(message.content) for batch in messages for message in batch)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt = self._prompts.pop(run_id, "")
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        model_name = llm_output.get("model_name") or self.model_name
+        generations = [generation for batch in response.generations for generation in batch]
+
+        if not usage:
+            for generation in generations:
+                usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage_metadata:
+                    usage = {
+                        "prompt_tokens": usage_metadata.get("input_tokens", 0),
+                        "completion_tokens": usage_metadata.get("output_tokens", 0),
+                    }
+                    break
+
+        estimated = not usage
+        if estimated:
+            usage = {
+                "prompt_tokens": estimate_tokens(prompt),
+                "completion_tokens": sum(estimate_tokens(generation.text) for generation in generations),
+            }
+
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        self.last_entry = {
+            "chain": self.chain,
+            "model": model_name,
+            "intent": self.intent,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": usage.get("total_tokens") or prompt_tokens + completion_tokens,
+            "cost": get_cost(model_name, prompt_tokens, completion_tokens),
+            "estimated": estimated,
+        }
+        self.turn_usage.add(self.last_entry)
+
+
+@lru_cache(maxsize=None)
+def _usage_callback_class():
+    """
+    Returns UsageCallback as a LangChain callback handler. langchain_core is imported on the first
+    LLM call instead of with the ledger, which is imported by chat_agent at startup.
+    """
+    from langchain_core.callbacks import BaseCallbackHandler
+    return type("UsageCallback", (UsageCallback, BaseCallbackHandler), {})
+
+
+class TurnUsage:
+    """
+    Usage entries of the LLM calls made for one turn (or one query of a batch), and the latency
+    of its stages.
+    """
+
+    def __init__(self, session_id, turn_id=None):
+        self.session_id = session_id
+        self.turn_id = turn_id
+        self.entries = []
+        self.latencies = {}
+        self._lock = threading.Lock()
+
+    def callback(self, chain, model_name, intent=None):
+        """Returns a callback that records the calls of `chain` on this turn."""
+        return _usage_callback_class()(self, chain, model_name, intent)
+
+    def add(self, entry):
+        with self._lock:
+            self.entries.append(entry)
+
+    def merge(self, other):
+        """Add the entries and stage latencies of another TurnUsage, e.g. of a committed speculative call."""
+        with other._lock:
+            entries, latencies = list(other.entries), dict(other.latencies)
+        for entry in entries:
+            self.add(entry)
+        for stage, seconds in latencies.items():
+            self.add_latency(stage, seconds)
+
+    def add_latency(self, stage, seconds):
+        with self._lock:
+            self.latencies[stage] = self.latencies.get(stage, 0.0) + seconds
+
+    def totals(self):
+        with self._lock:
+            totals = {key: sum(entry[key] for entry in self.entries) for key in USAGE_KEYS}
+            totals["cost"] = sum(entry["cost"] for entry in self.entries)
+        return totals
+
+
+class TokenLedger:
+    """
+    Process-wide ledger of token usage with per-session and per-minute budgets.
+
+    The per-session budget is checked against the session's running total, which the caller
+    keeps in the session store so that it holds across worker processes. The per-minute budget
+    is a rolling window over the calls made by this process.
+    """
+
+    def __init__(self, path=None, session_budget=None, minute_budget=None, degraded_model="llama-3.1-8b-instant"):
+        """
+        Args:
+            path (str): JSONL file every entry is appended to, entries are only kept in memory if not given
+            session_budget (int): Maximum total tokens per session before the turn is degraded
+            minute_budget (int): Maximum total tokens per rolling minute before turns are degraded
+            degraded_model (str): Smaller model used for degraded turns
+        """
+        self.path = path
+        self.session_budget = session_budget
+        self.minute_budget = minute_budget
+        self.degraded_model = degraded_model
+        self.totals = {key: 0 for key in USAGE_KEYS}
+        self.totals["cost"] = 0.0
+        self._window = deque()
+        self._window_tokens = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _prune_window(self, now):
+        while self._window and self._window[0][0] < now - 60:
+            self._window_tokens -= self._window.popleft()[1]
+
+    def record(self, turn_usage, default_intent=None):
+        """
+        Add the entries of a turn to the ledger.
+
+        Args:
+            turn_usage (TurnUsage): The usage collected for the turn
+            default_intent (str): Intent for entries recorded before the intent was known
+        """
+        now = time.time()
+        lines = []
+        with self._lock:
+            for entry in turn_usage.entries:
+                entry = {
+                    "timestamp": now,
+                    "session_id": turn_usage.session_id,
+                    "turn_id": turn_usage.turn_id,
+                    **entry,
+                    "intent": entry["intent"] or default_intent,
+                }
+                for key in USAGE_KEYS:
+                    self.totals[key] += entry[key]
+                self.totals["cost"] += entry["cost"]
+                self._window.append((now, entry["total_tokens"]))
+                self._window_tokens += entry["total_tokens"]
+                lines.append(json.dumps(entry))
+            self._prune_window(now)
+
+            if self.path and lines:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    self._file = open(self.path, "a")
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+
+    def minute_tokens(self):
+        """Returns the total tokens used by this process in the last minute."""
+        with self._lock:
+            self._prune_window(time.time())
+            return self._window_tokens
+
+    def check_budget(self, session_tokens):
+        """
+        Check the budgets before a turn.
+
+        Args:
+            session_tokens (int): Total tokens the session has used so far
+
+        Returns:
+            str: "session_budget" or "minute_budget" if a budget is exhausted, None otherwise
+        """
+        if self.session_budget is not None and session_tokens >= self.session_budget:
+            return "session_budget"
+        if self.minute_budget is not None and self.minute_tokens() >= self.minute_budget:
+            return "minute_budget"
+        return None
+
+
+def load_ledger(path):
+    """
+    Read all entries of a ledger file, skipping a partially written last line.
+
+    Returns:
+        list: Ledger entry dicts
+    """
+    entries = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+_default_ledger = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_token_ledger():
+    """
+    Returns the process-wide token ledger, creating it on first use.
+
+    Configured with the environment variables TOKEN_LEDGER_PATH (JSONL file), TOKEN_BUDGET_SESSION
+    and TOKEN_BUDGET_MINUTE (total tokens) and DEGRADED_MODEL (model used once a budget is exhausted).
+    """
+    global _default_ledger
+    if _default_ledger is None:
+        with _default_ledger_lock:
+            if _default_ledger is None:
+                session_budget = os.getenv("TOKEN_BUDGET_SESSION")
+                minute_budget = os.getenv("TOKEN_BUDGET_MINUTE")
+                _default_ledger = TokenLedger(
+                    path=os.getenv("TOKEN_LEDGER_PATH"),
+                    session_budget=int(session_budget) if session_budget else None,
+                    minute_budget=int(minute_budget) if minute_budget else None,
+                    degraded_model=os.getenv("DEGRADED_MODEL", "llama-3.1-8b-instant"),
+                )
+    return _default_ledger
@@ -0,0 +1,178 @@
+"""
+Context Gate
+
+This module implements a cheap local gate that runs before the contextual query chain.
+The contextual chain is only useful when the query refers back to something said earlier,
+so the gate checks for prior context and for pronoun, deictic or ellipsis markers and lets
+every other query pass through unchanged without an LLM call. While a request is waiting for
+follow-up answers every query is rewritten, as answers are usually bare fragments.
+
+Key functionalities:
+- Skips the contextual rewrite when there is no prior context
+- Detects pronouns, deictic words, elliptical follow-ups and verbless fragments in the query
+- Always rewrites while the session has a pending request
+- Optional local spelling correction against a small domain vocabulary
+- Counts gate decisions so skipped calls can be measured
+"""
+
+import re
+import difflib
+from collections import Counter
+
+# Words that usually point back at something mentioned in an earlier message
+PRONOUN_MARKERS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their", "theirs",
+    "he", "him", "his", "she", "her", "hers", "same", "such", "former", "latter",
+}
+
+# Words that point at a place or time established earlier
+DEICTIC_MARKERS = {"there", "here", "then", "above", "instead", "else", "another", "other"}
+
+# Phrases that only make sense as a continuation of the previous message
+ELLIPSIS_PATTERNS = [
+    r"^(and|also|but|or|plus|then)\b",
+    r"^(what|how) about\b",
+    r"^make it\b",
+    r"^(the )?(first|second|third|last|cheaper|better) one\b",
+    r"\b(this|that|the|which) one\b",
+    r"\bones?\b(?! (person|people|adult|child|night|day|week|month|ticket|seat|room|hour|pm|am)s?\b)",
+    r"\bone of (them|these|those)\b",
+    r"^(my |the )?(budget|time|date|party size|pickup|drop ?off|destination|cuisine|occasion)\b",
+    r"^(for|at|on|around|by|under|near|with) \S+",
+]
+
+# Verbs of standalone requests, a short query with none of them is a fragment answering an earlier message
+REQUEST_VERBS = {
+    "book", "reserve", "plan", "find", "search", "suggest", "recommend", "get", "send", "order",
+    "buy", "show", "tell", "give", "help", "need", "want", "like", "love", "looking", "going",
+    "go", "travel", "fly", "visit", "take", "arrange", "call", "make", "organize", "organise",
+    "cancel", "change", "is", "are", "am", "was", "were", "do", "does", "can", "could", "would",
+    "will", "should", "have", "has", "hi", "hello", "hey", "thanks", "thank",
+}
+FRAGMENT_MAX_WORDS = 8
+
+# Small vocabulary used by the optional spelling correction pass
+DOMAIN_VOCABULARY = {
+    "restaurant", "restaurants", "reservation", "reserve", "table", "dinner", "lunch", "breakfast",
+    "tomorrow", "tonight", "today", "weekend", "morning", "evening", "afternoon", "birthday",
+    "anniversary", "budget", "rupees", "people", "person", "airport", "station", "railway",
+    "hotel", "flight", "flights", "train", "trip", "travel", "vacation", "holiday", "booking",
+    "book", "cab", "taxi", "pickup", "gift", "gifts", "flowers", "chocolates", "delivery",
+    "vegetarian", "vegan", "gluten", "cuisine", "italian", "chinese", "indian", "mexican",
+    "please", "suggest", "recommend", "family", "friends", "parents", "office", "luxury",
+    "business", "economy", "schedule", "available", "options", "special", "request", "requests",
+}
+
+_WORD_RE = re.compile(r"[A-Za-z']+")
+# Plural endings of domain words, which are spelled correctly and must not be singularised
+PLURAL_SUFFIXES = ("s", "es")
+_COMPILED_ELLIPSIS = [re.compile(pattern, re.IGNORECASE) for pattern in ELLIPSIS_PATTERNS]
+
+
+class ContextGate:
+    """
+    Local gate deciding whether a query needs the contextual query chain.
+
+    The gate is deliberately conservative: it only skips the chain when there is no
+    previous message or when none of the contextual markers appear in the query.
+    Every decision is counted in `stats` so the number of skipped LLM calls can be tracked.
+    """
+
+    def __init__(self, spell_correction=False):
+        """
+        Args:
+            spell_correction (bool): Whether to run the local spelling correction pass on
+                queries that skip the contextual chain
+        """
+        self.spell_correction = spell_correction
+        self.stats = Counter()
+
+    def check(self, query, last_query, pending=False):
+        """
+        Decide whether the query has to be rewritten by the contextual chain.
+
+        Args:
+            query (str): The current user query
+            last_query (str): The previous user query, empty if there is none
+            pending (bool): Whether the session has a request waiting for follow-up answers
+
+        Returns:
+            tuple: (needs_rewrite, reason)
+        """
+
+        if not last_query or not last_query.strip():
+            return self._record(False, "no_prior_context")
+
+        if pending:
+            return self._record(True, "pending_intent")
+
+        lowered = query.strip().lower()
+        words = set(_WORD_RE.findall(lowered))
+
+        if words & PRONOUN_MARKERS:
+            return self._record(True, "pronoun")
+
+        if words & DEICTIC_MARKERS:
+            return self._record(True, "deictic")
+
+        for pattern in _COMPILED_ELLIPSIS:
+            if pattern.search(lowered):
+                return self._record(True, "ellipsis")
+
+        # Slot answers such as "2000 rupees", "Bandra" or "Tomorrow at 8 pm"
+        if len(lowered.split()) <= FRAGMENT_MAX_WORDS and not words & REQUEST_VERBS:
+            return self._record(True, "fragment")
+
+        return self._record(False, "no_contextual_markers")
+
+    def correct_spelling(self, query):
+        """
+        Correct obvious misspellings of common domain words, leaving everything else untouched.
+
+        Capitalised words (names, places), short words and plurals of domain words ("hotels",
+        "trips") are never changed, except for capitalised words at the start of a sentence.
+
+        Args:
+            query (str): The user query
+
+        Returns:
+            str: The query with misspelled domain words corrected
+        """
+
+        if not self.spell_correction:
+            return query
+
+        def replace(match):
+            word = match.group(0)
+            lowered = word.lower()
+            sentence_start = not query[:match.start()].strip() or query[:match.start()].rstrip()[-1] in ".!?"
+            if len(word) < 5 or (word[0].isupper() and not sentence_start) or lowered in DOMAIN_VOCABULARY:
+                return word
+            if any(lowered.endswith(suffix) and lowered[:-len(suffix)] in DOMAIN_VOCABULARY for suffix in PLURAL_SUFFIXES):
+                return word
+            candidates = difflib.get_close_matches(lowered, DOMAIN_VOCABULARY, n=1, cutoff=0.85)
+            if candidates and abs(len(candidates[0]) - len(lowered)) <= 2:
+                self.stats["spelling_corrections"] += 1
+                return candidates[0].capitalize() if word[0].isupper() else candidates[0]
+            return word
+
+        return _WORD_RE.sub(replace, query)
+
+    def _record(self, needs_rewrite, reason):
+        self.stats["rewrite" if needs_rewrite else "skip"] += 1
+        self.stats[reason] += 1
+        return needs_rewrite, reason
+
+
+if __name__ == "__main__":
+    gate = ContextGate(spell_correction=True)
+    print(gate.check("Suggest some romantic rooftop restaurants.", ""))
+    print(gate.check("Can you book one for 7 PM today?", "Suggest some romantic rooftop restaurants."))
+    print(gate.check("My budget is 2000 rupees.", "I want to dine with my parents near MG Road."))
+    print(gate.check("Plan a trip to Goa from Delhi", "Book a cab to the airport"))
+    print(gate.check("between 5000 and 8000 rupees", "I need an anniversary gift for my wife"))
+    print(gate.check("Bandra", "Book a table for dinner tomorrow"))
+    print(gate.correct_spelling("Book a resturant for tomorow"))
+    print(gate.correct_spelling("Compare hotels for our trips"))
+    print(gate.correct_spelling("Resturant near Bandra please"))
+    print(dict(gate.stats))
@@ -0,0 +1,133 @@
+"""
+Conversation Summary
+
+This module implements the background scheduling and the size bounds of the rolling conversation
+summary read by the contextual query chain.
+
+Key functionalities:
+- Summary updates run on a small background pool after the response has been returned
+- At most one update per session runs at a time, exchanges arriving meanwhile are folded into the next update
+- Token bounded context block made of the latest completed summary and the previous user message
+"""
+
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from ..token_ledger import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Fixed ceiling of the context block sent to the contextual chain
+CONTEXT_MAX_TOKENS = 300
+
+# Ceiling of a stored summary, whatever the summary chain returns
+SUMMARY_MAX_TOKENS = 200
+
+
+def truncate_to_tokens(text, max_tokens, keep_end=False):
+    """
+    Cut text to about `max_tokens` tokens at a word boundary.
+
+    Args:
+        text (str): The text
+        max_tokens (int): Token ceiling, using the same estimate as the token ledger
+        keep_end (bool): Keep the end of the text instead of the start
+
+    Returns:
+        str: The text, with "..." where it was cut
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(0, max_tokens * 4 - 3)
+    if keep_end:
+        cut = text[len(text) - max_chars:]
+        return "..." + (cut.split(" ", 1)[-1] if " " in cut else cut)
+    cut = text[:max_chars]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + "..."
+
+
+def build_context(summary, previous_query, max_tokens=CONTEXT_MAX_TOKENS):
+    """
+    Build the context block of the contextual chain within a fixed token ceiling.
+
+    The previous user message has priority, the summary gets the remaining budget and loses its
+    oldest part first.
+
+    Args:
+        summary (str): Latest completed conversation summary
+        previous_query (str): The previous user message
+        max_tokens (int): Token ceiling of the block
+
+    Returns:
+        str: The context lines, empty if there is no context
+    """
+    lines = []
+    last_line = f"User: {previous_query.strip()}" if previous_query and previous_query.strip() else ""
+    if last_line:
+        last_line = truncate_to_tokens(last_line, max_tokens)
+    remaining = max_tokens - (estimate_tokens(last_line) if last_line else 0)
+    if summary and summary.strip() and remaining > 8:
+        lines.append(f"Summary: {truncate_to_tokens(summary.strip(), remaining - 3, keep_end=True)}")
+    if last_line:
+        lines.append(last_line)
+    return "\n".join(lines)
+
+
+class SummaryUpdater:
+    """
+    Runs conversation summary updates in the background, one at a time per session.
+    """
+
+    def __init__(self, max_workers=2):
+        """
+        Args:
+            max_workers (int): Number of summary updates running at once across all sessions
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary")
+        self.stats = Counter()
+        self._pending = {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def schedule(self, session_id, exchange, update):
+        """
+        Queue an exchange for the session's summary, never blocks.
+
+        Args:
+            session_id (str): The session id
+            exchange (tuple): (user message, assistant message) to fold into the summary
+            update (callable): Called as update(session_id, exchanges) on a background thread
+        """
+        with self._lock:
+            exchanges, _ = self._pending.get(session_id, ([], None))
+            exchanges.append(exchange)
+            self._pending[session_id] = (exchanges, update)
+            self.stats["scheduled"] += 1
+            if session_id in self._running:
+                return
+            self._running.add(session_id)
+        self.executor.submit(self._run, session_id)
+
+    def _run(self, session_id):
+        while True:
+            with self._lock:
+                if session_id not in self._pending:
+                    self._running.discard(session_id)
+                    self._idle.notify_all()
+                    return
+                exchanges, update = self._pending.pop(session_id)
+            try:
+                update(session_id, exchanges)
+                self.stats["updates"] += 1
+                self.stats["folded"] += len(exchanges) - 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error updating the conversation summary of session {session_id}: {e}")
+
+    def wait(self, timeout=None):
+        """Wait until no update is queued or running, returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._running, timeout)
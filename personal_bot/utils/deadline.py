@@ -0,0 +1,65 @@
+"""
+Deadlines
+
+This module implements the per-turn deadline that is propagated through the pipeline stages.
+
+Key functionalities:
+- Deadline with the remaining time budget of a turn
+- Running latency estimates per stage, used to decide whether a stage still fits in the budget
+"""
+
+import time
+import threading
+
+
+class Deadline:
+    """
+    Absolute deadline of a turn. A deadline without a time limit never expires.
+    """
+
+    def __init__(self, seconds=None):
+        """
+        Args:
+            seconds (float): Time budget from now, no limit if not given
+        """
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        """Returns the remaining seconds, None if there is no limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def fits(self, estimate):
+        """Returns True if a stage expected to take `estimate` seconds fits in the remaining time."""
+        return self.expires_at is None or self.remaining() >= estimate
+
+
+class LatencyEstimator:
+    """
+    Exponentially weighted moving average of the observed latency of each stage.
+    """
+
+    def __init__(self, defaults=None, default=1.0, alpha=0.2):
+        """
+        Args:
+            defaults (dict): Initial estimate in seconds per stage name
+            default (float): Initial estimate for stages not in `defaults`
+            alpha (float): Weight of a new observation
+        """
+        self.estimates = dict(defaults or {})
+        self.default = default
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def estimate(self, name):
+        return self.estimates.get(name, self.default)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            previous = self.estimates.get(name, self.default)
+            self.estimates[name] = (1 - self.alpha) * previous + self.alpha * seconds
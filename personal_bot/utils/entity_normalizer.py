@@ -0,0 +1,402 @@
+"""
+Entity Normalization
+
+This module implements the local normalization of extracted entities. Free text dates, times,
+budgets and counts ("tomorrow evening", "next month", "around 50000 rupees", "a couple") are
+resolved against the session clock without another LLM call, so only the values that are really
+unclear are sent to the follow-up questions chain.
+
+Key functionalities:
+- Dates to ISO date ranges, times to HH:MM ranges
+- Budgets to a numeric min/max range with an ISO currency code
+- Counts to integers, mixed party sizes summed
+- Precompiled grammar, parsed expressions are cached (relative dates per reference day)
+- Counters of resolved and unresolved values per kind
+"""
+
+import os
+import re
+import calendar
+import threading
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from collections import Counter
+
+PARSE_CACHE_SIZE = 4096
+
+MONTHS = {name.lower(): index for index, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name[:3]: index for name, index in list(MONTHS.items())}, sept=9)
+WEEKDAYS = {name.lower(): index for index, name in enumerate(calendar.day_name)}
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17,
+    "eighteen": 18, "nineteen": 19, "twenty": 20, "a": 1, "an": 1, "single": 1, "a couple": 2, "couple": 2, "a pair": 2, "pair": 2,
+}
+SOLO_RE = re.compile(r"^(?:just |only )?(?:me|myself|i|solo|alone|by myself|single person)$")
+_RELATION = r"(?:wife|husband|partner|girlfriend|boyfriend|friend|mom|mother|dad|father|son|daughter|sister|brother)"
+PAIR_RE = re.compile(rf"^(?:me and my|my) {_RELATION}(?: and (?:me|i))?$")
+COMPANION_RE = re.compile(rf"^(?:my|a) {_RELATION}$")
+CURRENCIES = (
+    (re.compile(r"₹|\brs\b\.?|\binr\b|\brupees?\b"), "INR"),
+    (re.compile(r"\$|\busd\b|\bdollars?\b"), "USD"),
+    (re.compile(r"€|\beur\b|\beuros?\b"), "EUR"),
+    (re.compile(r"£|\bgbp\b|\bpounds?\b"), "GBP"),
+)
+AMOUNT_UNITS = {"k": 1e3, "thousand": 1e3, "l": 1e5, "lac": 1e5, "lacs": 1e5, "lakh": 1e5, "lakhs": 1e5, "m": 1e6, "million": 1e6, "cr": 1e7, "crore": 1e7, "crores": 1e7}
+# Time of day periods as (start, end)
+PERIODS = {
+    "early morning": ("05:00", "08:00"), "morning": ("06:00", "12:00"), "breakfast": ("07:00", "10:00"),
+    "noon": ("12:00", "12:00"), "lunch": ("12:00", "15:00"), "afternoon": ("12:00", "17:00"),
+    "evening": ("17:00", "21:00"), "dinner": ("19:00", "22:00"), "tonight": ("19:00", "23:59"),
+    "night": ("20:00", "23:59"), "late night": ("22:00", "23:59"), "midnight": ("00:00", "00:00"),
+}
+# Hours a bare clock without am/pm or a period can mean, from late morning to the last seating:
+# "at 8" is 20:00, "7:30" is 19:30, "at 11" is 11:00
+MEAL_HOURS = range(11, 23)
+
+# Grammar, compiled once at import time
+_ORDINAL = r"(\d{1,2})(?:st|nd|rd|th)?"
+_MONTH = r"(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_YEAR = r"(?:,?\s*(\d{4}))?"
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[/.](\d{1,2})(?:[/.](\d{2,4}))?\b")
+ORDINAL_DAY_RE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)\b(?!\s+week)")
+DAY_RANGE_RE = re.compile(rf"\b{_ORDINAL}\s*(?:-|to|till|until)\s*{_ORDINAL}\s+(?:of\s+)?{_MONTH}{_YEAR}\b")
+DAY_MONTH_RE = re.compile(rf"\b{_ORDINAL}\s+(?:of\s+)?{_MONTH}{_YEAR}\b")
+MONTH_DAY_RE = re.compile(rf"\b{_MONTH}\s+{_ORDINAL}\b{_YEAR}")
+MONTH_ONLY_RE = re.compile(rf"\b{_MONTH}{_YEAR}\b")
+RELATIVE_DAY_RE = re.compile(r"\b(day after tomorrow|today|tonight|tomorrow|this (?:morning|afternoon|evening))\b")
+WEEKDAY_RE = re.compile(r"\b(?:(this|next|coming)\s+)?(" + "|".join(WEEKDAYS) + r")\b")
+RELATIVE_SPAN_RE = re.compile(r"\b(this|next|coming)\s+(weekend|week|month)\b")
+IN_DAYS_RE = re.compile(r"\b(?:in|after)\s+(\d+|" + "|".join(w for w in NUMBER_WORDS if " " not in w and len(w) > 2) + r")\s+(days?|weeks?)\b")
+
+_CLOCK = r"(\d{1,2})(?:[:.](\d{2}))?"
+TIME_RANGE_RE = re.compile(rf"\b{_CLOCK}\s*(am|pm)?\s*(?:-|to|and|till|until)\s*{_CLOCK}\s*(am|pm)\b")
+TIME_12H_RE = re.compile(rf"\b{_CLOCK}\s*(am|pm|a\.m\.|p\.m\.)")
+TIME_24H_RE = re.compile(r"\b([01]?\d|2[0-3])[:.]([0-5]\d)\b(?!\s*(?:am|pm))")
+BARE_HOUR_RE = re.compile(r"\b(?:at|around|by|about)?\s*(\d{1,2})(?:[:.](\d{2}))?(?:\s*o'?clock)?\b")
+BARE_CLOCK_RE = re.compile(r"^(?:at|around|by|about)?\s*(\d{1,2})(?:[:.](\d{2}))?(?:\s*o'?clock)?$")
+PERIOD_RE = re.compile(r"\b(" + "|".join(sorted(PERIODS, key=len, reverse=True)) + r")\b")
+
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)\s*(" + "|".join(sorted(AMOUNT_UNITS, key=len, reverse=True)) + r")?\b"
+AMOUNT_RANGE_RE = re.compile(rf"{_NUMBER}\s*(?:-|to|and)\s*(?:₹|rs\.?|inr|\$|€|£)?\s*{_NUMBER}")
+AMOUNT_RE = re.compile(_NUMBER)
+UPPER_BOUND_RE = re.compile(r"\b(?:under|below|less than|within|up ?to|upto|max(?:imum)?|not more than|no more than|at most)\b")
+LOWER_BOUND_RE = re.compile(r"\b(?:above|over|more than|at least|min(?:imum)?|starting(?: from)?|from)\b")
+APPROXIMATE_RE = re.compile(r"\b(?:around|about|approx(?:imately)?|roughly|nearly)\b|~")
+COUNT_RE = re.compile(r"^(?:a (?:group|party|family|table) of |party of |family of |group of |table for |for )?(\d+|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")(?:\s+(?:people|persons|guests|members|adults?|kids?|children|child|infants?|seniors?|pax|of us|passengers|travellers|travelers))?$")
+COUNT_SEPARATOR_RE = re.compile(r"\s*(?:,|\+|\band\b|\bplus\b)\s*")
+
+
+def _resolve_year(month, day, year, today):
+    """Returns the date, the next occurrence from today if the year was not given, None if invalid or past."""
+    try:
+        if year:
+            year = int(year)
+            candidate = date(year + 2000 if year < 100 else year, month, day)
+            return candidate if candidate >= today else None
+        candidate = date(today.year, month, day)
+        return candidate if candidate >= today else date(today.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+def _next_month_day(day, today):
+    """Returns the next date from today falling on the given day of the month, None if invalid."""
+    year, month = today.year, today.month
+    for _ in range(12):
+        if day <= calendar.monthrange(year, month)[1] and date(year, month, day) >= today:
+            return date(year, month, day)
+        year, month = year + (month == 12), month % 12 + 1
+    return None
+
+
+def _month_range(year, month, today):
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    return max(start, today), end
+
+
+def _as_range(start, end=None):
+    return {"start": start.isoformat(), "end": (end or start).isoformat()}
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_date(text, today_ordinal):
+    today = date.fromordinal(today_ordinal)
+
+    match = ISO_DATE_RE.search(text)
+    if match:
+        parsed = _resolve_year(int(match.group(2)), int(match.group(3)), match.group(1), today)
+        return _as_range(parsed) if parsed else None
+    match = DAY_RANGE_RE.search(text)
+    if match:
+        start = _resolve_year(MONTHS[match.group(3)], int(match.group(1)), match.group(4), today)
+        end = start and _resolve_year(MONTHS[match.group(3)], int(match.group(2)), str(start.year), today)
+        return _as_range(start, end) if start and end and end >= start else None
+    for regex, day_group, month_group in ((DAY_MONTH_RE, 1, 2), (MONTH_DAY_RE, 2, 1)):
+        match = regex.search(text)
+        if match:
+            parsed = _resolve_year(MONTHS[match.group(month_group)], int(match.group(day_group)), match.group(3), today)
+            return _as_range(parsed) if parsed else None
+    match = NUMERIC_DATE_RE.search(text)
+    if match:
+        # Day first, as written in India and Europe
+        parsed = _resolve_year(int(match.group(2)), int(match.group(1)), match.group(3), today)
+        return _as_range(parsed) if parsed else None
+    match = ORDINAL_DAY_RE.search(text)
+    if match:
+        # "on the 5th": the next 5th of a month
+        parsed = _next_month_day(int(match.group(1)), today)
+        return _as_range(parsed) if parsed else None
+
+    match = RELATIVE_DAY_RE.search(text)
+    if match:
+        offset = {"tomorrow": 1, "day after tomorrow": 2}.get(match.group(1), 0)
+        return _as_range(today + timedelta(days=offset))
+    match = WEEKDAY_RE.search(text)
+    if match:
+        if match.group(1) == "next":
+            # "next Friday" is the Friday of the following week, "Friday" and "this Friday" the upcoming one
+            following_monday = today + timedelta(days=7 - today.weekday())
+            return _as_range(following_monday + timedelta(days=WEEKDAYS[match.group(2)]))
+        ahead = (WEEKDAYS[match.group(2)] - today.weekday()) % 7
+        return _as_range(today + timedelta(days=ahead))
+    match = RELATIVE_SPAN_RE.search(text)
+    if match:
+        following = match.group(1) == "next"
+        if match.group(2) == "weekend":
+            saturday = today + timedelta(days=(5 - today.weekday()) % 7) if today.weekday() != 6 else today - timedelta(days=1)
+            if following:
+                saturday += timedelta(days=7)
+            return _as_range(max(saturday, today), saturday + timedelta(days=1))
+        if match.group(2) == "week":
+            monday = today - timedelta(days=today.weekday())
+            if following:
+                monday += timedelta(days=7)
+            return _as_range(max(monday, today), monday + timedelta(days=6))
+        year, month = (today.year + (today.month == 12), today.month % 12 + 1) if following else (today.year, today.month)
+        return _as_range(*_month_range(year, month, today))
+    match = IN_DAYS_RE.search(text)
+    if match:
+        count = int(match.group(1)) if match.group(1).isdigit() else NUMBER_WORDS[match.group(1)]
+        return _as_range(today + timedelta(days=count * (7 if match.group(2).startswith("week") else 1)))
+    match = MONTH_ONLY_RE.search(text)
+    if match:
+        month = MONTHS[match.group(1)]
+        year = int(match.group(2)) if match.group(2) else today.year + (month < today.month)
+        if date(year, month, calendar.monthrange(year, month)[1]) < today:
+            return None
+        return _as_range(*_month_range(year, month, today))
+    return None
+
+
+def _clock(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.startswith("p") else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_time(text):
+    match = TIME_RANGE_RE.search(text)
+    if match:
+        start = _clock(match.group(1), match.group(2), match.group(3) or match.group(6))
+        end = _clock(match.group(4), match.group(5), match.group(6))
+        if start and end:
+            return {"start": start, "end": end}
+    match = TIME_12H_RE.search(text)
+    if match:
+        clock = _clock(match.group(1), match.group(2), match.group(3))
+        return {"start": clock, "end": clock} if clock else None
+    match = TIME_24H_RE.search(text)
+    if match and (int(match.group(1)) > 12 or match.group(1).startswith("0")):
+        clock = f"{int(match.group(1)):02d}:{match.group(2)}"
+        return {"start": clock, "end": clock}
+
+    period = PERIOD_RE.search(text)
+    if period is None:
+        # "at 8" or "7:30": the reading of the hour that falls in MEAL_HOURS
+        match = BARE_CLOCK_RE.match(text)
+        if match and 1 <= int(match.group(1)) <= 12:
+            meridiem = "am" if int(match.group(1)) % 12 in MEAL_HOURS else "pm"
+            clock = _clock(match.group(1), match.group(2), meridiem)
+            return {"start": clock, "end": clock} if clock else None
+        return None
+    # "8 in the evening" or "dinner at 8": the period picks am or pm for a bare hour
+    hour = BARE_HOUR_RE.search(text[:period.start()] + " " + text[period.end():])
+    if hour and 1 <= int(hour.group(1)) <= 12 and period.group(1) not in ("noon", "midnight"):
+        meridiem = "am" if period.group(1) in ("early morning", "morning", "breakfast") else "pm"
+        clock = _clock(hour.group(1), hour.group(2), meridiem)
+        if period.group(1) == "lunch" and hour.group(1) == "12":
+            clock = "12:00"
+        return {"start": clock, "end": clock}
+    start, end = PERIODS[period.group(1)]
+    return {"start": start, "end": end}
+
+
+def _amount(number, unit):
+    value = float(number.replace(",", "")) * AMOUNT_UNITS.get(unit or "", 1)
+    return int(value) if value == int(value) else round(value, 2)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_amount(text):
+    currency = next((code for regex, code in CURRENCIES if regex.search(text)), None)
+    match = AMOUNT_RANGE_RE.search(text)
+    if match:
+        # "5-10k": the unit of the upper bound applies to both
+        low = _amount(match.group(1), match.group(2) or match.group(4))
+        high = _amount(match.group(3), match.group(4))
+        if low <= high:
+            return {"min": low, "max": high, "currency": currency}
+    match = AMOUNT_RE.search(text)
+    if match is None:
+        return None
+    amount = _amount(match.group(1), match.group(2))
+    prefix = text[:match.start()]
+    if UPPER_BOUND_RE.search(prefix):
+        return {"min": None, "max": amount, "currency": currency}
+    if LOWER_BOUND_RE.search(prefix):
+        return {"min": amount, "max": None, "currency": currency}
+    result = {"min": amount, "max": amount, "currency": currency}
+    if APPROXIMATE_RE.search(prefix):
+        result["approximate"] = True
+    return result
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_count(text):
+    if SOLO_RE.match(text):
+        return 1
+    if PAIR_RE.match(text):
+        return 2
+    parts = COUNT_SEPARATOR_RE.split(text)
+    if len(parts) > 1:
+        # "2 adults and 2 kids" or "me, my wife and 2 kids": every part is a count or one companion
+        counts = [1 if COMPANION_RE.match(part) else _parse_count(part) for part in parts]
+        return sum(counts) if all(counts) else None
+    match = COUNT_RE.match(text)
+    if match is None:
+        return None
+    value = match.group(1)
+    count = int(value) if value.isdigit() else NUMBER_WORDS[value]
+    return count if count > 0 else None
+
+
+class EntityNormalizer:
+    """
+    Deterministic normalization of the date, time, amount and count entities of an intent.
+    """
+
+    def __init__(self, default_currency="INR"):
+        """
+        Args:
+            default_currency (str): Currency code of amounts that do not name one
+        """
+        self.default_currency = default_currency
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, kind, resolved):
+        with self._lock:
+            self.stats[f"{kind}:{'resolved' if resolved else 'unresolved'}"] += 1
+
+    def normalize_value(self, kind, value, now):
+        """
+        Normalize a single value.
+
+        Args:
+            kind (str): "date", "time", "amount" or "count"
+            value: The extracted value, usually free text
+            now (datetime): Session clock relative dates are resolved against
+
+        Returns:
+            The normalized value, None if it could not be resolved
+        """
+        if isinstance(value, bool) or value is None:
+            return None
+        if isinstance(value, (int, float)):
+            if kind == "count":
+                return int(value) if value > 0 and value == int(value) else None
+            if kind == "amount":
+                return {"min": value, "max": value, "currency": self.default_currency}
+            return None
+        if not isinstance(value, str):
+            return None
+        text = " ".join(value.lower().split()).strip(" .!?")
+        # Parsed values are cached and shared, callers get copies
+        if kind == "date":
+            parsed = _parse_date(text, now.date().toordinal())
+            return dict(parsed) if parsed else None
+        if kind == "time":
+            parsed = _parse_time(text)
+            return dict(parsed) if parsed else None
+        if kind == "count":
+            return _parse_count(text)
+        if kind == "amount":
+            parsed = _parse_amount(text)
+            if parsed is None:
+                return None
+            return {**parsed, "currency": parsed["currency"] or self.default_currency}
+        raise ValueError(f"Unknown entity kind {kind!r}")
+
+    def normalize(self, entities, kinds, now=None):
+        """
+        Normalize the entities that have a kind.
+
+        Args:
+            entities (dict): Extracted entity values by key, missing values are skipped
+            kinds (dict): Entity kind by key, keys without a kind are left to the follow-up chain
+            now (datetime): Session clock, the current time if not given
+
+        Returns:
+            tuple: (normalized, unresolved) where normalized maps keys to their normalized value
+                and unresolved lists the keys whose value could not be resolved
+        """
+        now = now or datetime.now()
+        normalized, unresolved = {}, []
+        for key, kind in kinds.items():
+            value = entities.get(key)
+            if value is None or value in ("", "None", "Not Specified"):
+                continue
+            result = self.normalize_value(kind, value, now)
+            self._count(kind, result is not None)
+            if result is None:
+                unresolved.append(key)
+            else:
+                normalized[key] = result
+        return normalized, unresolved
+
+
+def parse_cache_info():
+    """Returns the lru_cache statistics of the parsers, by kind."""
+    return {
+        "date": _parse_date.cache_info(),
+        "time": _parse_time.cache_info(),
+        "amount": _parse_amount.cache_info(),
+        "count": _parse_count.cache_info(),
+    }
+
+
+_default_normalizer = None
+_default_normalizer_lock = threading.Lock()
+
+
+def get_entity_normalizer():
+    """
+    Returns the process-wide entity normalizer, creating it on first use.
+
+    Configured with the environment variable ENTITY_DEFAULT_CURRENCY (default INR).
+    """
+    global _default_normalizer
+    if _default_normalizer is None:
+        with _default_normalizer_lock:
+            if _default_normalizer is None:
+                _default_normalizer = EntityNormalizer(default_currency=os.getenv("ENTITY_DEFAULT_CURRENCY", "INR"))
+    return _default_normalizer
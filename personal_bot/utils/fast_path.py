@@ -0,0 +1,135 @@
+"""
+Small Talk Fast Path
+
+This module implements a pre-pipeline fast path for greetings and canned small talk.
+Queries made up only of greetings, thanks, goodbyes and "how are you" variants are answered
+from a compiled pattern table without calling any chain.
+
+Key functionalities:
+- Pattern and response table loaded from a JSON data file (personal_bot/data/small_talk.json)
+- Single compiled regex per table, a query matches only if every part of it is small talk
+- Optional filler words ("there", "bot", "so much") between small talk phrases
+- Hit rate and latency counters
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from collections import Counter
+
+DEFAULT_PATTERNS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "small_talk.json")
+
+# Longer queries are never small talk, they skip the regex entirely
+MAX_QUERY_LENGTH = 80
+
+
+def normalize_small_talk(query):
+    """
+    Lowercase the query, drop punctuation and emoji and collapse whitespace.
+    """
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s']", " ", query.lower())).strip()
+
+
+class FastPath:
+    """
+    Matches small talk queries against a compiled pattern table.
+    """
+
+    def __init__(self, patterns_path=None, table=None):
+        """
+        Args:
+            patterns_path (str): Path to the JSON pattern table, the bundled table if not given
+            table (dict): Pattern table passed in directly instead of a file
+        """
+        if table is None:
+            with open(patterns_path or DEFAULT_PATTERNS_PATH, "r") as f:
+                table = json.load(f)
+
+        self.categories = table["categories"]
+        self.priority = table.get("priority") or list(self.categories)
+        self.responses = {name: category["response"] for name, category in self.categories.items()}
+
+        alternatives = "|".join(
+            f"(?P<{name}>(?:{'|'.join(category['patterns'])}))\\b"
+            for name, category in self.categories.items()
+        )
+        fillers = "|".join(re.escape(filler) for filler in sorted(table.get("fillers", []), key=len, reverse=True))
+        filler_part = f"(?:\\s+(?:{fillers})\\b)*" if fillers else ""
+        # One small talk phrase, optional fillers and an optional joining "and"
+        self.pattern = re.compile(f"\\s*(?:{alternatives}){filler_part}\\s*(?:\\band\\b)?\\s*")
+
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def match(self, query, record_stats=True):
+        """
+        Check whether the query is small talk only.
+
+        Args:
+            query (str): The user query
+            record_stats (bool): Count the check in the hit rate and latency stats
+
+        Returns:
+            str: The small talk category with the highest priority found in the query, None if the
+                query contains anything that is not small talk
+        """
+        start = time.perf_counter_ns()
+        text = normalize_small_talk(query) if len(query) <= MAX_QUERY_LENGTH else ""
+
+        found = set()
+        position = 0
+        while text and position < len(text):
+            match = self.pattern.match(text, position)
+            if match is None or match.end() == position:
+                found = set()
+                break
+            found.update(name for name, value in match.groupdict().items() if value is not None)
+            position = match.end()
+
+        category = next((name for name in self.priority if name in found), None)
+        if not record_stats:
+            return category
+        with self._lock:
+            self.stats["checks"] += 1
+            self.stats["check_ns"] += time.perf_counter_ns() - start
+            if category is not None:
+                self.stats["hits"] += 1
+                self.stats[f"hits_{category}"] += 1
+        return category
+
+    def respond(self, category):
+        """Returns the canned reply for a small talk category."""
+        return self.responses[category]
+
+    def hit_rate(self):
+        return self.stats["hits"] / self.stats["checks"] if self.stats["checks"] else 0.0
+
+    def mean_check_us(self):
+        return self.stats["check_ns"] / self.stats["checks"] / 1000 if self.stats["checks"] else 0.0
+
+
+_default_fast_path = None
+_default_fast_path_lock = threading.Lock()
+
+
+def get_fast_path():
+    """
+    Returns the process-wide fast path, loading the pattern table from SMALL_TALK_PATTERNS or
+    the bundled table on first use.
+    """
+    global _default_fast_path
+    if _default_fast_path is None:
+        with _default_fast_path_lock:
+            if _default_fast_path is None:
+                _default_fast_path = FastPath(os.getenv("SMALL_TALK_PATTERNS"))
+    return _default_fast_path
+
+
+if __name__ == "__main__":
+    fast_path = FastPath()
+    for query in ["Hi!", "hey there, how are you?", "thanks a lot, bye", "hi, book a table for 2", "Good morning bot 👋", "ok book a cab"]:
+        category = fast_path.match(query)
+        print(f"{query!r:35} {category} {fast_path.respond(category) if category else ''}")
+    print(f"hit rate {fast_path.hit_rate():.2f}, mean check {fast_path.mean_check_us():.1f} us")
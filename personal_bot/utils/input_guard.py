@@ -0,0 +1,238 @@
+"""
+Input Guard
+
+This module implements the size limits of user input and of the inputs of every chain.
+Token counts are estimated locally with the same estimate as the token ledger (about four
+characters per token), so no tokenizer or API call is needed before the pipeline runs.
+
+Key functionalities:
+- Pre-pipeline check of the user query, over-limit queries are truncated or rejected
+- Entity preserving truncation that keeps the request sentence and the sentences and spans with
+  numbers, dates, times, amounts and places
+- Per-chain input limits, capped so that the rendered prompt plus the completion budget
+  (max_tokens) always fits the model's context window
+- Counters of checked, truncated and rejected inputs
+"""
+
+import os
+import re
+import json
+import threading
+from collections import Counter
+
+from ..token_ledger import estimate_tokens
+from .keyword_intent import INTENT_KEYWORDS
+
+# Context window in tokens per model, prompt and completion together
+MODEL_CONTEXT_WINDOWS = {
+    "llama-3.3-70b-versatile": 128000,
+    "llama3-70b-8192": 8192,
+    "llama-3.1-8b-instant": 128000,
+    "llama3-8b-8192": 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# The token estimate is rough, keep this fraction of the window free
+SAFETY_MARGIN = 0.1
+
+# Tokens allowed for the variable inputs of each chain (query, context, entity keys), on top of the template
+DEFAULT_CHAIN_LIMITS = {
+    "contextual_query_chain": 700,
+    "intent_classifier_chain": 400,
+    "extract_key_entities_chain": 800,
+    "follow_up_questions_chain": 1200,
+    "other_chain": 400,
+    "summary_chain": 900,
+}
+
+MONTHS = r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|aug(?:ust)?|sep(?:tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+ENTITY_RES = [
+    # Numbers with units: counts, times, amounts, dates
+    re.compile(r"(?:₹|rs\.?|inr)?\s*\d[\d,.:/-]*\s*(?:am|pm|rupees|rs|inr|people|persons|guests|adults|kids|children|nights?|days?|st|nd|rd|th)?\b", re.IGNORECASE),
+    re.compile(rf"\b(?:today|tonight|tomorrow|this weekend|next (?:week|month|\w+day)|(?:mon|tues|wednes|thurs|fri|satur|sun)day|{MONTHS})\b", re.IGNORECASE),
+    # Capitalized places after a preposition
+    re.compile(r"\b(?:in|at|near|from|to|around) [A-Z][\w']*(?: [A-Z][\w']*)*"),
+]
+KEYWORD_RE = re.compile(r"\b(?:" + "|".join(re.escape(keyword) for _, keywords in INTENT_KEYWORDS for keyword in keywords) + r")", re.IGNORECASE)
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+class InputTooLong(ValueError):
+    """Raised when a query is over the limit and the guard rejects instead of truncating."""
+
+
+def entity_spans(text):
+    """Returns the sorted (start, end) spans of the entities found in the text."""
+    return sorted({match.span() for regex in ENTITY_RES for match in regex.finditer(text) if match.group(0).strip()})
+
+
+def hard_truncate(text, max_tokens):
+    """Cut text to about `max_tokens` tokens at a word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(0, max_tokens * 4 - 4)]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + " ..."
+
+
+def truncate_preserving_entities(text, max_tokens, window=4):
+    """
+    Shorten text to about `max_tokens` tokens, keeping what the pipeline needs from it.
+
+    The first sentence (usually the request itself) is kept, then the sentences with the most
+    entities and intent keywords, in their original order. If even that does not fit, only the
+    entities with a few words around them are kept.
+
+    Args:
+        text (str): The text
+        max_tokens (int): Token ceiling
+        window (int): Words kept on either side of an entity when falling back to entity snippets
+
+    Returns:
+        str: The shortened text, dropped parts are marked with "..."
+    """
+    text = text.strip()
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    sentences = [sentence.strip() for sentence in SENTENCE_SPLIT_RE.split(text) if sentence.strip()]
+    scores = [len(entity_spans(sentence)) + 2 * len(KEYWORD_RE.findall(sentence)) for sentence in sentences]
+    order = [0] + sorted(range(1, len(sentences)), key=lambda index: -scores[index])
+    kept, used = set(), 0
+    for index in order:
+        if scores[index] == 0 and index != 0:
+            break
+        tokens = estimate_tokens(sentences[index]) + 1
+        if used + tokens <= max_tokens:
+            kept.add(index)
+            used += tokens
+    if kept:
+        parts, previous = [], -1
+        for index in sorted(kept):
+            if index != previous + 1:
+                parts.append("...")
+            parts.append(sentences[index])
+            previous = index
+        if previous != len(sentences) - 1:
+            parts.append("...")
+        return hard_truncate(" ".join(parts), max_tokens)
+
+    # A single huge sentence: keep the entities and intent keywords with some words around them
+    words = list(re.finditer(r"\S+", text))
+    keep = set()
+    spans = entity_spans(text) + [match.span() for match in KEYWORD_RE.finditer(text)]
+    for start, end in spans:
+        covered = [i for i, word in enumerate(words) if word.start() < end and word.end() > start]
+        if covered:
+            keep.update(range(max(0, covered[0] - window), min(len(words), covered[-1] + window + 1)))
+    parts, previous = [], -1
+    for i in sorted(keep):
+        if i != previous + 1:
+            parts.append("...")
+        parts.append(words[i].group(0))
+        previous = i
+    return hard_truncate(" ".join(parts) if parts else text, max_tokens)
+
+
+class InputGuard:
+    """
+    Size limits of the user query and of the chain inputs.
+    """
+
+    def __init__(self, max_query_tokens=256, mode="truncate", chain_limits=None):
+        """
+        Args:
+            max_query_tokens (int): Token limit of a user query
+            mode (str): "truncate" over-limit queries or "reject" them with InputTooLong
+            chain_limits (dict): Token limit of the variable inputs per chain, merged over DEFAULT_CHAIN_LIMITS
+        """
+        if mode not in ("truncate", "reject"):
+            raise ValueError(f"Unknown input guard mode {mode!r}, expected 'truncate' or 'reject'")
+        self.max_query_tokens = max_query_tokens
+        self.mode = mode
+        self.chain_limits = {**DEFAULT_CHAIN_LIMITS, **(chain_limits or {})}
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def check_query(self, query):
+        """
+        Apply the query limit before the pipeline runs.
+
+        Returns:
+            str: The query, truncated if it was over the limit
+
+        Raises:
+            InputTooLong: If the query is over the limit and the mode is "reject"
+        """
+        self._count("queries")
+        tokens = estimate_tokens(query)
+        if tokens <= self.max_query_tokens:
+            return query
+        if self.mode == "reject":
+            self._count("rejected")
+            raise InputTooLong(f"Message is about {tokens} tokens, the limit is {self.max_query_tokens}")
+        self._count("truncated")
+        return truncate_preserving_entities(query, self.max_query_tokens)
+
+    def input_budget(self, name, template_tokens, model_name, max_tokens):
+        """
+        Returns the tokens available to a chain's variable inputs: the chain limit, capped by what
+        is left of the model window after the template, the completion budget and the safety margin.
+        """
+        window = MODEL_CONTEXT_WINDOWS.get(model_name, DEFAULT_CONTEXT_WINDOW)
+        available = int(window * (1 - SAFETY_MARGIN)) - template_tokens - (max_tokens or 0)
+        return max(0, min(self.chain_limits.get(name, available), available))
+
+    def fit_chain_inputs(self, name, prompt, inputs, model_name, max_tokens):
+        """
+        Shorten the inputs of a chain call until they fit the chain's input budget, longest input first.
+
+        Args:
+            name (str): The chain name
+            prompt (PromptTemplate): The chain's prompt
+            inputs (dict): The chain inputs
+            model_name (str): Model the chain runs on
+            max_tokens (int): Completion budget of the call
+
+        Returns:
+            dict: The inputs, a truncated copy if they were over the budget
+        """
+        budget = self.input_budget(name, estimate_tokens(prompt.template), model_name, max_tokens)
+        sizes = {key: estimate_tokens(value) for key, value in inputs.items() if isinstance(value, str)}
+        if sum(sizes.values()) <= budget:
+            return inputs
+        self._count(f"chain_truncated:{name}")
+        inputs = dict(inputs)
+        for key in sorted(sizes, key=sizes.get, reverse=True):
+            others = sum(size for other, size in sizes.items() if other != key)
+            inputs[key] = truncate_preserving_entities(inputs[key], max(1, budget - others))
+            sizes[key] = estimate_tokens(inputs[key])
+            if sum(sizes.values()) <= budget:
+                break
+        return inputs
+
+
+_default_guard = None
+_default_guard_lock = threading.Lock()
+
+
+def get_input_guard():
+    """
+    Returns the process-wide input guard, creating it on first use.
+
+    Configured with the environment variables INPUT_MAX_TOKENS (query limit, default 256),
+    INPUT_GUARD_MODE ("truncate" or "reject") and INPUT_CHAIN_LIMITS (JSON object of per-chain limits).
+    """
+    global _default_guard
+    if _default_guard is None:
+        with _default_guard_lock:
+            if _default_guard is None:
+                _default_guard = InputGuard(
+                    max_query_tokens=int(os.getenv("INPUT_MAX_TOKENS", "256")),
+                    mode=os.getenv("INPUT_GUARD_MODE", "truncate"),
+                    chain_limits=json.loads(os.getenv("INPUT_CHAIN_LIMITS", "{}")),
+                )
+    return _default_guard
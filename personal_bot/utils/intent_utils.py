@@ -2,52 +2,187 @@
 This module defines the core intent classes used for handling different types of user requests in the chat system.
 Each intent class represents a specific type of user request (dining, travel, cab booking, gifting) and manages
 the relevant information associated with that intent.
+
+Intents are declared once as a tuple of `Field`s. The `IntentMeta` metaclass turns the fields into `__slots__`,
+precomputes key lists, validators, follow-up question templates, the JSON schema and the prompt fragment at import
+time, and registers the intent in `INTENT_REGISTRY` so the chat agent can dispatch with a dict lookup.
 """
 
-from typing import Optional, List
+NOT_SPECIFIED = "Not Specified"
+
+# Registry of intent category name -> intent class, filled in by IntentMeta
+INTENT_REGISTRY = {}
+
+_JSON_SCHEMA_TYPES = {str: "string", int: "integer", float: "number", list: "array"}
+
 
-class Intent:
+class Field:
+    """
+    Declaration of a single intent attribute.
+
+    Attributes:
+        name (str): Attribute name, also the key used by the entity extraction chain
+        type (type): Expected value type, `list` fields are lists of strings
+        required (bool): Whether the value is needed before the request can be fulfilled
+        question (str): Follow-up question asked when the value is missing
+        description (str): Human readable description, used in the JSON schema
+        kind (str): "date", "time", "amount" or "count" for values the entity normalizer resolves locally
+    """
+
+    __slots__ = ("name", "type", "required", "question", "description", "kind")
+
+    def __init__(self, name, type=str, required=True, question=None, description="", kind=None):
+        self.name = name
+        self.type = type
+        self.required = required
+        self.question = question or f"Could you tell me the {name.replace('_', ' ')}?"
+        self.description = description
+        self.kind = kind
+
+    def validate(self, value):
+        """
+        Coerces an extracted value to the field type where this is unambiguous.
+
+        List fields accept a single string and wrap it in a list, other fields are returned unchanged.
+        """
+        if self.type is list and isinstance(value, str):
+            return [value]
+        return value
+
+    def json_schema(self):
+        schema = {"type": _JSON_SCHEMA_TYPES.get(self.type, "string"), "description": self.description}
+        if self.type is list:
+            schema["items"] = {"type": "string"}
+        return schema
+
+
+class IntentMeta(type):
+    """
+    Metaclass that precomputes everything an intent needs from its `fields` declaration.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = tuple(namespace.get("fields", ()))
+        namespace["__slots__"] = tuple(field.name for field in fields)
+        cls = super().__new__(mcs, name, bases, namespace)
+
+        cls.keys = tuple(field.name for field in fields)
+        cls.key_set = frozenset(cls.keys)
+        cls.required_keys = tuple(field.name for field in fields if field.required)
+        cls.validators = {field.name: field.validate for field in fields}
+        cls.questions = {field.name: field.question for field in fields}
+        cls.kinds = {field.name: field.kind for field in fields if field.kind}
+        cls.keys_prompt = str(list(cls.keys))
+        cls.json_schema = {
+            "title": name,
+            "type": "object",
+            "properties": {field.name: field.json_schema() for field in fields},
+            "required": list(cls.required_keys),
+        }
+
+        intent_name = namespace.get("intent_name")
+        if intent_name:
+            INTENT_REGISTRY[intent_name] = cls
+        return cls
+
+
+class Intent(metaclass=IntentMeta):
     """
     Base class for all intent types. Provides common functionality for managing intent information.
-    
+
     This class implements the basic operations that all intent types should support:
     - Getting all keys (attributes) of the intent
     - Identifying missing information
     - Updating intent information
     - Retrieving current intent information
     """
-    
+
+    intent_name = None
+    fields = ()
+
+    def __init__(self):
+        for key in self.keys:
+            setattr(self, key, None)
+
     def get_keys(self):
         """Returns a list of all attribute names (keys) defined in the intent class."""
-        return [key for key in self.__dict__]
-    
+        return list(self.keys)
+
     def get_missing_info(self):
         """Returns a list of attribute names that have not been set (are None)."""
-        return [key for key in self.__dict__ if getattr(self, key) is None]
-    
-    def update_info(self, info: dict):
+        return [key for key in self.keys if getattr(self, key) is None]
+
+    def get_missing_required_info(self):
+        """Returns a list of required attribute names that have not been set."""
+        return [key for key in self.required_keys if _is_empty(getattr(self, key))]
+
+    def update_info(self, info: dict, skip_empty=False):
         """
         Updates the intent's attributes with new information.
-        
+
+        Keys that are not declared for the intent are ignored and values are passed through the field validators.
+
         Args:
             info (dict): Dictionary containing key-value pairs to update the intent's attributes
+            skip_empty (bool): Keep the current value when the new value is missing or empty
         """
         for key, value in info.items():
-            setattr(self, key, value)
+            if skip_empty and _is_empty(value):
+                continue
+            if key in self.key_set:
+                setattr(self, key, self.validators[key](value))
 
     def get_updated_info(self):
         """Returns a dictionary of all non-None attributes and their values."""
-        return {key: getattr(self, key) for key in self.__dict__ if getattr(self, key) is not None}
-    
+        return {key: getattr(self, key) for key in self.keys if getattr(self, key) is not None}
+
     def get_info(self):
         """Returns a dictionary of all attributes and their values, including None values."""
-        return {key: getattr(self, key) for key in self.__dict__}
+        return {key: getattr(self, key) for key in self.keys}
+
+    def get_normalized_info(self):
+        """Returns a dictionary of all attributes with missing or empty values replaced by "Not Specified"."""
+        return {key: NOT_SPECIFIED if _is_empty(getattr(self, key)) else getattr(self, key) for key in self.keys}
+
+    def get_missing_questions(self, unresolved=()):
+        """
+        Returns the follow-up question templates for all required attributes that are still missing,
+        and for the attributes in `unresolved` whose values could not be understood.
+        """
+        keys = self.get_missing_required_info()
+        return [self.questions[key] for key in keys + [key for key in unresolved if key not in keys]]
+
+
+def _is_empty(value):
+    return value is None or value == "None" or value == "" or value == [] or value == NOT_SPECIFIED
+
+
+def incomplete_intents(partial_intents):
+    """
+    Returns the partially filled intents that still miss a required slot.
+
+    Args:
+        partial_intents (dict): Slot values by intent category, as kept in the session state
+
+    Returns:
+        dict: The entries of `partial_intents` whose intent has a missing required slot
+    """
+    incomplete = {}
+    for intent_category, info in (partial_intents or {}).items():
+        intent_class = INTENT_REGISTRY.get(intent_category)
+        if intent_class is None:
+            continue
+        intent = intent_class()
+        intent.update_info(info or {})
+        if intent.get_missing_required_info():
+            incomplete[intent_category] = info
+    return incomplete
 
 
 class DiningIntent(Intent):
     """
     Represents the dining intent, handling restaurant reservations and dining queries.
-    
+
     Attributes:
         date (Optional[str]): Date for the dining reservation
         time (Optional[str]): Time for the dining reservation
@@ -57,19 +192,21 @@ class DiningIntent(Intent):
         party_size (Optional[str]): Number of people dining
         special_requests (Optional[List[str]]): Any special requirements or preferences
     """
-    def __init__(self):
-        self.date: Optional[str] = None
-        self.time: Optional[str] = None
-        self.location: Optional[str] = None
-        self.budget: Optional[str] = None
-        self.cuisine: Optional[str] = None
-        self.party_size: Optional[str] = None
-        self.special_requests: Optional[List[str]] = None
-    
+    intent_name = "dining"
+    fields = (
+        Field("date", question="Which date would you like to book the table for?", description="Date for the dining reservation", kind="date"),
+        Field("time", question="What time would you like to book the table for?", description="Time for the dining reservation", kind="time"),
+        Field("location", question="Where would you prefer to dine? Would you prefer a particular restaurant?", description="Location/area for dining"),
+        Field("budget", required=False, question="Do you have a specific budget in mind?", description="Budget range for dining", kind="amount"),
+        Field("cuisine", required=False, question="Do you have a preferred cuisine or type of food in mind?", description="Preferred cuisine type"),
+        Field("party_size", question="How many people will be attending?", description="Number of people dining", kind="count"),
+        Field("special_requests", type=list, required=False, question="Any special requests for the reservation?", description="Any special requirements or preferences"),
+    )
+
 class TravelIntent(Intent):
     """
     Represents the travel intent, handling trip planning and travel arrangements.
-    
+
     Attributes:
         location_from (Optional[str]): Starting location of the journey
         location_to (Optional[str]): Destination of the journey
@@ -80,20 +217,22 @@ class TravelIntent(Intent):
         budget (Optional[str]): Travel budget
         special_requests (Optional[List[str]]): Any special travel requirements
     """
-    def __init__(self):
-        self.location_from: Optional[str] = None
-        self.location_to: Optional[str] = None
-        self.start_date: Optional[str] = None
-        self.end_date: Optional[str] = None
-        self.mode: Optional[str] = None
-        self.members: Optional[str] = None
-        self.budget: Optional[str] = None
-        self.special_requests: Optional[List[str]] = None
+    intent_name = "travel"
+    fields = (
+        Field("location_from", question="Where will you be travelling from?", description="Starting location of the journey"),
+        Field("location_to", question="Where would you like to travel to?", description="Destination of the journey"),
+        Field("start_date", question="When would you like to start the trip?", description="Journey start date", kind="date"),
+        Field("end_date", question="When will you be returning?", description="Journey end date", kind="date"),
+        Field("mode", required=False, question="Do you have a preferred mode of travel (flight, train, etc.)?", description="Mode of travel (flight, train, etc.)"),
+        Field("members", question="How many people will be travelling?", description="Number of travelers", kind="count"),
+        Field("budget", required=False, question="Do you have a budget in mind for the trip?", description="Travel budget", kind="amount"),
+        Field("special_requests", type=list, required=False, question="Do you have any special requests or preferences for the trip?", description="Any special travel requirements"),
+    )
 
 class CabIntent(Intent):
     """
     Represents the cab booking intent, handling ride requests and transportation.
-    
+
     Attributes:
         pickup_location (Optional[str]): Starting point for the ride
         drop_off_location (Optional[str]): Destination for the ride
@@ -101,55 +240,41 @@ class CabIntent(Intent):
         budget (Optional[str]): Budget for the ride
         special_requests (Optional[List[str]]): Any special requirements for the ride
     """
-    def __init__(self):
-        self.pickup_location: Optional[str] = None
-        self.drop_off_location: Optional[str] = None
-        self.members: Optional[str] = None
-        self.budget: Optional[str] = None
-        self.special_requests: Optional[List[str]] = None
+    intent_name = "cab_booking"
+    fields = (
+        Field("pickup_location", question="Where should the cab pick you up from?", description="Starting point for the ride"),
+        Field("drop_off_location", question="Where would you like to be dropped off?", description="Destination for the ride"),
+        Field("members", question="How many people will be travelling?", description="Number of passengers", kind="count"),
+        Field("budget", required=False, question="What is your budget for the cab?", description="Budget for the ride", kind="amount"),
+        Field("special_requests", type=list, required=False, question="Do you have any preferences or special requests for the cab?", description="Any special requirements for the ride"),
+    )
 
 class GiftingIntent(Intent):
     """
     Represents the gifting intent, handling gift-related queries and requests.
-    
+
     Attributes:
         recipient (Optional[str]): Person receiving the gift
         occasion (Optional[str]): Occasion for the gift
         budget (Optional[str]): Budget for the gift
         special_requests (Optional[List[str]]): Any special requirements for the gift
     """
-    def __init__(self):
-        self.recipient: Optional[str] = None
-        self.occasion: Optional[str] = None
-        self.budget: Optional[str] = None
-        self.special_requests: Optional[List[str]] = None
+    intent_name = "gifting"
+    fields = (
+        Field("recipient", question="Who is the gift for?", description="Person receiving the gift"),
+        Field("occasion", question="What is the occasion for the gift?", description="Occasion for the gift"),
+        Field("budget", question="What price range do you have in mind for the gift?", description="Budget for the gift", kind="amount"),
+        Field("special_requests", type=list, required=False, question="Any special requests or preferences for the gift?", description="Any special requirements for the gift"),
+    )
 
 if __name__ == "__main__":
     # Example usage and testing of intent classes
-    dining_intent = DiningIntent()
-    print(dining_intent.get_keys())
-    # print(dining_intent.get_missing_info())
+    for intent_name, intent_class in INTENT_REGISTRY.items():
+        intent = intent_class()
+        print(intent_name, intent.get_keys())
+        print(intent.get_missing_questions())
+    # dining_intent = DiningIntent()
     # dining_intent.update_info({"date": "2024-01-01", "time": "12:00 pm"})
     # print(dining_intent.get_missing_info())
     # print(dining_intent.get_info())
-
-    travel_intent = TravelIntent()
-    print(travel_intent.get_keys())
-    # print(travel_intent.get_missing_info())
-    # travel_intent.update_info({"date": "2024-01-01", "location_from": "mumbai", "location_to": "delhi", "mode": "flight", "budget": 10000})
-    # print(travel_intent.get_missing_info())
-    # print(travel_intent.get_info())
-
-    cab_intent = CabIntent()
-    print(cab_intent.get_keys())
-    # print(cab_intent.get_missing_info())
-    # cab_intent.update_info({"pickup_location": "mumbai", "drop_off_location": "delhi", "members": 2, "budget": 10000})
-    # print(cab_intent.get_missing_info())
-    # print(cab_intent.get_info())
-    
-    gifting_intent = GiftingIntent()
-    print(gifting_intent.get_keys())
-    # print(gifting_intent.get_missing_info())
-    # gifting_intent.update_info({"recipient": "mumbai", "occasion": "delhi", "budget": 10000})
-    # print(gifting_intent.get_missing_info())
-    # print(gifting_intent.get_info())
\ No newline at end of file
+    # print(DiningIntent.json_schema)
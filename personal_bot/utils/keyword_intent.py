@@ -0,0 +1,64 @@
+"""
+Keyword Intent Classifier
+
+This module implements a cheap local intent classifier based on keyword lists.
+It is used when there is no time left for the intent classifier chain and by the fake LLM.
+
+Key functionalities:
+- Keyword based classification into the intent categories of the classifier chain
+- Splitting of compound queries into one span per request
+"""
+
+import re
+
+INTENT_KEYWORDS = [
+    ("cab_booking", ["cab", "taxi", "ride", "pickup", "drop me", "uber", "ola"]),
+    ("dining", ["table", "restaurant", "dinner", "lunch", "breakfast", "dine", "dining", "cafe", "eat"]),
+    ("gifting", ["gift", "present", "flowers", "chocolates", "hamper"]),
+    ("travel", ["trip", "travel", "flight", "train", "vacation", "holiday", "tour", "visit", "itinerary"]),
+]
+
+GREETING_RE = re.compile(r"^\W*(hi|hello|hey|good (morning|afternoon|evening)|how are you)\b[\W\w]{0,20}$", re.IGNORECASE)
+INTENT_SPLIT_RE = re.compile(r",?\s+(?:and then|and also|then|and)\s+(?=(?:also |then )?(?:a|an|book|get|send|plan|order|call)\b)", re.IGNORECASE)
+
+
+def classify_intent_keywords(query):
+    """
+    Keyword based intent classification.
+
+    Args:
+        query (str): The user query
+
+    Returns:
+        tuple: (intent_category, confidence_score)
+    """
+    lowered = query.lower()
+    if GREETING_RE.match(lowered.strip()):
+        return "greetings", 0.95
+    for intent_category, keywords in INTENT_KEYWORDS:
+        if any(re.search(rf"\b{re.escape(keyword)}", lowered) for keyword in keywords):
+            return intent_category, 0.9
+    return "other", 0.7
+
+
+def split_intents_keywords(query):
+    """
+    Split a compound query into one span per request and classify each span.
+
+    Args:
+        query (str): The user query
+
+    Returns:
+        list: Dicts with the keys "intent_category", "confidence_score" and "span", one per distinct intent
+    """
+    intents = []
+    for span in INTENT_SPLIT_RE.split(query):
+        intent_category, confidence_score = classify_intent_keywords(span)
+        if intent_category in ("other", "greetings") and intents:
+            # Trailing fragments without their own keywords belong to the previous request
+            intents[-1]["span"] = f"{intents[-1]['span']} and {span}"
+            continue
+        if any(intent["intent_category"] == intent_category for intent in intents):
+            continue
+        intents.append({"intent_category": intent_category, "confidence_score": confidence_score, "span": span.strip()})
+    return intents
@@ -0,0 +1,224 @@
+"""
+Sampling Profiler
+
+This module implements a low overhead sampling profiler that attributes the time spent in a block
+of code to pipeline stages, and within a stage to local CPU work versus waiting on the network.
+
+Key functionalities:
+- Background thread sampling the Python stacks of all threads running project code
+- On-CPU time measured with per-thread CPU clocks where the platform has them (Linux, macOS)
+- Off-CPU time split into network I/O and waiting on other threads by the frames on the stack
+- Stage attribution by matching the stack against (label, path, function) rules, innermost match wins
+- Flame graph compatible collapsed stack output, weighted in microseconds
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter, defaultdict
+
+CATEGORIES = ("cpu", "network", "wait", "other")
+
+# Off-CPU time is network I/O when any of these modules is on the stack. The fake LLM backend
+# sleeps to simulate the latency of the LLM API, so its sleep counts as network time as well.
+NETWORK_PATHS = (
+    "/socket.py", "/ssl.py", "/selectors.py", "/http/client.py", "/httpx/", "/httpcore/",
+    "/urllib3/", "/requests/", "/groq/", "/duckduckgo_search/", "/personal_bot/fake_llm.py",
+)
+
+# Off-CPU time is waiting on another thread when the innermost frame is in one of these modules
+WAIT_PATHS = ("/threading.py", "/queue.py", "/concurrent/futures/")
+
+
+def _normalize_path(path):
+    return path.replace("\\", "/")
+
+
+def format_frame(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileResult:
+    """
+    Time attributed by a profiling session, in thread-seconds per stage and category.
+
+    Time of threads running in parallel adds up, so the stage totals can exceed the wall time.
+    """
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.samples = 0
+        self.stacks = Counter()
+        self.stages = defaultdict(Counter)
+
+    def add(self, stage, category, stack, seconds):
+        self.stages[stage][category] += seconds
+        self.stacks[(category, stage) + stack] += seconds
+
+    def merge(self, other):
+        """Add the time of another result to this one."""
+        self.wall += other.wall
+        self.cpu += other.cpu
+        self.samples += other.samples
+        self.stacks.update(other.stacks)
+        for stage, categories in other.stages.items():
+            self.stages[stage].update(categories)
+
+    def write_collapsed(self, path):
+        """
+        Write the stacks in collapsed format ("frame;frame;frame weight"), readable by flamegraph.pl
+        and speedscope. The root frames are the category and the stage, weights are microseconds.
+        """
+        with open(path, "w") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                weight = int(seconds * 1_000_000)
+                if weight > 0:
+                    f.write(f"{';'.join(stack)} {weight}\n")
+
+    def summary(self):
+        """
+        Returns:
+            dict: Wall and process CPU time, and milliseconds per category for every stage
+        """
+        return {
+            "wall_ms": round(self.wall * 1000, 2),
+            "process_cpu_ms": round(self.cpu * 1000, 2),
+            "samples": self.samples,
+            "stages": {
+                stage: {category: round(categories[category] * 1000, 2) for category in CATEGORIES}
+                for stage, categories in sorted(self.stages.items(), key=lambda item: -sum(item[1].values()))
+            },
+        }
+
+    def format_table(self, title):
+        summary = self.summary()
+        lines = [
+            f"{title}: wall {summary['wall_ms']:.1f} ms, process CPU {summary['process_cpu_ms']:.1f} ms, {summary['samples']} samples",
+            f"  {'stage':<18}" + "".join(f"{category + ' ms':>12}" for category in CATEGORIES) + f"{'total ms':>12}",
+        ]
+        totals = Counter()
+        for stage, categories in summary["stages"].items():
+            totals.update(categories)
+            lines.append(f"  {stage:<18}" + "".join(f"{categories[category]:>12.1f}" for category in CATEGORIES)
+                         + f"{sum(categories.values()):>12.1f}")
+        lines.append(f"  {'total':<18}" + "".join(f"{totals[category]:>12.1f}" for category in CATEGORIES)
+                     + f"{sum(totals.values()):>12.1f}")
+        return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads running project code while it is started.
+    """
+
+    def __init__(self, stage_rules, interval=0.005, include_paths=None, default_stage="other"):
+        """
+        Args:
+            stage_rules (list): (stage, path, function) tuples, a frame matches if its file path contains
+                `path` and its function is `function`; None matches any path or function
+            interval (float): Seconds between samples
+            include_paths (list): Only threads with a frame from one of these paths are sampled,
+                the personal_bot package and the current working directory if not given
+            default_stage (str): Stage of stacks that match no rule
+        """
+        self.stage_rules = [(stage, path and _normalize_path(path), function) for stage, path, function in stage_rules]
+        self.interval = interval
+        self.include_paths = [_normalize_path(os.path.abspath(path)) for path in include_paths or [
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), os.getcwd(),
+        ]]
+        self.default_stage = default_stage
+        self._stage_cache = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._result = None
+        self._cpu_clocks = {}
+        self._last_cpu = {}
+
+    def _stage(self, code):
+        """Returns the stage of a frame, None if it matches no rule."""
+        if code not in self._stage_cache:
+            path = _normalize_path(code.co_filename)
+            self._stage_cache[code] = next(
+                (stage for stage, rule_path, function in self.stage_rules
+                 if (rule_path is None or rule_path in path) and (function is None or function == code.co_name)),
+                None,
+            )
+        return self._stage_cache[code]
+
+    def _thread_cpu(self, ident):
+        """Returns the CPU time of a thread, None if the platform has no per-thread CPU clocks."""
+        if not hasattr(time, "pthread_getcpuclockid"):
+            return None
+        try:
+            if ident not in self._cpu_clocks:
+                self._cpu_clocks[ident] = time.pthread_getcpuclockid(ident)
+            return time.clock_gettime(self._cpu_clocks[ident])
+        except (OSError, ProcessLookupError):
+            self._cpu_clocks.pop(ident, None)
+            return None
+
+    def _sample(self, elapsed):
+        own_ident = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            paths = [_normalize_path(code.co_filename) for code in codes]
+            if not any(path.startswith(include) for path in paths for include in self.include_paths):
+                continue
+
+            stage = next((stage for stage in map(self._stage, codes) if stage is not None), self.default_stage)
+            stack = tuple(format_frame(code) for code in reversed(codes))
+
+            cpu_now = self._thread_cpu(ident)
+            last_cpu = self._last_cpu.get(ident)
+            self._last_cpu[ident] = cpu_now
+            if any(network in path for path in paths for network in NETWORK_PATHS):
+                off_cpu = "network"
+            elif any(wait in paths[0] for wait in WAIT_PATHS):
+                off_cpu = "wait"
+            else:
+                off_cpu = "other"
+
+            if cpu_now is None or last_cpu is None:
+                # No CPU clock, attribute the whole interval by the frames on the stack
+                self._result.add(stage, "cpu" if off_cpu == "other" else off_cpu, stack, elapsed)
+                continue
+            cpu = min(elapsed, max(0.0, cpu_now - last_cpu))
+            self._result.add(stage, "cpu", stack, cpu)
+            self._result.add(stage, off_cpu, stack, elapsed - cpu)
+        self._result.samples += 1
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def start(self):
+        self._result = ProfileResult()
+        self._last_cpu = {ident: self._thread_cpu(ident) for ident in sys._current_frames()}
+        self._stop.clear()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop sampling.
+
+        Returns:
+            ProfileResult: The time attributed since `start`
+        """
+        self._stop.set()
+        self._thread.join()
+        self._result.wall = time.perf_counter() - self._wall_start
+        self._result.cpu = time.process_time() - self._cpu_start
+        return self._result
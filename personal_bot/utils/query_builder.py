@@ -0,0 +1,121 @@
+"""
+Local Search Query Builder
+
+This module implements a local keyword query compressor for web searches.
+It turns a natural language query into a search string by rewriting common phrases and
+stripping filler words, while keeping entities such as places, names, numbers and budgets.
+The other_chain LLM rewrite is only needed when the local rewrite has low confidence.
+
+Key functionalities:
+- Phrase lexicon for common request phrasings ("can you suggest" -> "best")
+- Stopword and filler word stripping
+- Preservation of capitalised entities, numbers and currency amounts
+- Confidence score for deciding when to fall back to other_chain
+"""
+
+import re
+
+# Phrase rewrites applied before word level filtering, in order
+PHRASE_LEXICON = [
+    (r"\bwhat(?:'s| is) the weather (?:like )?", "weather "),
+    (r"\b(?:can|could|would) you (?:please )?(?:suggest|recommend|find|show)(?: me)?(?: some| a few| any)?(?: good| nice)?\b", "best"),
+    (r"\bwhat are (?:some|the) (?:good |best |top )?", "best "),
+    (r"\b(?:i need|i want|looking for|suggest) (?:a |some )?gift idea(?:s)? for\b", "gift ideas for"),
+    (r"\bhow (?:do|can|should) (?:i|we|you)\b", "how to"),
+    (r"\bwhere can i (?:find|get|buy)\b", "where to buy"),
+    (r"\bbudget[- ]friendly\b", "budget"),
+    (r"\bnear me\b", "nearby"),
+]
+
+# Words that never help a search engine
+FILLER_WORDS = {
+    "a", "an", "the", "some", "any", "please", "kindly", "can", "could", "would", "will", "you",
+    "me", "i", "i'm", "im", "we", "us", "my", "our", "your", "want", "wanna", "need", "like",
+    "looking", "help", "tell", "know", "just", "really", "actually", "also", "maybe", "hey", "hi",
+    "hello", "there", "is", "are", "am", "be", "do", "does", "did", "that", "this", "it", "of",
+    "something", "so", "very", "get", "let", "let's", "lets", "suggest", "find", "show", "give",
+}
+
+# Words that make a query too vague for a keyword search on their own
+VAGUE_WORDS = {"somewhere", "something", "anything", "nice", "good", "cool", "stuff", "things", "place", "places", "go"}
+
+# Words that look like fillers but change the meaning of a search and must be kept
+KEEP_WORDS = {"how", "to", "what", "where", "when", "why", "which", "who", "not", "no", "without", "vs", "best", "cheap"}
+
+# Words dropped when they are left dangling at the start of the search string
+LEADING_STRIP_WORDS = {"to", "for", "with", "and", "on", "about"}
+
+_TOKEN_RE = re.compile(r"[\w₹$€£'’&+-]+")
+_NUMBER_RE = re.compile(r"\d")
+_COMPILED_LEXICON = [(re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in PHRASE_LEXICON]
+
+
+class QueryBuilder:
+    """
+    Local rewrite of user queries into keyword web search strings.
+    """
+
+    def __init__(self, min_content_words=2):
+        """
+        Args:
+            min_content_words (int): Minimum number of non-vague content words for a confident rewrite
+        """
+        self.min_content_words = min_content_words
+
+    def build(self, query):
+        """
+        Build a web search string from a user query.
+
+        Args:
+            query (str): The processed user query
+
+        Returns:
+            tuple: (search_string, confidence) where confidence is a float between 0 and 1
+        """
+
+        text = query.strip().replace("’", "'")
+        for pattern, replacement in _COMPILED_LEXICON:
+            text = pattern.sub(replacement, text)
+
+        tokens = _TOKEN_RE.findall(text)
+        kept = []
+        for index, token in enumerate(tokens):
+            word = re.sub(r"'s$", "", token)
+            lowered = word.lower()
+            is_entity = (index > 0 and word[:1].isupper()) or bool(_NUMBER_RE.search(word))
+            if is_entity or lowered in KEEP_WORDS or lowered not in FILLER_WORDS:
+                kept.append(word if is_entity else lowered)
+
+        # Leading prepositions are left over from phrases like "I want to ..." or "Looking for ..."
+        while kept and kept[0] in LEADING_STRIP_WORDS:
+            kept.pop(0)
+
+        search_string = " ".join(kept)
+        return search_string, self._confidence(tokens, kept)
+
+    def _confidence(self, tokens, kept):
+        if not kept:
+            return 0.0
+        content_words = [word for word in kept if word.lower() not in KEEP_WORDS]
+        specific_words = [word for word in content_words if word.lower() not in VAGUE_WORDS]
+        if len(specific_words) < self.min_content_words:
+            return 0.3 if specific_words else 0.1
+        vague_penalty = 0.15 * (len(content_words) - len(specific_words))
+        # Very aggressive compression usually means we threw away something important
+        kept_ratio = len(kept) / max(len(tokens), 1)
+        ratio_penalty = 0.2 if kept_ratio < 0.25 else 0.0
+        return round(max(0.0, min(1.0, 0.95 - vague_penalty - ratio_penalty)), 2)
+
+
+if __name__ == "__main__":
+    builder = QueryBuilder()
+    for example in [
+        "Looking for budget-friendly hotels in Manali for 2 people in June",
+        "Can you suggest some good Italian restaurants near Andheri West?",
+        "How to fix a leaking tap in the kitchen?",
+        "I need a gift idea for my mom’s birthday under 1000 rupees",
+        "I want to go somewhere nice",
+        "What's the weather like today?",
+        "Book a spaceship to Mars",
+    ]:
+        print(example, "->", builder.build(example))
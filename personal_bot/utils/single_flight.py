@@ -0,0 +1,144 @@
+"""
+Single Flight
+
+This module implements request coalescing for identical upstream calls.
+When several threads ask for the same key at the same time, only the first one (the leader)
+makes the upstream call and every other caller waits for and shares its result.
+
+Key functionalities:
+- Coalescing of concurrent calls with the same key into one upstream call
+- The leader's result or exception is fanned out to every waiter
+- Waiters can give up after a timeout without affecting the shared call
+- Stable keys built from a chain name, model parameters and the rendered prompt
+- Counters for leaders, coalesced calls and errors
+"""
+
+import json
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+
+def make_key(*parts):
+    """
+    Build a coalescing key from JSON serializable parts.
+
+    Args:
+        *parts: Values identifying the call, e.g. chain name, model name, parameters and prompt
+
+    Returns:
+        str: SHA-256 hex digest of the parts
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    Only calls that overlap in time are merged, a key is forgotten as soon as its call finishes,
+    so this never serves stale results. If the leader's call raises, every waiter gets the same
+    exception. A waiter that stops waiting (timeout) does not cancel the shared call, the other
+    waiters still get its result.
+    """
+
+    def __init__(self, name="single_flight"):
+        """
+        Args:
+            name (str): Name used in logs and metrics
+        """
+        self.name = name
+        self.stats = Counter()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        """Returns (future, leader) for the key, leader is True if the caller has to make the call."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.stats["leaders"] += 1
+            return future, True
+
+    def _finish(self, key, future, func, args, kwargs):
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self._forget(key)
+            self.stats["errors"] += 1
+            future.set_exception(e)
+        else:
+            self._forget(key)
+            future.set_result(result)
+
+    def _forget(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def do(self, key, func, *args, timeout=None, **kwargs):
+        """
+        Call `func(*args, **kwargs)` unless an identical call is already in flight, then wait for it.
+
+        The leader runs `func` in the calling thread.
+
+        Args:
+            key (str): Key identifying identical calls, see `make_key`
+            func (callable): The upstream call
+            timeout (float): Seconds a waiter waits for the leader's result, no limit if not given
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+            concurrent.futures.TimeoutError: If a waiter's timeout expires first
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._finish(key, future, func, args, kwargs)
+        return future.result(timeout=timeout)
+
+    def submit(self, key, executor, func, *args, **kwargs):
+        """
+        Like `do`, but the leader's call runs on `executor` and the shared future is returned.
+
+        Args:
+            key (str): Key identifying identical calls
+            executor (Executor): Executor running the upstream call
+            func (callable): The upstream call
+
+        Returns:
+            tuple: (future, leader) where leader is True if this call started the upstream call
+        """
+        future, leader = self._join(key)
+        if leader:
+            try:
+                executor.submit(self._finish, key, future, func, args, kwargs)
+            except BaseException as e:
+                self._forget(key)
+                future.set_exception(e)
+        return future, leader
+
+    def in_flight(self):
+        """Returns the number of keys with a call currently in flight."""
+        with self._lock:
+            return len(self._calls)
+
+
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    flight = SingleFlight()
+
+    def slow_call(value):
+        time.sleep(0.2)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: flight.do(make_key("demo", 21), slow_call, 21), range(8)))
+    print(results, dict(flight.stats))
@@ -0,0 +1,64 @@
+"""
+Speculative Execution
+
+This module implements the bookkeeping of work that is started before it is known to be needed,
+such as classifying the raw query while the contextual rewrite is still running.
+
+Key functionalities:
+- Speculative calls run on a caller supplied executor
+- Committing waits for the result and reports how much latency the head start saved
+- Discarding cancels work that has not started yet, work that already ran is counted as wasted
+"""
+
+import time
+
+
+class Speculation:
+    """
+    A call started speculatively, to be committed or discarded once its inputs are confirmed.
+    """
+
+    def __init__(self, executor, func, *args, **kwargs):
+        """
+        Args:
+            executor (Executor): Executor the call runs on
+            func (callable): The call, with its positional and keyword arguments
+        """
+        self.started_at = None
+        self.finished_at = None
+        self.future = executor.submit(self._run, func, args, kwargs)
+
+    def _run(self, func, args, kwargs):
+        self.started_at = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def commit(self, timeout=None):
+        """
+        Use the speculative result, waiting for it if it is still running.
+
+        Args:
+            timeout (float): Seconds to wait for the result, None to wait until it is done
+
+        Returns:
+            tuple: (result, seconds saved), the time the call ran before its result was needed
+
+        Raises:
+            TimeoutError: If the result is not ready within the timeout
+            Exception: Whatever the call raised
+        """
+        needed_at = time.perf_counter()
+        result = self.future.result(timeout)
+        started_at = self.started_at if self.started_at is not None else needed_at
+        return result, max(0.0, min(needed_at, self.finished_at) - started_at)
+
+    def discard(self):
+        """
+        Drop the speculative result.
+
+        Returns:
+            bool: True if the call was cancelled before it started, False if it ran (or is running) for nothing
+        """
+        return self.future.cancel()
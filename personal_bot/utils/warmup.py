@@ -0,0 +1,106 @@
+"""
+Warm-up and Readiness
+
+This module implements the readiness state of a worker process. A fresh worker pays for module
+imports, chain construction, the first TLS handshake and cold caches on its first turn, so the
+worker runs a warm-up before it reports itself ready.
+
+Key functionalities:
+- Runs named warm-up steps in order and times each of them
+- Failing optional steps are recorded without blocking readiness, failing required steps do
+- Records the latency of the first real turn, synthetic warm-up turns excluded
+"""
+
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """
+    Warm-up progress and readiness of the process.
+
+    Attributes:
+        state (str): "starting", "warming", "ready" or "failed"
+        steps (dict): Seconds taken per completed warm-up step
+        errors (dict): Error message per failed warm-up step
+        warmup_seconds (float): Total warm-up time, None until warm-up has finished
+        first_turn_seconds (float): Latency of the first real turn, after warm-up if the process warmed up,
+            None until it ran
+    """
+
+    def __init__(self):
+        self.state = "starting"
+        self.steps = {}
+        self.errors = {}
+        self.warmup_seconds = None
+        self.first_turn_seconds = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def run(self, steps):
+        """
+        Run the warm-up steps and switch to ready, or to failed if a required step failed.
+
+        Args:
+            steps (list): (name, callable, required) tuples, run in order
+
+        Returns:
+            bool: True if the process is ready
+        """
+        self.state = "warming"
+        start = time.perf_counter()
+        failed = False
+        for name, step, required in steps:
+            step_start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.errors[name] = f"{type(e).__name__}: {e}"
+                logger.error(f"Warm-up step {name} failed: {e}")
+                if required:
+                    failed = True
+                    break
+            else:
+                self.steps[name] = round(time.perf_counter() - step_start, 4)
+        self.warmup_seconds = round(time.perf_counter() - start, 4)
+        self.state = "failed" if failed else "ready"
+        logger.info(f"Warm-up {'failed' if failed else 'finished'} in {self.warmup_seconds:.3f}s, steps: {self.steps}")
+        return self.ready
+
+    def observe_turn(self, seconds):
+        """Record a turn latency, only the first turn outside of warm-up is kept."""
+        if self.state in ("warming", "failed") or self.first_turn_seconds is not None:
+            return
+        with self._lock:
+            if self.first_turn_seconds is None:
+                self.first_turn_seconds = round(seconds, 4)
+                logger.info(f"First turn took {self.first_turn_seconds:.3f}s (state {self.state})")
+
+    def to_dict(self):
+        return {
+            "state": self.state,
+            "warmup_seconds": self.warmup_seconds,
+            "steps": dict(self.steps),
+            "errors": dict(self.errors),
+            "first_turn_seconds": self.first_turn_seconds,
+        }
+
+
+_default_readiness = None
+_default_readiness_lock = threading.Lock()
+
+
+def get_readiness():
+    """Returns the process-wide readiness state, creating it on first use."""
+    global _default_readiness
+    if _default_readiness is None:
+        with _default_readiness_lock:
+            if _default_readiness is None:
+                _default_readiness = Readiness()
+    return _default_readiness
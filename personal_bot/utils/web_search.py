@@ -0,0 +1,323 @@
+"""
+Web Search Service
+
+This module implements a reusable web search service for queries classified as "other".
+It keeps long-lived search clients, caches results and puts a hard deadline on every search
+so a slow search engine can never block a turn indefinitely.
+
+Key functionalities:
+- Pluggable search backends (DuckDuckGo and a local fixture backend for offline tests)
+- TTL + LRU result cache keyed on the normalized search string
+- Hard per-search deadline with sync and async entry points
+- Coalescing of identical in-flight searches into a single backend call
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class WebSearchTimeout(Exception):
+    """Raised when a web search does not finish within its deadline."""
+
+
+def normalize_search_query(query):
+    """
+    Normalize a search string so that trivially different strings share one cache entry.
+
+    Args:
+        query (str): The search string
+
+    Returns:
+        str: Lowercased search string with collapsed whitespace and no trailing punctuation
+    """
+    return re.sub(r"\s+", " ", query.strip().lower()).strip(" ?!.,;:\"'")
+
+
+class SearchBackend:
+    """
+    Base class for web search backends.
+
+    A backend takes a search string and returns a list of result dicts with the keys
+    "snippet", "title" and "link", the same shape DuckDuckGoSearchResults returns.
+    """
+
+    name = "base"
+
+    def search(self, query, max_results):
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Load whatever the first search would load, without searching."""
+
+
+class DuckDuckGoBackend(SearchBackend):
+    """
+    DuckDuckGo backend that builds the search wrapper and tool once and reuses them.
+    """
+
+    name = "duckduckgo"
+
+    def __init__(self, max_results=5):
+        self.max_results = max_results
+        self._search = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._search is None:
+            with self._lock:
+                if self._search is None:
+                    from langchain_community.tools import DuckDuckGoSearchResults
+                    from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+                    wrapper = DuckDuckGoSearchAPIWrapper(max_results=self.max_results)
+                    self._search = DuckDuckGoSearchResults(api_wrapper=wrapper, output_format="list")
+        return self._search
+
+    def search(self, query, max_results):
+        return self._get_client().invoke(query)[:max_results]
+
+    def warm_up(self):
+        self._get_client()
+
+
+class FixtureBackend(SearchBackend):
+    """
+    Offline backend that serves results from a local JSON fixture file.
+
+    The fixture file maps normalized search strings to result lists. Unknown queries get
+    deterministic placeholder results so offline runs never hit the network.
+    """
+
+    name = "fixture"
+
+    def __init__(self, fixtures_path=None, fixtures=None, latency=0.0):
+        """
+        Args:
+            fixtures_path (str): Path to a JSON file mapping search strings to results
+            fixtures (dict): Fixtures passed in directly, merged over the file contents
+            latency (float): Artificial delay in seconds added to every search
+        """
+        self.fixtures = {}
+        if fixtures_path:
+            with open(fixtures_path, "r") as f:
+                self.fixtures.update(json.load(f))
+        if fixtures:
+            self.fixtures.update(fixtures)
+        self.fixtures = {normalize_search_query(key): value for key, value in self.fixtures.items()}
+        self.latency = latency
+        self.calls = Counter()
+
+    def search(self, query, max_results):
+        key = normalize_search_query(query)
+        self.calls[key] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if key in self.fixtures:
+            return self.fixtures[key][:max_results]
+        slug = re.sub(r"[^a-z0-9]+", "-", key).strip("-")
+        return [
+            {
+                "snippet": f"Offline fixture result {i + 1} for '{query}'.",
+                "title": f"{query} - result {i + 1}",
+                "link": f"https://example.com/{slug}/{i + 1}",
+            }
+            for i in range(max_results)
+        ]
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a fixed time to live.
+    """
+
+    def __init__(self, maxsize=256, ttl=900):
+        """
+        Args:
+            maxsize (int): Maximum number of entries kept, least recently used entries are evicted first
+            ttl (float): Time to live of an entry in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class WebSearchService:
+    """
+    Cached, time-bounded web search service shared across chat agents.
+
+    Searches run on a small long-lived thread pool. Identical searches that are already in
+    flight are coalesced onto the same future, and every caller waits at most `timeout` seconds.
+    """
+
+    def __init__(self, backend=None, max_results=5, timeout=5.0, cache_size=256, cache_ttl=900, max_workers=4):
+        """
+        Args:
+            backend (SearchBackend): Search backend, DuckDuckGo if not given
+            max_results (int): Number of results returned per search
+            timeout (float): Default deadline in seconds for a single search
+            cache_size (int): Maximum number of cached search strings
+            cache_ttl (float): Time to live of cached results in seconds
+            max_workers (int): Number of threads running backend searches
+        """
+        self.backend = backend or DuckDuckGoBackend(max_results=max_results)
+        self.max_results = max_results
+        self.timeout = timeout
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.stats = Counter()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-search")
+        self.flight = SingleFlight("web_search")
+
+    def _fetch(self, key, query):
+        start = time.perf_counter()
+        results = self.backend.search(query, self.max_results)
+        self.stats["backend_calls"] += 1
+        logger.info(f"Web search backend '{self.backend.name}' took {time.perf_counter() - start:.3f}s for: {query}")
+        self.cache.set(key, results)
+        return results
+
+    def _submit(self, query):
+        """Returns (cached_results, future), exactly one of them is not None."""
+        key = normalize_search_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached, None
+
+        future, leader = self.flight.submit(key, self._executor, self._fetch, key, query)
+        if not leader:
+            self.stats["coalesced"] += 1
+        return None, future
+
+    def search(self, query, timeout=None):
+        """
+        Run a web search, blocking for at most `timeout` seconds.
+
+        Args:
+            query (str): The search string
+            timeout (float): Deadline in seconds, the service default if not given
+
+        Returns:
+            list: List of search result dicts
+
+        Raises:
+            WebSearchTimeout: If the search did not finish within the deadline
+        """
+        self.stats["searches"] += 1
+        cached, future = self._submit(query)
+        if future is None:
+            return cached
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.stats["timeouts"] += 1
+            raise WebSearchTimeout(f"Web search exceeded {timeout}s deadline: {query}")
+
+    async def asearch(self, query, timeout=None):
+        """
+        Async version of `search`, the backend call still runs on the service thread pool.
+
+        Args:
+            query (str): The search string
+            timeout (float): Deadline in seconds, the service default if not given
+
+        Returns:
+            list: List of search result dicts
+
+        Raises:
+            WebSearchTimeout: If the search did not finish within the deadline
+        """
+        import asyncio
+
+        self.stats["searches"] += 1
+        cached, future = self._submit(query)
+        if future is None:
+            return cached
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise WebSearchTimeout(f"Web search exceeded {timeout}s deadline: {query}")
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def get_web_search_service():
+    """
+    Returns the process-wide web search service, creating it on first use.
+
+    The backend is chosen with the WEB_SEARCH_BACKEND environment variable ("duckduckgo" or
+    "fixture"). The fixture backend reads WEB_SEARCH_FIXTURES, and WEB_SEARCH_TIMEOUT sets the
+    default deadline in seconds.
+    """
+    global _default_service
+    if _default_service is None:
+        with _default_service_lock:
+            if _default_service is None:
+                backend_name = os.getenv("WEB_SEARCH_BACKEND", "duckduckgo")
+                if backend_name == "fixture":
+                    backend = FixtureBackend(fixtures_path=os.getenv("WEB_SEARCH_FIXTURES"))
+                else:
+                    backend = DuckDuckGoBackend()
+                _default_service = WebSearchService(
+                    backend=backend,
+                    timeout=float(os.getenv("WEB_SEARCH_TIMEOUT", "5")),
+                )
+    return _default_service
+
+
+if __name__ == "__main__":
+    service = WebSearchService(backend=FixtureBackend(latency=0.2), timeout=1.0)
+    threads = [threading.Thread(target=service.search, args=("best Italian restaurants near Andheri West",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(service.search("Best Italian restaurants near Andheri West?"))
+    print(dict(service.stats), dict(service.cache.stats))
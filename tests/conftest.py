@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The library is imported from the repository root, the CLIs and the agent from frontend/
+for path in (ROOT, os.path.join(ROOT, "frontend")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Tests never call a real LLM or search API
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("WEB_SEARCH_BACKEND", "fixture")
+
+
+@pytest.fixture
+def agent():
+    """A chat agent on the fake LLM backend with its own in-memory session store."""
+    from chat_agent import ChatAgent
+    from personal_bot.session_store import InMemorySessionStore
+
+    return ChatAgent(session_store=InMemorySessionStore(), conversation_summary=False)
+
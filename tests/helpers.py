@@ -0,0 +1,26 @@
+"""Helpers shared by the tests."""
+
+import os
+import json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def chains_called(agent):
+    """Returns the chains called in the agent's last turn, in call order."""
+    return [entry["chain"] for entry in agent.last_turn_usage.entries]
+
+
+async def call(app, method, path, body=None):
+    """Runs one request through the ASGI app, returns (status, parsed JSON body)."""
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path, "headers": []}, receive, send)
+    return sent[0]["status"], json.loads(b"".join(message.get("body", b"") for message in sent[1:]))
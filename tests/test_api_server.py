@@ -0,0 +1,88 @@
+import time
+import asyncio
+
+import pytest
+
+from api_server import AdmissionController, ChatAPI, HTTPError, Overloaded
+from personal_bot.utils.input_guard import InputTooLong
+from tests.helpers import call
+
+
+def make_app(**kwargs):
+    return ChatAPI(**{"warm_up": False, "session_ttl": 0, **kwargs})
+
+
+def test_admission_bounds_running_and_waiting_requests():
+    async def scenario():
+        admission = AdmissionController(max_concurrency=1, max_queue=1)
+        await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        assert (admission.running, admission.waiting) == (1, 1)
+        with pytest.raises(Overloaded):
+            await admission.acquire()
+        admission.release()
+        await waiter
+        assert (admission.running, admission.waiting) == (1, 0)
+        admission.release()
+        assert admission.running == 0
+
+    asyncio.run(scenario())
+
+
+def test_run_admitted_maps_errors_to_statuses():
+    app = make_app(request_timeout=0.1)
+
+    def too_long(timeout=None):
+        raise InputTooLong("Query is over the input limit")
+
+    async def scenario():
+        with pytest.raises(HTTPError) as error:
+            await app.run_admitted(time.sleep, 0.5)
+        assert error.value.status == 504
+        with pytest.raises(HTTPError) as error:
+            await app.run_admitted(too_long, pass_timeout=True)
+        assert error.value.status == 413
+        assert await app.run_admitted(lambda timeout: timeout, pass_timeout=True) == 0.0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_gets_503():
+    app = make_app(max_concurrency=1, max_queue=0, request_timeout=2)
+
+    async def scenario():
+        running = asyncio.ensure_future(app.run_admitted(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPError) as error:
+            await app.run_admitted(time.sleep, 0)
+        await running
+        return error.value.status
+
+    assert asyncio.run(scenario()) == 503
+
+
+def test_chat_continues_the_named_session():
+    app = make_app()
+
+    async def scenario():
+        status, first = await call(app, "POST", "/v1/chat", {"query": "Book a table for dinner tomorrow"})
+        assert status == 200 and first["response"]["intent_category"] == "dining"
+        status, second = await call(app, "POST", "/v1/chat", {"session_id": first["session_id"], "query": "at 8 pm for 4 people in Bandra"})
+        assert status == 200 and second["response"]["key_entities"]["date"] == "tomorrow"
+        assert (await call(app, "POST", "/v1/chat", {"query": ""}))[0] == 400
+        assert (await call(app, "GET", "/v1/chat"))[0] == 405
+
+    asyncio.run(scenario())
+
+
+def test_batch_is_capped():
+    app = make_app(max_batch=2)
+
+    async def scenario():
+        status, body = await call(app, "POST", "/v1/batch", {"queries": ["hi", "Suggest a gift for my sister"]})
+        assert status == 200 and [response["intent_category"] for response in body["responses"]] == ["greetings", "gifting"]
+        status, body = await call(app, "POST", "/v1/batch", {"queries": ["hi"] * 3})
+        assert status == 413 and "limit of 2" in body["error"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,73 @@
+import json
+
+from batch_runner import read_messages, run_batch
+
+QUERIES = [
+    "Book a table for 4 tomorrow at 8 pm in Bandra",
+    "Suggest a gift for my sister",
+    "What is the weather in Goa",
+    "hi",
+]
+
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_get_responses_keeps_input_order(agent):
+    responses = agent.get_responses(QUERIES, concurrency=2, batch_size=2)
+    assert [response["intent_category"] for response in responses] == ["dining", "gifting", "other", "greetings"]
+
+
+def test_iter_responses_reads_a_generator(agent):
+    results = dict(agent.iter_responses((query for query in QUERIES), concurrency=2, batch_size=1, preserve_order=False))
+    assert sorted(results) == [0, 1, 2, 3]
+
+
+def test_expired_batch_deadline_degrades_instead_of_failing(agent):
+    responses = agent.get_responses(QUERIES[:2], timeout=0)
+    for response in responses:
+        assert response["degraded"] is True
+        assert response["fallbacks"][0] == "keyword_intent"
+    assert [response["intent_category"] for response in responses] == ["dining", "gifting"]
+
+
+def test_malformed_extraction_fails_only_its_query(agent):
+    run_stateless_batch = agent._run_stateless_batch
+
+    def malformed_first_extraction(chain, inputs, *args, **kwargs):
+        outputs = run_stateless_batch(chain, inputs, *args, **kwargs)
+        if chain is agent.extract_key_entities_chain:
+            outputs = ["not a dict"] + list(outputs[1:])
+        return outputs
+
+    agent._run_stateless_batch = malformed_first_extraction
+    responses = agent.get_responses(QUERIES[:2])
+    assert "expected a JSON object" in responses[0]["error"]
+    assert responses[1]["key_entities"]["recipient"] == "sister"
+
+
+def test_read_messages_reports_unreadable_lines(tmp_path):
+    path = write_lines(tmp_path / "in.jsonl", ['{"id": "a", "input": "hi"}', "not json", '{"id": "b"}', '"plain"', "[1]"])
+    messages = list(read_messages(path, "input", "id"))
+    assert [message[:3] for message in messages] == [(0, "a", "hi"), (1, 1, None), (2, "b", None), (3, 3, "plain"), (4, 4, None)]
+    assert [message[3] is None for message in messages] == [True, False, False, True, False]
+
+
+def test_run_batch_writes_error_records_and_resumes(tmp_path):
+    input_path = write_lines(tmp_path / "in.jsonl", [json.dumps({"id": "a", "input": QUERIES[0]}), "not json", json.dumps(QUERIES[1])])
+    output_path = str(tmp_path / "out.jsonl")
+    run_batch(input_path, output_path, "input", "id", concurrency=2, batch_size=2, preserve_order=True, restart=False)
+
+    with open(output_path) as f:
+        records = {record["index"]: record for record in map(json.loads, f)}
+    assert sorted(records) == [0, 1, 2]
+    assert records[1]["error"].startswith("Invalid JSON")
+    assert records[0]["output"]["intent_category"] == "dining"
+    assert records[2]["output"]["intent_category"] == "gifting"
+
+    # Every line has a record, a second run has nothing left to do
+    run_batch(input_path, output_path, "input", "id", concurrency=2, batch_size=2, preserve_order=True, restart=False)
+    with open(output_path) as f:
+        assert len(f.readlines()) == 3
@@ -0,0 +1,45 @@
+import pytest
+
+from personal_bot.utils.context_gate import ContextGate
+
+
+@pytest.fixture
+def gate():
+    return ContextGate(spell_correction=True)
+
+
+def test_first_turn_skips_the_rewrite(gate):
+    assert gate.check("Suggest some romantic rooftop restaurants.", "") == (False, "no_prior_context")
+
+
+def test_pending_request_is_rewritten(gate):
+    assert gate.check("Plan a trip to Goa from Delhi", "Book a table", pending=True) == (True, "pending_intent")
+
+
+@pytest.mark.parametrize("query, reason", [
+    ("Can you book it for 7 PM?", "pronoun"),
+    ("My budget is 2000 rupees.", "ellipsis"),
+    ("Bandra", "fragment"),
+    ("between 5000 and 8000 rupees", "fragment"),
+])
+def test_contextual_queries_are_rewritten(gate, query, reason):
+    assert gate.check(query, "Book a table for dinner tomorrow") == (True, reason)
+
+
+def test_standalone_request_skips_the_rewrite(gate):
+    assert gate.check("Plan a trip to Goa from Delhi", "Book a cab to the airport") == (False, "no_contextual_markers")
+    assert gate.stats["skip"] == 1 and gate.stats["no_contextual_markers"] == 1
+
+
+def test_spelling_correction(gate):
+    assert gate.correct_spelling("Book a resturant for tomorow") == "Book a restaurant for tomorrow"
+    assert gate.correct_spelling("Resturant near Bandra please") == "Restaurant near Bandra please"
+
+
+def test_spelling_correction_keeps_plurals_and_names(gate):
+    assert gate.correct_spelling("Compare hotels for our trips") == "Compare hotels for our trips"
+    assert gate.correct_spelling("Dinner at Toscano tonight") == "Dinner at Toscano tonight"
+
+
+def test_spelling_correction_is_off_by_default():
+    assert ContextGate().correct_spelling("Book a resturant") == "Book a resturant"
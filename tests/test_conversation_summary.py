@@ -0,0 +1,58 @@
+import threading
+
+from chat_agent import ChatAgent, summary_updater
+from personal_bot.session_store import InMemorySessionStore
+from personal_bot.token_ledger import estimate_tokens
+from personal_bot.utils.conversation_summary import SummaryUpdater, build_context, truncate_to_tokens
+
+
+def test_truncate_to_tokens_cuts_at_a_word_boundary():
+    text = " ".join(f"word{index}" for index in range(100))
+    assert truncate_to_tokens("short text", 10) == "short text"
+    start = truncate_to_tokens(text, 10)
+    assert start.startswith("word0 ") and start.endswith("...") and estimate_tokens(start) <= 10
+    end = truncate_to_tokens(text, 10, keep_end=True)
+    assert end.startswith("...") and end.endswith("word99")
+
+
+def test_build_context_keeps_the_previous_message_first():
+    summary = "The user booked a table in Bandra. " * 50
+    context = build_context(summary, "Book a cab there", max_tokens=60)
+    summary_line, last_line = context.split("\n")
+    assert last_line == "User: Book a cab there"
+    assert summary_line.startswith("Summary: ...") and summary_line.endswith("Bandra.")
+    assert estimate_tokens(context) <= 62
+    assert build_context("", "") == ""
+    assert build_context("Summary only", "") == "Summary: Summary only"
+
+
+def test_updates_of_a_session_run_one_at_a_time_and_fold_exchanges():
+    updater = SummaryUpdater(max_workers=2)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def update(session_id, exchanges):
+        calls.append(list(exchanges))
+        started.set()
+        release.wait(5)
+
+    updater.schedule("s1", ("query 0", "reply"), update)
+    started.wait(5)
+    for index in (1, 2):
+        updater.schedule("s1", (f"query {index}", "reply"), update)
+    release.set()
+    assert updater.wait(timeout=5)
+    # The first update runs alone, the two exchanges that arrived meanwhile go into the next one
+    assert [len(exchanges) for exchanges in calls] == [1, 2]
+    assert updater.stats["updates"] == 2 and updater.stats["folded"] == 1
+
+
+def test_summary_is_updated_after_the_turn_and_counted_in_the_session_usage():
+    agent = ChatAgent(session_store=InMemorySessionStore())
+    agent.get_response("Book a table for dinner tomorrow")
+    turn_tokens = agent.last_turn_usage.totals()["total_tokens"]
+    assert summary_updater.wait(timeout=30)
+
+    state = agent.session_store.get_state(agent.session_id)
+    assert "Book a table for dinner tomorrow" in state["summary"]
+    assert state["token_usage"]["total_tokens"] > turn_tokens
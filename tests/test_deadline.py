@@ -0,0 +1,44 @@
+import time
+
+import chat_agent
+from personal_bot.utils.deadline import Deadline, LatencyEstimator
+from personal_bot.utils.intent_utils import DiningIntent
+from tests.helpers import chains_called
+
+
+def test_deadline():
+    assert Deadline().remaining() is None and not Deadline().expired() and Deadline().fits(1e9)
+    deadline = Deadline(0.05)
+    assert deadline.fits(0.01) and not deadline.fits(1.0)
+    time.sleep(0.06)
+    assert deadline.expired() and deadline.remaining() == 0.0
+
+
+def test_latency_estimator_moves_towards_observations():
+    estimator = LatencyEstimator({"intent_classifier_chain": 1.0}, default=2.0, alpha=0.5)
+    estimator.observe("intent_classifier_chain", 0.2)
+    assert estimator.estimate("intent_classifier_chain") == 0.6
+    assert estimator.estimate("web_search") == 2.0
+
+
+def test_expired_deadline_answers_without_any_chain(agent):
+    response = agent.get_response("Book a table for dinner tomorrow", timeout=0)
+    assert response["intent_category"] == "dining"
+    assert response["degraded"] is True
+    assert response["fallbacks"] == ["keyword_intent", "skip_entity_extraction", "skip_follow_up_questions"]
+    assert chains_called(agent) == []
+
+
+def test_stage_that_does_not_fit_falls_back(agent, monkeypatch):
+    monkeypatch.setattr(chat_agent.stage_latency, "estimates", {
+        "intent_classifier_chain": 0.0, "extract_key_entities_chain": 0.0, "follow_up_questions_chain": 60.0,
+    })
+    response = agent.get_response("Book a table for dinner tomorrow", timeout=30)
+    assert response["fallbacks"] == ["templated_follow_ups"]
+    assert response["follow_up_questions"] and set(response["follow_up_questions"]) <= set(DiningIntent.questions.values())
+    assert chains_called(agent) == ["intent_classifier_chain", "extract_key_entities_chain"]
+
+
+def test_turn_without_deadline_is_not_degraded(agent):
+    response = agent.get_response("Book a table for dinner tomorrow")
+    assert "degraded" not in response
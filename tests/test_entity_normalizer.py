@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import pytest
+
+from personal_bot.utils.entity_normalizer import EntityNormalizer
+
+# A Monday morning
+NOW = datetime(2026, 10, 19, 10, 0)
+
+
+@pytest.fixture
+def normalizer():
+    return EntityNormalizer()
+
+
+def day(iso):
+    return {"start": iso, "end": iso}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("tomorrow", day("2026-10-20")),
+    ("Friday", day("2026-10-23")),
+    ("this friday", day("2026-10-23")),
+    ("next friday", day("2026-10-30")),
+    ("monday", day("2026-10-19")),
+    ("in 3 days", day("2026-10-22")),
+    ("this weekend", {"start": "2026-10-24", "end": "2026-10-25"}),
+    ("next week", {"start": "2026-10-26", "end": "2026-11-01"}),
+    ("next month", {"start": "2026-11-01", "end": "2026-11-30"}),
+    ("returning on the 30th", day("2026-10-30")),
+    ("on the 5th", day("2026-11-05")),
+    ("25th December", day("2026-12-25")),
+    ("march 3rd", day("2027-03-03")),
+])
+def test_dates(normalizer, text, expected):
+    assert normalizer.normalize_value("date", text, NOW) == expected
+
+
+@pytest.mark.parametrize("text", ["3rd march 2025", "2026-10-01", "someday"])
+def test_past_and_unknown_dates_are_unresolved(normalizer, text):
+    assert normalizer.normalize_value("date", text, NOW) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("8 pm", ("20:00", "20:00")),
+    ("at 8", ("20:00", "20:00")),
+    ("7:30", ("19:30", "19:30")),
+    ("at 11", ("11:00", "11:00")),
+    ("12", ("12:00", "12:00")),
+    ("7 to 9 pm", ("19:00", "21:00")),
+    ("dinner", ("19:00", "22:00")),
+])
+def test_times(normalizer, text, expected):
+    start, end = expected
+    assert normalizer.normalize_value("time", text, NOW) == {"start": start, "end": end}
+
+
+def test_unknown_time_is_unresolved(normalizer):
+    assert normalizer.normalize_value("time", "whenever", NOW) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("around 50000 rupees", {"min": 50000, "max": 50000, "currency": "INR", "approximate": True}),
+    ("under 2k", {"min": None, "max": 2000, "currency": "INR"}),
+    ("between 5000 and 8000 rupees", {"min": 5000, "max": 8000, "currency": "INR"}),
+    ("1.5 lakhs", {"min": 150000, "max": 150000, "currency": "INR"}),
+    ("$200", {"min": 200, "max": 200, "currency": "USD"}),
+    (4000, {"min": 4000, "max": 4000, "currency": "INR"}),
+])
+def test_amounts(normalizer, text, expected):
+    assert normalizer.normalize_value("amount", text, NOW) == expected
+
+
+def test_default_currency():
+    assert EntityNormalizer(default_currency="USD").normalize_value("amount", "500", NOW)["currency"] == "USD"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("four people", 4),
+    ("a couple", 2),
+    ("just me", 1),
+    ("me and my wife", 2),
+    ("2 adults and 2 kids", 4),
+    ("me, my wife and 2 kids", 4),
+    (3, 3),
+    ("0", None),
+    ("many", None),
+    (2.5, None),
+])
+def test_counts(normalizer, text, expected):
+    assert normalizer.normalize_value("count", text, NOW) == expected
+
+
+def test_parsed_values_are_copies(normalizer):
+    first = normalizer.normalize_value("date", "tomorrow", NOW)
+    first["start"] = "changed"
+    assert normalizer.normalize_value("date", "tomorrow", NOW) == day("2026-10-20")
+
+
+def test_unknown_kind(normalizer):
+    with pytest.raises(ValueError):
+        normalizer.normalize_value("colour", "red", NOW)
+
+
+def test_normalize_returns_unresolved_keys(normalizer):
+    entities = {"date": "tomorrow", "time": "whenever", "budget": "None", "party_size": 4}
+    kinds = {"date": "date", "time": "time", "budget": "amount", "party_size": "count", "location": "date"}
+    normalized, unresolved = normalizer.normalize(entities, kinds, now=NOW)
+    assert normalized == {"date": day("2026-10-20"), "party_size": 4}
+    assert unresolved == ["time"]
+    assert normalizer.stats == {"date:resolved": 1, "time:unresolved": 1, "count:resolved": 1}
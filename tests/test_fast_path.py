@@ -0,0 +1,70 @@
+import pytest
+
+from personal_bot.utils.fast_path import FastPath
+from personal_bot.utils.intent_utils import incomplete_intents
+from tests.helpers import chains_called
+
+
+@pytest.fixture(scope="module")
+def fast_path():
+    return FastPath()
+
+
+@pytest.mark.parametrize("query, category", [
+    ("Hi!", "greetings"),
+    ("Good morning bot 👋", "greetings"),
+    ("hey there, how are you?", "how_are_you"),
+    ("thanks a lot, bye", "goodbye"),
+    ("hi, book a table for 2", None),
+    ("ok book a cab", None),
+    ("hi " * 40, None),
+])
+def test_match(fast_path, query, category):
+    assert fast_path.match(query) == category
+
+
+def test_stats_count_hits():
+    fast_path = FastPath(table={"categories": {"thanks": {"patterns": ["thanks"], "response": "You're welcome!"}}})
+    assert fast_path.match("Thanks!") == "thanks"
+    assert fast_path.respond("thanks") == "You're welcome!"
+    assert fast_path.match("thanks, book a cab") is None
+    assert fast_path.hit_rate() == 0.5
+    assert fast_path.match("thanks", record_stats=False) == "thanks"
+    assert fast_path.stats["checks"] == 2
+
+
+def test_incomplete_intents_keeps_requests_with_missing_slots():
+    complete = {"date": "tomorrow", "time": "8 pm", "location": "Bandra", "party_size": "4"}
+    assert incomplete_intents({"dining": complete, "gifting": {"recipient": "sister"}, "unknown": {}}) == {"gifting": {"recipient": "sister"}}
+    assert incomplete_intents(None) == {}
+
+
+def test_small_talk_calls_no_chain(agent):
+    response = agent.get_response("Hi!")
+    assert response["intent_category"] == "greetings"
+    assert chains_called(agent) == []
+
+
+def test_short_answers_to_a_pending_request_skip_the_fast_path(agent):
+    agent.get_response("Book a table for dinner tomorrow")
+    assert agent.has_pending_intent()
+    agent.get_response("thanks")
+    assert chains_called(agent) != []
+
+
+def test_fast_path_comes_back_once_the_request_is_complete(agent):
+    agent.get_response("Book a table for dinner tomorrow")
+    agent.get_response("at 8 pm, 4 people, somewhere in Bandra")
+    assert agent.session_store.get_state(agent.session_id)["partial_intents"] == {}
+    assert not agent.has_pending_intent()
+    assert agent.get_response("thanks")["intent_category"] == "greetings"
+    assert chains_called(agent) == []
+    # Without a pending request, a standalone query is not rewritten either
+    agent.get_response("Suggest a gift for my sister")
+    assert "contextual_query_chain" not in chains_called(agent)
+
+
+def test_a_request_of_another_category_replaces_the_pending_one(agent):
+    agent.get_response("Book a table for dinner tomorrow")
+    agent.get_response("Plan a trip to Goa from Mumbai")
+    assert set(agent.session_store.get_state(agent.session_id)["partial_intents"]) == {"travel"}
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+
+from personal_bot.token_ledger import estimate_tokens
+from personal_bot.utils.input_guard import (
+    InputGuard, InputTooLong, entity_spans, hard_truncate, truncate_preserving_entities,
+)
+
+FILLER = "The weather has been lovely and we had a long chat about nothing in particular. "
+LONG_QUERY = (
+    "Book a table for 4 people tomorrow at 8 pm in Bandra. "
+    + FILLER * 30
+    + "Our budget is ₹4000."
+)
+
+
+def test_entity_spans_find_counts_dates_and_places():
+    text = "Book a table for 4 people tomorrow in Bandra"
+    found = [text[start:end].strip() for start, end in entity_spans(text)]
+    assert "4 people" in found
+    assert "tomorrow" in found
+    assert "in Bandra" in found
+
+
+def test_hard_truncate():
+    assert hard_truncate("short text", 10) == "short text"
+    cut = hard_truncate("word " * 100, 10)
+    assert cut.endswith(" ...")
+    assert estimate_tokens(cut) <= 10
+
+
+def test_truncate_keeps_first_sentence_and_entities():
+    shortened = truncate_preserving_entities(LONG_QUERY, 40)
+    assert estimate_tokens(shortened) <= 40
+    assert shortened.startswith("Book a table for 4 people tomorrow at 8 pm in Bandra.")
+    assert "₹4000" in shortened
+    assert "..." in shortened
+
+
+def test_truncate_single_sentence_falls_back_to_entity_snippets():
+    text = " ".join(["blah"] * 200 + ["dinner", "for", "6", "people"] + ["blah"] * 200)
+    shortened = truncate_preserving_entities(text, 20)
+    assert "6 people" in shortened
+    assert estimate_tokens(shortened) <= 20
+
+
+def test_check_query_passes_short_queries_unchanged():
+    guard = InputGuard(max_query_tokens=256)
+    query = "Book a cab to the airport"
+    assert guard.check_query(query) is query
+    assert guard.stats["queries"] == 1
+    assert guard.stats["truncated"] == 0
+
+
+def test_check_query_truncates_long_queries():
+    guard = InputGuard(max_query_tokens=40)
+    shortened = guard.check_query(LONG_QUERY)
+    assert estimate_tokens(shortened) <= 40
+    assert "4 people" in shortened
+    assert guard.stats["truncated"] == 1
+
+
+def test_check_query_rejects_in_reject_mode():
+    guard = InputGuard(max_query_tokens=40, mode="reject")
+    with pytest.raises(InputTooLong):
+        guard.check_query(LONG_QUERY)
+    assert guard.stats["rejected"] == 1
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        InputGuard(mode="drop")
+
+
+def test_input_budget_is_capped_by_the_model_window():
+    guard = InputGuard(chain_limits={"other_chain": 100000})
+    assert guard.input_budget("intent_classifier_chain", 200, "llama-3.3-70b-versatile", 256) == 400
+    # 8192 * 0.9 - 200 - 1000
+    assert guard.input_budget("other_chain", 200, "llama3-8b-8192", 1000) == 6172
+
+
+def test_fit_chain_inputs_shortens_the_longest_input():
+    guard = InputGuard(chain_limits={"contextual_query_chain": 60})
+    prompt = SimpleNamespace(template="Rewrite {query} using {context}")
+    inputs = {"query": "Book a cab to the airport", "context": FILLER * 20}
+    fitted = guard.fit_chain_inputs("contextual_query_chain", prompt, inputs, "llama3-8b-8192", 100)
+    assert fitted is not inputs
+    assert fitted["query"] == inputs["query"]
+    assert sum(estimate_tokens(value) for value in fitted.values()) <= 60
+    assert guard.stats["chain_truncated:contextual_query_chain"] == 1
+
+    small = {"query": "hi", "context": ""}
+    assert guard.fit_chain_inputs("contextual_query_chain", prompt, small, "llama3-8b-8192", 100) is small
+
+
+def test_agent_marks_truncated_responses(agent):
+    agent.input_guard = InputGuard(max_query_tokens=40)
+    response = agent.get_response(LONG_QUERY)
+    assert response["input_truncated"] is True
+    assert "input_truncated" not in agent.get_response("Book a cab to the airport")
+
+
+def test_agent_batch_reports_rejected_queries(agent):
+    agent.input_guard = InputGuard(max_query_tokens=40, mode="reject")
+    responses = agent.get_responses([LONG_QUERY, "Book a cab to the airport"])
+    assert "40" in responses[0]["error"]
+    assert "error" not in responses[1]
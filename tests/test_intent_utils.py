@@ -0,0 +1,54 @@
+import pytest
+
+from personal_bot.utils.intent_utils import INTENT_REGISTRY, NOT_SPECIFIED, DiningIntent, GiftingIntent
+
+
+def test_registry_holds_every_intent():
+    assert set(INTENT_REGISTRY) == {"dining", "travel", "cab_booking", "gifting"}
+    assert INTENT_REGISTRY["dining"] is DiningIntent
+
+
+def test_fields_become_slots():
+    intent = DiningIntent()
+    assert intent.get_info() == dict.fromkeys(DiningIntent.keys)
+    with pytest.raises(AttributeError):
+        intent.unknown = "value"
+
+
+def test_precomputed_metadata():
+    assert DiningIntent.required_keys == ("date", "time", "location", "party_size")
+    assert DiningIntent.kinds == {"date": "date", "time": "time", "budget": "amount", "party_size": "count"}
+    assert DiningIntent.keys_prompt == str(list(DiningIntent.keys))
+    assert DiningIntent.json_schema["required"] == list(DiningIntent.required_keys)
+    assert DiningIntent.json_schema["properties"]["special_requests"] == {
+        "type": "array", "description": "Any special requirements or preferences", "items": {"type": "string"},
+    }
+
+
+def test_update_info_validates_and_ignores_unknown_keys():
+    intent = DiningIntent()
+    intent.update_info({"date": "tomorrow", "special_requests": "window seat", "unknown": "ignored"})
+    assert intent.get_updated_info() == {"date": "tomorrow", "special_requests": ["window seat"]}
+
+
+def test_update_info_can_keep_filled_values():
+    intent = DiningIntent()
+    intent.update_info({"date": "tomorrow"})
+    intent.update_info({"date": NOT_SPECIFIED, "time": "8 pm"}, skip_empty=True)
+    assert intent.get_updated_info() == {"date": "tomorrow", "time": "8 pm"}
+
+
+def test_missing_info_and_questions():
+    intent = GiftingIntent()
+    intent.update_info({"recipient": "sister", "occasion": NOT_SPECIFIED})
+    assert intent.get_missing_required_info() == ["occasion", "budget"]
+    assert intent.get_normalized_info() == {"recipient": "sister", "occasion": NOT_SPECIFIED, "budget": NOT_SPECIFIED, "special_requests": NOT_SPECIFIED}
+    assert intent.get_missing_questions(unresolved=["budget", "special_requests"]) == [
+        GiftingIntent.questions["occasion"], GiftingIntent.questions["budget"], GiftingIntent.questions["special_requests"],
+    ]
+
+
+def test_agent_dispatches_through_the_registry(agent):
+    response = agent.get_response("Book a cab from Powai to Lower Parel for 4 people")
+    assert response["intent_category"] == "cab_booking"
+    assert set(response["key_entities"]) == set(INTENT_REGISTRY["cab_booking"].keys)
@@ -0,0 +1,65 @@
+import os
+import glob
+import gzip
+import json
+
+from export_interactions import export
+from personal_bot.interaction_log import InteractionLogger, read_interactions
+
+
+def record(chain, query, raw_output='{"response": "ok"}'):
+    return {"chain": chain, "input": query, "inputs": {"query": query}, "raw_output": raw_output}
+
+
+def test_records_are_parsed_and_rotated(tmp_path):
+    interaction_logger = InteractionLogger(str(tmp_path), shard_records=2)
+    for index in range(3):
+        interaction_logger.log(record("intent_classifier_chain", f"query {index}"), parse=json.loads)
+    interaction_logger.log(record("intent_classifier_chain", "broken", raw_output="not json"), parse=json.loads)
+    interaction_logger.close()
+
+    assert len(glob.glob(os.path.join(str(tmp_path), "interactions-*.jsonl.gz"))) == 2
+    records = list(read_interactions(str(tmp_path)))
+    assert [item["input"] for item in records] == ["query 0", "query 1", "query 2", "broken"]
+    assert records[0]["parsed"] == {"response": "ok"}
+    assert records[3]["parsed"] is None and "parse_error" in records[3]
+    assert interaction_logger.stats["written"] == 4
+
+
+def test_full_queue_drops_records(tmp_path):
+    interaction_logger = InteractionLogger(str(tmp_path), queue_size=1)
+    interaction_logger.close()
+    interaction_logger.log(record("other_chain", "a"))
+    interaction_logger.log(record("other_chain", "b"))
+    assert interaction_logger.stats["dropped"] == 1
+
+
+def test_truncated_shard_is_read_up_to_the_last_record(tmp_path):
+    path = tmp_path / "interactions-20260101-000000-1-0001.jsonl.gz"
+    data = gzip.compress((json.dumps(record("other_chain", "a")) + "\n" + json.dumps(record("other_chain", "b")) + "\n").encode())
+    path.write_bytes(data[:-12])
+    assert [item["input"] for item in read_interactions(str(tmp_path))][:1] == ["a"]
+
+
+def test_export_deduplicates_by_normalized_inputs(tmp_path):
+    log_dir, output_dir = str(tmp_path / "logs"), str(tmp_path / "datasets")
+    interaction_logger = InteractionLogger(log_dir)
+    for query in ["Book a table", "  book a   TABLE ", "Plan a trip"]:
+        interaction_logger.log(record("intent_classifier_chain", query), parse=json.loads)
+    interaction_logger.log(record("intent_classifier_chain", "Broken", raw_output="not json"), parse=json.loads)
+    interaction_logger.close()
+
+    counts = export(log_dir, output_dir, eval_fraction=0.5)["intent_classifier_chain"]
+    assert counts["records"] == 4 and counts["duplicates"] == 1 and counts["unparsed"] == 1
+    assert counts["train"] + counts["eval"] == 2
+    # The split only depends on the input, a second export puts every example in the same split
+    assert export(log_dir, output_dir, eval_fraction=0.5)["intent_classifier_chain"] == counts
+
+
+def test_agent_logs_every_chain_call(agent, tmp_path):
+    agent.interaction_logger = InteractionLogger(str(tmp_path))
+    agent.get_response("Suggest a gift for my sister")
+    agent.interaction_logger.close()
+    records = list(read_interactions(str(tmp_path)))
+    assert [item["chain"] for item in records] == [entry["chain"] for entry in agent.last_turn_usage.entries]
+    assert {item["session_id"] for item in records} == {agent.session_id}
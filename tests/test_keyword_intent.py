@@ -0,0 +1,38 @@
+import pytest
+
+from personal_bot.utils.keyword_intent import classify_intent_keywords, split_intents_keywords
+
+
+@pytest.mark.parametrize("query, intent_category", [
+    ("Hello there", "greetings"),
+    ("Get me a taxi to the airport", "cab_booking"),
+    ("Book a table for dinner", "dining"),
+    ("Send flowers to my mom", "gifting"),
+    ("Plan a trip to Goa", "travel"),
+    ("What is the capital of France", "other"),
+])
+def test_classify_intent_keywords(query, intent_category):
+    assert classify_intent_keywords(query)[0] == intent_category
+
+
+def test_compound_query_is_split_per_request():
+    intents = split_intents_keywords("Plan a trip to Goa and book a table in Panjim, then send flowers to my mom")
+    assert [(intent["intent_category"], intent["span"]) for intent in intents] == [
+        ("travel", "Plan a trip to Goa"),
+        ("dining", "book a table in Panjim"),
+        ("gifting", "send flowers to my mom"),
+    ]
+
+
+def test_and_inside_one_request_does_not_split():
+    assert [intent["span"] for intent in split_intents_keywords("Book a table for dinner and drinks")] == ["Book a table for dinner and drinks"]
+
+
+def test_agent_answers_every_sub_intent(agent):
+    response = agent.get_response("Book a table for 2 tonight and get me a cab to the restaurant")
+    assert [sub_response["intent_category"] for sub_response in response["intents"]] == ["dining", "cab_booking"]
+    assert response["intents"][1]["span"] == "get me a cab to the restaurant"
+    # The follow-up questions of both requests are asked together
+    questions = response["follow_up_questions"]
+    assert all(question in questions for sub_response in response["intents"] for question in sub_response["follow_up_questions"])
+    assert set(agent.session_store.get_state(agent.session_id)["partial_intents"]) == {"dining", "cab_booking"}
@@ -0,0 +1,27 @@
+import pytest
+
+from personal_bot.utils.query_builder import QueryBuilder
+from tests.helpers import chains_called
+
+
+@pytest.mark.parametrize("query, search_string", [
+    ("Looking for budget-friendly hotels in Manali for 2 people in June", "budget hotels in Manali for 2 people in June"),
+    ("Can you suggest some good Italian restaurants near Andheri West?", "best Italian restaurants near Andheri West"),
+    ("How to fix a leaking tap in the kitchen?", "how to fix leaking tap in kitchen"),
+    ("I need a gift idea for my mom’s birthday under 1000 rupees", "gift ideas for mom birthday under 1000 rupees"),
+    ("What's the weather like today?", "weather today"),
+])
+def test_build_keeps_entities_and_drops_filler(query, search_string):
+    assert QueryBuilder().build(query) == (search_string, 0.95)
+
+
+def test_vague_query_has_low_confidence():
+    search_string, confidence = QueryBuilder().build("I want to go somewhere nice")
+    assert search_string == "go somewhere nice"
+    assert confidence < 0.6
+
+
+def test_agent_uses_the_other_chain_only_for_low_confidence_rewrites(agent):
+    assert agent.get_web_search_query("What's the weather like today?") == "weather today"
+    agent.get_response("I want to go somewhere nice")
+    assert "other_chain" in chains_called(agent)
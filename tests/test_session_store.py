@@ -0,0 +1,80 @@
+import time
+import threading
+
+import pytest
+
+from personal_bot.session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemorySessionStore()
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+
+
+def test_turns_are_appended_in_order(store):
+    store.append_turn("s1", "user", "hi")
+    store.append_turn("s1", "assistant", {"intent_category": "greetings"})
+    store.append_turn("s1", "user", "book a table")
+    assert [turn["content"] for turn in store.get_turns("s1")] == ["hi", {"intent_category": "greetings"}, "book a table"]
+    assert [turn["role"] for turn in store.get_turns("s1", last_n=2)] == ["assistant", "user"]
+    assert store.get_turns("unknown") == []
+
+
+def test_state_is_updated_key_by_key(store):
+    assert store.get_state("s1") == {}
+    store.set_state("s1", last_query="hi", partial_intents={"dining": {"date": "tomorrow"}})
+    store.set_state("s1", last_query="at 8 pm")
+    assert store.get_state("s1") == {"last_query": "at 8 pm", "partial_intents": {"dining": {"date": "tomorrow"}}}
+    assert store.get_state("s2") == {}
+
+
+def test_increment_state_is_atomic(store):
+    store.set_state("s1", token_usage={"total_tokens": 10})
+
+    def add_usage():
+        for _ in range(50):
+            store.increment_state("s1", "token_usage", {"total_tokens": 1, "prompt_tokens": 2})
+
+    threads = [threading.Thread(target=add_usage) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get_state("s1")["token_usage"] == {"total_tokens": 410, "prompt_tokens": 800}
+
+
+def test_cleanup_deletes_inactive_sessions(store):
+    store.append_turn("old", "user", "hi")
+    store.set_state("old", last_query="hi")
+    time.sleep(0.05)
+    store.append_turn("new", "user", "hello")
+    assert store.cleanup(ttl=0.04) == 1
+    assert store.get_turns("old") == [] and store.get_state("old") == {}
+    assert [turn["content"] for turn in store.get_turns("new")] == ["hello"]
+
+
+def test_sqlite_sessions_are_shared_between_stores(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteSessionStore(path).set_state("s1", last_query="hi")
+    assert SQLiteSessionStore(path).get_state("s1") == {"last_query": "hi"}
+
+
+def test_conversation_continues_in_another_agent(agent):
+    from chat_agent import ChatAgent
+
+    agent.get_response("Book a table for dinner tomorrow")
+    other = ChatAgent(session_id=agent.session_id, session_store=agent.session_store, conversation_summary=False)
+    response = other.get_response("at 8 pm for 4 people in Bandra")
+    assert response["intent_category"] == "dining"
+    assert response["key_entities"]["date"] == "tomorrow"
+    assert len(agent.session_store.get_turns(agent.session_id)) == 4
+
+
+def test_reset_session_starts_a_new_conversation(agent):
+    agent.get_response("Book a table for dinner tomorrow")
+    session_id = agent.session_id
+    agent.reset_session()
+    assert agent.session_id != session_id
+    assert agent.session_store.get_state(agent.session_id) == {}
@@ -0,0 +1,65 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import pytest
+
+from personal_bot.utils.single_flight import SingleFlight, make_key
+
+
+def test_make_key_is_stable():
+    assert make_key("chain", {"b": 1, "a": 2}) == make_key("chain", {"a": 2, "b": 1})
+    assert make_key("chain", "prompt") != make_key("chain", "other prompt")
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+
+    def slow_call(value):
+        calls.append(value)
+        time.sleep(0.2)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: flight.do(make_key("demo", 21), slow_call, 21), range(8)))
+    assert results == [42] * 8
+    assert calls == [21]
+    assert flight.stats["leaders"] == 1 and flight.stats["coalesced"] == 7
+    assert flight.in_flight() == 0
+
+
+def test_sequential_calls_are_not_cached():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+
+
+def test_exception_is_shared_and_forgotten():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing_call():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("upstream failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "key", failing_call)
+        started.wait()
+        waiter = executor.submit(flight.do, "key", failing_call)
+        for future in (leader, waiter):
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.stats["errors"] == 1
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_waiter_timeout_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future, leader = flight.submit("key", executor, lambda: time.sleep(0.2) or "done")
+        assert leader
+        with pytest.raises(FutureTimeoutError):
+            flight.do("key", lambda: "not called", timeout=0.01)
+        assert future.result() == "done"
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chat_agent import speculation_stats
+from personal_bot.token_ledger import TokenLedger
+from personal_bot.utils.speculation import Speculation
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        yield executor
+
+
+def test_commit_returns_result_and_time_saved(executor):
+    speculation = Speculation(executor, lambda value: time.sleep(0.05) or value * 2, 21)
+    time.sleep(0.1)
+    result, saved = speculation.commit()
+    assert result == 42
+    assert saved >= 0.04
+
+
+def test_commit_raises_what_the_call_raised(executor):
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        Speculation(executor, fail).commit()
+
+
+def test_discard_cancels_calls_that_have_not_started(executor):
+    release = threading.Event()
+    running = Speculation(executor, release.wait)
+    queued = Speculation(executor, lambda: "unused")
+    assert queued.discard() is True
+    assert running.discard() is False
+    release.set()
+
+
+@pytest.fixture
+def speculative_agent(agent):
+    agent.speculative = True
+    return agent
+
+
+def test_first_turn_is_a_hit(speculative_agent):
+    response = speculative_agent.get_response("Book a table for dinner tomorrow")
+    assert response["intent_category"] == "dining"
+    speculation = speculative_agent.last_speculation
+    assert speculation["predicted"] == "dining"
+    assert speculation["classification"] == "hit"
+    assert speculation["extraction"] == "hit"
+
+
+def test_hit_gives_the_same_response_as_the_sequential_pipeline(agent):
+    query = "Book a cab from Powai to Lower Parel for 4 people"
+    sequential = agent.get_response(query)
+    agent.reset_session()
+    agent.speculative = True
+    speculative = agent.get_response(query)
+    assert speculative["intent_category"] == sequential["intent_category"]
+    assert speculative["key_entities"] == sequential["key_entities"]
+    assert agent.last_speculation["classification"] == "hit"
+
+
+def test_rewritten_follow_up_is_a_miss_and_charged_as_wasted(speculative_agent, tmp_path, monkeypatch):
+    path = tmp_path / "ledger.jsonl"
+    speculative_agent.ledger = TokenLedger(path=str(path))
+    speculative_agent.get_response("Book a table for dinner tomorrow")
+
+    # A slow rewrite, so the speculative call has started (and is not cancelled) when it is discarded
+    rewrite = speculative_agent.get_contextual_query_response
+    monkeypatch.setattr(speculative_agent, "get_contextual_query_response", lambda query: time.sleep(0.05) or rewrite(query))
+    wasted_before = speculation_stats["wasted_calls"]
+
+    response = speculative_agent.get_response("at 8 pm")
+    assert response["intent_category"] == "dining"
+    assert speculative_agent.last_speculation["classification"] == "miss"
+
+    # The discarded call is charged when it finishes, which can be after the turn
+    for _ in range(100):
+        if speculation_stats["wasted_calls"] > wasted_before:
+            break
+        time.sleep(0.01)
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    wasted = [entry for entry in entries if entry.get("wasted")]
+    assert wasted
+    assert all(entry["chain"] == "intent_classifier_chain" for entry in wasted)
+    # Committed and discarded calls of the turn are recorded separately
+    turn_chains = [entry["chain"] for entry in speculative_agent.last_turn_usage.entries]
+    assert all("wasted" not in entry for entry in speculative_agent.last_turn_usage.entries)
+    assert "intent_classifier_chain" in turn_chains
+
+
+def test_stats_count_turns_by_stage_and_result(speculative_agent):
+    before = dict(speculation_stats)
+    speculative_agent.get_response("Book a cab to the airport")
+    assert speculation_stats["turns"] == before.get("turns", 0) + 1
+    assert speculation_stats["classification_hit"] == before.get("classification_hit", 0) + 1
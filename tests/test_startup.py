@@ -0,0 +1,27 @@
+import os
+import sys
+import subprocess
+
+from tests.helpers import ROOT
+
+
+def run_in_fresh_process(code):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, "frontend")]))
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.join(ROOT, "frontend"), env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+
+def test_importing_the_agent_does_not_load_ui_or_search_modules():
+    loaded = run_in_fresh_process(
+        "import sys, chat_agent; print(*[name in sys.modules for name in ('streamlit', 'langchain_community.tools')])"
+    )
+    assert loaded == ["False", "False"]
+
+
+def test_chains_are_built_on_first_use():
+    built = run_in_fresh_process(
+        "import chat_agent; agent = chat_agent.ChatAgent(); print(len(chat_agent._chains));"
+        "agent.get_response('Suggest a gift for my sister'); print('intent_classifier_chain' in chat_agent._chains, 'other_chain' in chat_agent._chains)"
+    )
+    assert built == ["0", "True", "False"]
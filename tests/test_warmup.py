@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+import api_server
+from chat_agent import warm_up
+from personal_bot.utils.warmup import Readiness
+from tests.helpers import call
+
+
+def fail():
+    raise RuntimeError("unreachable")
+
+
+def test_steps_are_timed_in_order():
+    readiness = Readiness()
+    order = []
+    assert readiness.run([("a", lambda: order.append("a"), True), ("b", lambda: order.append("b"), True)])
+    assert order == ["a", "b"]
+    assert list(readiness.steps) == ["a", "b"]
+    assert readiness.to_dict()["state"] == "ready"
+    assert readiness.warmup_seconds is not None
+
+
+def test_failing_optional_step_does_not_block_readiness():
+    readiness = Readiness()
+    assert readiness.run([("connections", fail, False), ("chains", lambda: None, True)])
+    assert readiness.errors == {"connections": "RuntimeError: unreachable"}
+    assert "chains" in readiness.steps
+
+
+def test_failing_required_step_stops_the_warm_up():
+    readiness = Readiness()
+    ran = []
+    assert not readiness.run([("chains", fail, True), ("local_state", lambda: ran.append(1), True)])
+    assert readiness.state == "failed"
+    assert ran == []
+
+
+def test_first_turn_excludes_warm_up_turns():
+    readiness = Readiness()
+    readiness.state = "warming"
+    readiness.observe_turn(5.0)
+    assert readiness.first_turn_seconds is None
+    readiness.state = "ready"
+    readiness.observe_turn(0.25)
+    readiness.observe_turn(1.0)
+    assert readiness.first_turn_seconds == 0.25
+
+
+def test_warm_up_with_synthetic_turn():
+    readiness = Readiness()
+    assert warm_up(synthetic_turn=True, readiness=readiness)
+    assert set(readiness.steps) == {"chains", "local_state", "connections", "synthetic_turn"}
+    assert readiness.errors == {}
+    # The synthetic turn runs while warming and is not the first turn
+    assert readiness.first_turn_seconds is None
+
+
+@pytest.mark.parametrize("warm, state, status", [
+    (True, "starting", 503),
+    (True, "warming", 503),
+    (True, "ready", 200),
+    (True, "failed", 503),
+    (False, "starting", 200),
+])
+def test_readyz(monkeypatch, warm, state, status):
+    readiness = Readiness()
+    readiness.state = state
+    monkeypatch.setattr(api_server, "get_readiness", lambda: readiness)
+    code, body = asyncio.run(call(api_server.ChatAPI(warm_up=warm, session_ttl=0), "GET", "/readyz"))
+    assert code == status
+    assert body["ready"] is (status == 200)
+    assert body["state"] == state
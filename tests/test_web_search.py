@@ -0,0 +1,62 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from personal_bot.utils.web_search import FixtureBackend, TTLCache, WebSearchService, WebSearchTimeout, normalize_search_query
+
+
+def test_normalize_search_query():
+    assert normalize_search_query("  Best  Pizza in Goa?? ") == "best pizza in goa"
+
+
+def test_fixture_backend_serves_fixtures_and_placeholders():
+    backend = FixtureBackend(fixtures={"Pizza Goa": [{"snippet": "s", "title": "t", "link": "l"}]})
+    assert backend.search("pizza goa", 5) == [{"snippet": "s", "title": "t", "link": "l"}]
+    placeholders = backend.search("unknown query", 2)
+    assert [result["link"] for result in placeholders] == ["https://example.com/unknown-query/1", "https://example.com/unknown-query/2"]
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.stats["evictions"] == 1
+    assert cache.get("c") == 3
+    time.sleep(0.06)
+    assert cache.get("c") is None
+    assert cache.stats["expired"] == 1
+
+
+def test_search_is_cached_on_the_normalized_query():
+    backend = FixtureBackend()
+    service = WebSearchService(backend=backend, max_results=3)
+    first = service.search("Weather in Goa")
+    assert service.search("weather in goa?") == first
+    assert service.stats["backend_calls"] == 1
+    assert service.stats["cache_hits"] == 1
+
+
+def test_search_times_out():
+    service = WebSearchService(backend=FixtureBackend(latency=0.5), timeout=0.05)
+    with pytest.raises(WebSearchTimeout):
+        service.search("slow query")
+    with pytest.raises(WebSearchTimeout):
+        asyncio.run(service.asearch("another slow query"))
+    assert service.stats["timeouts"] == 2
+
+
+def test_identical_searches_in_flight_are_coalesced():
+    backend = FixtureBackend(latency=0.2)
+    service = WebSearchService(backend=backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.search("museums in Delhi"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4 and all(result == results[0] for result in results)
+    assert backend.calls["museums in delhi"] == 1